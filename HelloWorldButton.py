@@ -18,9 +18,11 @@ from luma.oled.device import ssd1306
 from luma.core.render import canvas
 from PIL import ImageFont
 
+from i2cDiscovery import address
+
 # -------- Config --------
 PIN_BTN = 17          # change if you wired the button elsewhere
-I2C_ADDR = 0x3C       # change to 0x3D if your module uses that address
+I2C_ADDR = address("ssd1306", 0x3C)   # 0x3C or 0x3D, from the cached bus scan
 
 # -------- Init OLED --------
 serial = i2c(port=1, address=I2C_ADDR)
@@ -1,54 +1,153 @@
+#!/usr/bin/env python3
+# IMUtemp.py — block-read driver for the ICM-2904B (MPU-style register map)
+#
+#   python3 IMUtemp.py                 print a sample every 2 s
+#   python3 IMUtemp.py --rate 200      configure a 200 Hz sample rate
+#   python3 IMUtemp.py --bench 2000    compare per-byte vs block reads
+
 import time
+import struct
+import argparse
 import smbus2
 
 # ICM-2904B default I2C address (double-check your module’s docs/datasheet)
-ICM2904B_ADDR = 0x68  
-
-# I²C bus (1 for Raspberry Pi)
-bus = smbus2.SMBus(1)
-
-# --- Helper: read 16-bit signed value from two registers ---
-def read_word(register):
-    high = bus.read_byte_data(ICM2904B_ADDR, register)
-    low  = bus.read_byte_data(ICM2904B_ADDR, register + 1)
-    value = (high << 8) | low
-    if value & 0x8000:  # convert to signed
-        value -= 65536
-    return value
+ICM2904B_ADDR = 0x68
+I2C_BUS       = 1       # I²C bus (1 for Raspberry Pi)
 
 # --- Example register map (adjust for ICM-2904B datasheet) ---
+REG_SMPLRT_DIV   = 0x19
+REG_CONFIG       = 0x1A   # DLPF_CFG in bits 2:0
 REG_ACCEL_XOUT_H = 0x3B
-REG_GYRO_XOUT_H  = 0x43
 REG_TEMP_OUT_H   = 0x41
+REG_GYRO_XOUT_H  = 0x43
+REG_PWR_MGMT_1   = 0x6B
 # (Magnetometer is usually via secondary I²C passthrough; check datasheet)
 
-def read_all():
-    # Accel
-    ax = read_word(REG_ACCEL_XOUT_H)
-    ay = read_word(REG_ACCEL_XOUT_H + 2)
-    az = read_word(REG_ACCEL_XOUT_H + 4)
+# ACCEL_XOUT_H .. GYRO_ZOUT_L is one contiguous 14-byte block:
+# ax ay az temp gx gy gz, big-endian int16
+BLOCK_LEN = 14
+BLOCK     = struct.Struct(">7h")
+
+# Gyro output rate feeding SMPLRT_DIV: 1 kHz with the DLPF on, 8 kHz with it off
+BASE_RATE_DLPF   = 1000.0
+BASE_RATE_NODLPF = 8000.0
+DLPF_CFG         = 3      # ~44 Hz bandwidth; 0 or 7 disables the filter
+
+def temp_c_from_raw(raw):
+    return (raw / 333.87) + 21.0  # check datasheet for conversion
+
+class ICM2904B:
+    def __init__(self, bus=None, addr=ICM2904B_ADDR, rate_hz=None, dlpf=DLPF_CFG):
+        self.bus = bus if bus is not None else smbus2.SMBus(I2C_BUS)
+        self.addr = addr
+        self.dlpf = dlpf
+        self.rate_hz = None
+        self.bus.write_byte_data(addr, REG_PWR_MGMT_1, 0x01)   # wake, PLL clock
+        time.sleep(0.010)
+        if rate_hz is not None:
+            self.set_rate(rate_hz)
 
-    # Temp
-    temp_raw = read_word(REG_TEMP_OUT_H)
-    temp_c = (temp_raw / 333.87) + 21.0  # check datasheet for conversion
+    def set_rate(self, rate_hz):
+        # rate = base / (1 + SMPLRT_DIV); returns the rate actually configured
+        base = BASE_RATE_DLPF if self.dlpf not in (0, 7) else BASE_RATE_NODLPF
+        div = max(0, min(255, round(base / rate_hz) - 1))
+        self.bus.write_byte_data(self.addr, REG_CONFIG, self.dlpf & 0x07)
+        self.bus.write_byte_data(self.addr, REG_SMPLRT_DIV, div)
+        self.rate_hz = base / (1 + div)
+        return self.rate_hz
 
-    # Gyro
-    gx = read_word(REG_GYRO_XOUT_H)
-    gy = read_word(REG_GYRO_XOUT_H + 2)
-    gz = read_word(REG_GYRO_XOUT_H + 4)
+    def read_raw(self):
+        # One transaction; high/low bytes of every channel come from the same
+        # register snapshot, so values cannot tear
+        return BLOCK.unpack(bytes(self.bus.read_i2c_block_data(
+            self.addr, REG_ACCEL_XOUT_H, BLOCK_LEN)))
 
-    return {
-        "accel": (ax, ay, az),
-        "gyro": (gx, gy, gz),
-        "temp_c": temp_c
-    }
+    def read_all(self):
+        ax, ay, az, temp_raw, gx, gy, gz = self.read_raw()
+        return {
+            "accel": (ax, ay, az),
+            "gyro": (gx, gy, gz),
+            "temp_c": temp_c_from_raw(temp_raw)
+        }
+
+    def read_many(self, n, period=0.0):
+        # n samples decoded in one go: (n, 7) int16 array with NumPy,
+        # list of tuples without it
+        buf = bytearray(n * BLOCK_LEN)
+        next_t = time.monotonic()
+        for i in range(n):
+            buf[i * BLOCK_LEN:(i + 1) * BLOCK_LEN] = self.bus.read_i2c_block_data(
+                self.addr, REG_ACCEL_XOUT_H, BLOCK_LEN)
+            if period:
+                next_t += period
+                delay = next_t - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+        try:
+            import numpy as np
+        except ImportError:
+            return list(BLOCK.iter_unpack(buf))
+        return np.frombuffer(buf, dtype=">i2").reshape(n, 7).astype(np.int16)
+
+    def close(self):
+        try:
+            self.bus.close()
+        except Exception:
+            pass
+
+# --- Original per-register path, kept for the benchmark ---
+def read_word(bus, addr, register):
+    high = bus.read_byte_data(addr, register)
+    low  = bus.read_byte_data(addr, register + 1)
+    value = (high << 8) | low
+    if value & 0x8000:  # convert to signed
+        value -= 65536
+    return value
+
+def read_all_bytewise(bus, addr=ICM2904B_ADDR):
+    ax = read_word(bus, addr, REG_ACCEL_XOUT_H)
+    ay = read_word(bus, addr, REG_ACCEL_XOUT_H + 2)
+    az = read_word(bus, addr, REG_ACCEL_XOUT_H + 4)
+    temp_c = temp_c_from_raw(read_word(bus, addr, REG_TEMP_OUT_H))
+    gx = read_word(bus, addr, REG_GYRO_XOUT_H)
+    gy = read_word(bus, addr, REG_GYRO_XOUT_H + 2)
+    gz = read_word(bus, addr, REG_GYRO_XOUT_H + 4)
+    return {"accel": (ax, ay, az), "gyro": (gx, gy, gz), "temp_c": temp_c}
+
+def benchmark(imu, n=1000):
+    # -> {name: samples/s}; run with nothing else on the bus
+    results = {}
+    t0 = time.perf_counter()
+    for _ in range(n):
+        read_all_bytewise(imu.bus, imu.addr)
+    results["bytewise (14 transactions)"] = n / (time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        imu.read_all()
+    results["block (1 transaction)"] = n / (time.perf_counter() - t0)
+    return results
 
 # --- Main loop ---
-try:
-    while True:
-        data = read_all()
-        print(f"Accel: {data['accel']}, Gyro: {data['gyro']}, Temp: {data['temp_c']:.2f}°C")
-        time.sleep(2)  # every 2 seconds
-except KeyboardInterrupt:
-    print("Stopping...")
-    bus.close()
+def main():
+    ap = argparse.ArgumentParser(description="ICM-2904B block-read driver")
+    ap.add_argument("--rate", type=float, help="sensor sample rate in Hz")
+    ap.add_argument("--bench", type=int, metavar="N", help="benchmark N samples and exit")
+    args = ap.parse_args()
+
+    imu = ICM2904B(rate_hz=args.rate)
+    try:
+        if args.bench:
+            for name, rate in benchmark(imu, args.bench).items():
+                print(f"{name:28} {rate:8.0f} samples/s")
+            return
+        while True:
+            data = imu.read_all()
+            print(f"Accel: {data['accel']}, Gyro: {data['gyro']}, Temp: {data['temp_c']:.2f}°C")
+            time.sleep(2)  # every 2 seconds
+    except KeyboardInterrupt:
+        print("Stopping...")
+    finally:
+        imu.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,73 +1,64 @@
-import time
-import board
-import busio
-import adafruit_tcs34725
-from collections import deque
+from rgbDriver import TCS34725
+from rgbSync import ColorSampler
+from i2cDiscovery import address
+from rgbFilter import FilterBank
+from sensorSink import open_sink
 
-# Set up I2C and sensor
-i2c = busio.I2C(board.SCL, board.SDA)
-sensor = adafruit_tcs34725.TCS34725(i2c)
+# Set up the sensor (smbus2, I2C bus 1)
+sensor = TCS34725(addr=address("tcs34725", 0x29),
+                  integration_ms=100,   # ms
+                  gain=4)               # 1, 4, 16, or 60
+sampler = ColorSampler(sensor)          # one read per completed integration (int_pin=BCM to use INT)
 
-# Optional tuning
-sensor.integration_time = 100   # ms
-sensor.gain = 4                 # 1, 4, 16, or 60
+# --- Moving average over WINDOW samples (rgbFilter: O(1) per sample for any window) ---
+WINDOW = 3                      # samples; lag ~ WINDOW x (integration + 2.4 ms)
+FILTER = "mean"                 # or "ema", "median", "min", "max"
+CHANNELS = ("r", "g", "b", "c", "lux", "ct", "rb", "gb", "bb")   # ct may be None
+filters = FilterBank(CHANNELS, WINDOW, FILTER)
 
-# --- Moving average (window = 3) ---
-WINDOW = 3
-buf = {
-    "r": deque(maxlen=WINDOW),
-    "g": deque(maxlen=WINDOW),
-    "b": deque(maxlen=WINDOW),
-    "c": deque(maxlen=WINDOW),
-    "lux": deque(maxlen=WINDOW),
-    "ct": deque(maxlen=WINDOW),     # may skip None
-    "rb": deque(maxlen=WINDOW),     # 8-bit RGB bytes
-    "gb": deque(maxlen=WINDOW),
-    "bb": deque(maxlen=WINDOW),
-}
+# --- Output: "console" (formatted lines), "csv" or "bin" (packed records, see sensorSink) ---
+OUTPUT = "console"
+OUTPUT_PATH = "rgb.bin"         # for csv/bin
+FIELDS = CHANNELS + tuple(f"{ch}_m" for ch in CHANNELS)
 
-def push(key, value):
-    if value is not None:
-        buf[key].append(value)
+def fmt_int(x):  return "—" if x is None else str(int(round(x)))
+def fmt_f1(x):   return "—" if x is None else f"{x:.1f}"
 
-def mean(key):
-    q = buf[key]
-    return (sum(q) / len(q)) if q else None
+def format_row(row):
+    # pretty printing with safe fallbacks
+    (r, g, b, c, lux, ct, rb, gb, bb,
+     r_m, g_m, b_m, c_m, lux_m, ct_m, rb_m, gb_m, bb_m) = row
+    return (
+        f"Raw RGBC: {r:5} {g:5} {b:5} {c:5}"
+        f" | MA3 RGBC: {fmt_int(r_m):>5} {fmt_int(g_m):>5} {fmt_int(b_m):>5} {fmt_int(c_m):>5}"
+        f" | RGB: ({rb:3},{gb:3},{bb:3})"
+        f" | MA3 RGB: ({fmt_int(rb_m):>3},{fmt_int(gb_m):>3},{fmt_int(bb_m):>3})"
+        f" | CT: {fmt_int(ct)} K"
+        f" | MA3 CT: {fmt_int(ct_m)} K"
+        f" | Lux: {fmt_f1(lux)}"
+        f" | MA3 Lux: {fmt_f1(lux_m)}"
+    )
+
+sink = open_sink(OUTPUT, OUTPUT_PATH, FIELDS,
+                 **({"fmt": format_row} if OUTPUT == "console" else {}))
 
 print("Press Ctrl+C to stop.")
 try:
     while True:
-        r, g, b, c = sensor.color_raw
-        ct = sensor.color_temperature     # may be None
-        lux = sensor.lux
-        rb, gb, bb = sensor.color_rgb_bytes
-
-        # update buffers
-        push("r", r);   push("g", g);   push("b", b);   push("c", c)
-        push("lux", lux); push("ct", ct)
-        push("rb", rb); push("gb", gb); push("bb", bb)
-
-        # compute MA3
-        r_m = mean("r"); g_m = mean("g"); b_m = mean("b"); c_m = mean("c")
-        lux_m = mean("lux")
-        ct_m = mean("ct")   # may be None if not enough valid samples yet
-        rb_m = mean("rb"); gb_m = mean("gb"); bb_m = mean("bb")
-
-        # pretty printing with safe fallbacks
-        def fmt_int(x):  return "—" if x is None else str(int(round(x)))
-        def fmt_f1(x):   return "—" if x is None else f"{x:.1f}"
-
-        print(
-            f"Raw RGBC: {r:5} {g:5} {b:5} {c:5}"
-            f" | MA3 RGBC: {fmt_int(r_m):>5} {fmt_int(g_m):>5} {fmt_int(b_m):>5} {fmt_int(c_m):>5}"
-            f" | RGB: ({rb:3},{gb:3},{bb:3})"
-            f" | MA3 RGB: ({fmt_int(rb_m):>3},{fmt_int(gb_m):>3},{fmt_int(bb_m):>3})"
-            f" | CT: {('—' if ct is None else str(int(ct)))} K"
-            f" | MA3 CT: {fmt_int(ct_m)} K"
-            f" | Lux: {lux:.1f}"
-            f" | MA3 Lux: {fmt_f1(lux_m)}"
-        )
+        s = sampler.read()                # next completed integration, stamped
+        r, g, b, c = s.raw
+        ct = s.ct                         # may be None
+        lux = s.lux                       # None when the clear channel saturates
+        rb, gb, bb = s.rgb
 
-        time.sleep(0.5)   # sampling period; MA3 introduces ~0.5 s effective delay
+        # update all channels at once (None is masked out) and get every mean back;
+        # a channel with no valid samples in the window yet (ct) comes back None
+        values = (r, g, b, c, lux, ct, rb, gb, bb)
+        smoothed = filters.push(values)
+        sink.write(values + tuple(None if x != x else x for x in smoothed.tolist()))
 except KeyboardInterrupt:
     pass
+finally:
+    sink.close()
+    sampler.close()
+    sensor.close()
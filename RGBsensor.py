@@ -1,33 +1,31 @@
-import time
-import board
-import busio
-import adafruit_tcs34725
+from rgbDriver import TCS34725
+from rgbSync import ColorSampler
+from i2cDiscovery import address
+import rgbCalib
 
-# Set up I2C and sensor
-i2c = busio.I2C(board.SCL, board.SDA)
-sensor = adafruit_tcs34725.TCS34725(i2c)
-
-# Optional tuning
-sensor.integration_time = 100   # ms (typical: 50–154; higher = more light gathered)
-sensor.gain = 4                 # 1, 4, 16, or 60
-
-# If your breakout has an onboard LED you can toggle:
-try:
-    sensor.led_current = adafruit_tcs34725.LED_CURRENT_12MA
-    sensor.enable = True
-except Exception:
-    pass  # some boards don't expose LED control
+# Set up the sensor (smbus2, I2C bus 1)
+sensor = TCS34725(addr=address("tcs34725", 0x29),
+                  integration_ms=100,   # ms (typical: 50–154; higher = more light gathered)
+                  gain=4)               # 1, 4, 16, or 60
+sampler = ColorSampler(sensor)          # one read per completed integration (int_pin=BCM to use INT)
+cal = rgbCalib.load(sensor.addr)        # stored white/black + matrix, if any
+corrector = rgbCalib.ColorCorrector(cal) if cal else None
 
 print("Press Ctrl+C to stop.")
 try:
     while True:
-        r, g, b, c = sensor.color_raw     # raw channels
-        ct = sensor.color_temperature     # Kelvin (may be None under some lighting)
-        lux = sensor.lux                  # approximate lux
-        rgb = sensor.color_rgb_bytes      # 8-bit RGB tuple
+        s = sampler.read()      # waits for the next integration; one block read
+        r, g, b, c = s.raw      # raw channels
+        ct = s.ct               # Kelvin (None under some lighting)
+        lux = s.lux             # approximate lux (None when saturated)
+        rgb = s.rgb             # 8-bit RGB tuple
 
-        print(f"Raw RGBC: {r:5} {g:5} {b:5} {c:5} | RGB: {rgb} | CT: {ct} K | Lux: {lux}")
-        time.sleep(0.5)
+        line = f"Raw RGBC: {r:5} {g:5} {b:5} {c:5} | RGB: {rgb} | CT: {ct} K | Lux: {lux}"
+        if corrector is not None:
+            line += f" | Cal RGB: {corrector.sample_bytes(s)}"
+        print(line)
 except KeyboardInterrupt:
     pass
-
+finally:
+    sampler.close()
+    sensor.close()
@@ -0,0 +1,545 @@
+#!/usr/bin/env python3
+# gpioBroker.py — one process owns the gpiochip lines, rover scripts share them
+#
+# Run the daemon once (e.g. from systemd):   python3 gpioBroker.py --chip 0
+# Then, in any script:
+#
+#   from gpioBroker import GPIOClient
+#   gpio = GPIOClient()
+#   gpio.claim_output(22)
+#   with gpio.batch() as b:          # one round trip for both pins
+#       b.write(22, 1)
+#       b.write(24, 1)
+#   level = gpio.read(17)            # shared-memory snapshot, no round trip
+#
+# Commands travel as fixed 4-byte records over a SOCK_SEQPACKET Unix socket, so
+# a whole batch is one datagram and one reply. Input levels are published in a
+# small /dev/shm page guarded by a sequence counter; readers never talk to the
+# daemon. Each pin has exactly one owner; a claim is a lease that is renewed by
+# any command from its owner and dropped when it expires or the client exits.
+
+import os
+import sys
+import mmap
+import errno
+import socket
+import struct
+import argparse
+import selectors
+from time import monotonic, monotonic_ns
+from signal import signal, SIGINT, SIGTERM
+from threading import Lock, Thread, Event
+
+# -------- Config --------
+SOCKET_PATH = "/tmp/rover-gpio.sock"
+SHM_PATH    = "/dev/shm/rover-gpio"
+GPIO_CHIP   = 0          # Pi 5 on older kernels exposes the header as gpiochip4
+LEASE_SEC   = 5.0        # claims expire unless the owner talks to us this often
+MAX_PINS    = 64
+MAX_BATCH   = 256        # ops per datagram
+
+# -------- Wire format --------
+# request:  N x <op:u8, pin:u8, arg:u8, pad:u8>
+# reply:    N x <status:u8, value:u8>
+OP = struct.Struct("<BBBx")
+RESULT = struct.Struct("<BB")
+
+OP_CLAIM_OUT = 1   # arg = initial level
+OP_CLAIM_IN  = 2   # arg = PULL_*
+OP_RELEASE   = 3
+OP_WRITE     = 4   # arg = level
+OP_READ      = 5   # reads the line itself (bypasses the snapshot)
+OP_RENEW     = 6   # pin ignored; renews every lease held by the caller
+
+PULL_NONE = 0
+PULL_UP   = 1
+PULL_DOWN = 2
+
+ST_OK        = 0
+ST_BUSY      = 1   # pin leased by another client
+ST_NOT_OWNER = 2   # caller has not claimed the pin
+ST_BAD_OP    = 3
+ST_HW        = 4   # lgpio refused the request
+
+STATUS_TEXT = {
+    ST_BUSY: "busy (leased by another client)",
+    ST_NOT_OWNER: "not claimed by this client",
+    ST_BAD_OP: "bad request",
+    ST_HW: "hardware error",
+}
+
+# -------- Shared snapshot --------
+# <seq:u32, lease_ms:u32, levels:u64, claimed:u64, outputs:u64, stamp_ns:u64>
+# seq is odd while the daemon is writing; readers retry until it is even and
+# unchanged across their read. lease_ms is the daemon's --lease, so clients
+# renew in time however it was started.
+SNAP = struct.Struct("<IIQQQQ")
+SEQ = struct.Struct("<I")
+SHM_SIZE = mmap.PAGESIZE
+
+
+class BrokerError(RuntimeError):
+    def __init__(self, pin, status):
+        super().__init__(f"GPIO{pin}: {STATUS_TEXT.get(status, status)}")
+        self.pin = pin
+        self.status = status
+
+
+class Snapshot:
+    # Writer side of the shared level page; one lock serialises the lgpio
+    # callback thread and the socket loop.
+    def __init__(self, path=SHM_PATH, lease_sec=LEASE_SEC):
+        self.path = path
+        self.lease_ms = int(lease_sec * 1000)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, SHM_SIZE)
+            self.mm = mmap.mmap(fd, SHM_SIZE)
+        finally:
+            os.close(fd)
+        self.lock = Lock()
+        self.seq = 0
+        self.levels = 0
+        self.claimed = 0
+        self.outputs = 0
+        self._publish()
+
+    def _publish(self):
+        self.seq += 1
+        SEQ.pack_into(self.mm, 0, self.seq)
+        SNAP.pack_into(self.mm, 0, self.seq, self.lease_ms, self.levels,
+                       self.claimed, self.outputs, monotonic_ns())
+        self.seq += 1
+        SEQ.pack_into(self.mm, 0, self.seq)
+
+    def set_level(self, pin, level):
+        bit = 1 << pin
+        with self.lock:
+            new = (self.levels | bit) if level else (self.levels & ~bit)
+            if new != self.levels:
+                self.levels = new
+                self._publish()
+
+    def set_claim(self, pin, claimed, output=False, level=0):
+        bit = 1 << pin
+        with self.lock:
+            if claimed:
+                self.claimed |= bit
+                self.outputs = (self.outputs | bit) if output else (self.outputs & ~bit)
+            else:
+                self.claimed &= ~bit
+                self.outputs &= ~bit
+            self.levels = (self.levels | bit) if level else (self.levels & ~bit)
+            self._publish()
+
+    def close(self):
+        self.mm.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class Lease:
+    __slots__ = ("owner", "output", "expires", "cb")
+
+    def __init__(self, owner, output, expires):
+        self.owner = owner
+        self.output = output
+        self.expires = expires
+        self.cb = None
+
+
+class Broker:
+    def __init__(self, chip=GPIO_CHIP, sock_path=SOCKET_PATH, shm_path=SHM_PATH,
+                 lease_sec=LEASE_SEC):
+        import lgpio  # only the daemon needs it; clients stay dependency-free
+        self.lg = lgpio
+        self.h = lgpio.gpiochip_open(chip)
+        self.lease_sec = lease_sec
+        self.leases = {}        # pin -> Lease
+        self.clients = {}       # fd -> socket
+        self.snap = Snapshot(shm_path, lease_sec)
+
+        self.sock_path = sock_path
+        try:
+            os.unlink(sock_path)
+        except FileNotFoundError:
+            pass
+        self.srv = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        self.srv.bind(sock_path)
+        os.chmod(sock_path, 0o666)
+        self.srv.listen(16)
+        self.srv.setblocking(False)
+
+        self.sel = selectors.DefaultSelector()
+        self.sel.register(self.srv, selectors.EVENT_READ)
+        self.running = True
+
+    # ---- lease bookkeeping ----
+    def _release(self, pin):
+        lease = self.leases.pop(pin, None)
+        if lease is None:
+            return
+        if lease.cb is not None:
+            lease.cb.cancel()
+        try:
+            self.lg.gpio_free(self.h, pin)
+        except self.lg.error:
+            pass
+        self.snap.set_claim(pin, False)
+
+    def _drop_client(self, fd):
+        for pin in [p for p, l in self.leases.items() if l.owner == fd]:
+            self._release(pin)
+        conn = self.clients.pop(fd, None)
+        if conn is not None:
+            self.sel.unregister(conn)
+            conn.close()
+
+    def _expire(self, now):
+        for pin in [p for p, l in self.leases.items() if l.expires <= now]:
+            print(f"[broker] lease on GPIO{pin} expired")
+            self._release(pin)
+
+    def _renew(self, fd, now):
+        until = now + self.lease_sec
+        for lease in self.leases.values():
+            if lease.owner == fd:
+                lease.expires = until
+
+    # ---- ops ----
+    def _on_edge(self, chip, gpio, level, tick):
+        if level < 2:           # 2 = watchdog timeout, not a level
+            self.snap.set_level(gpio, level)
+
+    def _claim(self, fd, pin, output, arg, now):
+        lease = self.leases.get(pin)
+        if lease is not None and lease.owner != fd:
+            return ST_BUSY, 0
+        if lease is not None:
+            self._release(pin)  # re-claim with new direction/pull
+        lg = self.lg
+        try:
+            if output:
+                lg.gpio_claim_output(self.h, pin, arg & 1)
+                level = arg & 1
+            else:
+                flags = {PULL_UP: lg.SET_PULL_UP, PULL_DOWN: lg.SET_PULL_DOWN}.get(arg, 0)
+                lg.gpio_claim_alert(self.h, pin, lg.BOTH_EDGES, flags)
+                level = lg.gpio_read(self.h, pin)
+        except lg.error:
+            return ST_HW, 0
+        lease = Lease(fd, output, now + self.lease_sec)
+        if not output:
+            lease.cb = lg.callback(self.h, pin, lg.BOTH_EDGES, self._on_edge)
+        self.leases[pin] = lease
+        self.snap.set_claim(pin, True, output, level)
+        return ST_OK, level
+
+    def _apply(self, fd, op, pin, arg, now):
+        if op == OP_RENEW:
+            return ST_OK, 0
+        if pin >= MAX_PINS:
+            return ST_BAD_OP, 0
+        if op == OP_CLAIM_OUT:
+            return self._claim(fd, pin, True, arg, now)
+        if op == OP_CLAIM_IN:
+            return self._claim(fd, pin, False, arg, now)
+
+        lease = self.leases.get(pin)
+        if op == OP_READ:
+            if lease is None:
+                return ST_NOT_OWNER, 0
+            try:
+                return ST_OK, self.lg.gpio_read(self.h, pin)
+            except self.lg.error:
+                return ST_HW, 0
+        if lease is None or lease.owner != fd:
+            return (ST_BUSY if lease else ST_NOT_OWNER), 0
+        if op == OP_RELEASE:
+            self._release(pin)
+            return ST_OK, 0
+        if op == OP_WRITE:
+            if not lease.output:
+                return ST_BAD_OP, 0
+            try:
+                self.lg.gpio_write(self.h, pin, arg & 1)
+            except self.lg.error:
+                return ST_HW, 0
+            self.snap.set_level(pin, arg & 1)
+            return ST_OK, arg & 1
+        return ST_BAD_OP, 0
+
+    def _serve(self, conn):
+        fd = conn.fileno()
+        try:
+            msg = conn.recv(OP.size * MAX_BATCH)
+        except OSError:
+            msg = b""
+        if not msg:
+            self._drop_client(fd)
+            return
+        now = monotonic()
+        self._renew(fd, now)
+        n = len(msg) // OP.size
+        reply = bytearray(RESULT.size * n)
+        for i, (op, pin, arg) in enumerate(OP.iter_unpack(msg[:n * OP.size])):
+            RESULT.pack_into(reply, i * RESULT.size, *self._apply(fd, op, pin, arg, now))
+        try:
+            conn.send(reply)
+        except OSError:
+            self._drop_client(fd)
+
+    def run(self):
+        print(f"[broker] serving {self.sock_path}, levels in {self.snap.path}")
+        while self.running:
+            now = monotonic()
+            self._expire(now)
+            wait = min((l.expires for l in self.leases.values()), default=now + 1.0) - now
+            for key, _ in self.sel.select(timeout=max(0.0, min(wait, 1.0))):
+                if key.fileobj is self.srv:
+                    try:
+                        conn, _ = self.srv.accept()
+                    except BlockingIOError:
+                        continue
+                    conn.setblocking(False)
+                    self.clients[conn.fileno()] = conn
+                    self.sel.register(conn, selectors.EVENT_READ)
+                else:
+                    self._serve(key.fileobj)
+
+    def close(self):
+        for fd in list(self.clients):
+            self._drop_client(fd)
+        for pin in list(self.leases):
+            self._release(pin)
+        self.sel.close()
+        self.srv.close()
+        try:
+            os.unlink(self.sock_path)
+        except FileNotFoundError:
+            pass
+        self.snap.close()
+        self.lg.gpiochip_close(self.h)
+
+
+# -------- Client --------
+class Batch:
+    # Collects ops and sends them as one datagram on exit (MAX_BATCH ops per
+    # datagram; larger batches go out as several); results are
+    # (status, value) tuples in submission order.
+    def __init__(self, client):
+        self.client = client
+        self.ops = bytearray()
+        self.pins = []
+        self.results = []
+
+    def _add(self, op, pin, arg=0):
+        self.ops += OP.pack(op, pin, arg)
+        self.pins.append(pin)
+        return self
+
+    def claim_output(self, pin, level=0): return self._add(OP_CLAIM_OUT, pin, level)
+    def claim_input(self, pin, pull=PULL_NONE): return self._add(OP_CLAIM_IN, pin, pull)
+    def release(self, pin): return self._add(OP_RELEASE, pin)
+    def write(self, pin, level): return self._add(OP_WRITE, pin, 1 if level else 0)
+    def read(self, pin): return self._add(OP_READ, pin)
+
+    def send(self, check=True):
+        step = OP.size * MAX_BATCH
+        self.results = []
+        for i in range(0, len(self.ops), step):
+            self.results += self.client._call(self.ops[i:i + step])
+        if check:
+            for pin, (status, _) in zip(self.pins, self.results):
+                if status != ST_OK:
+                    raise BrokerError(pin, status)
+        self.ops = bytearray()
+        self.pins = []
+        return self.results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None and self.ops:
+            self.send()
+
+
+class GPIOClient:
+    # keepalive renews our leases from a background thread so scripts that
+    # only react to button callbacks don't lose their pins while idle.
+    # A keepalive that fails is logged to stderr and kept in keepalive_error;
+    # the leases lapse after that.
+    def __init__(self, sock_path=SOCKET_PATH, shm_path=SHM_PATH, keepalive=True):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        self.sock.connect(sock_path)
+        fd = os.open(shm_path, os.O_RDONLY)
+        try:
+            self.mm = mmap.mmap(fd, SHM_SIZE, prot=mmap.PROT_READ)
+        finally:
+            os.close(fd)
+        self.lock = Lock()
+        self.stop = Event()
+        self.keeper = None
+        self.keepalive_error = None
+        if keepalive:
+            self.keeper = Thread(target=self._keepalive, daemon=True)
+            self.keeper.start()
+
+    def _keepalive(self):
+        # Three renewals per lease, re-read each time in case the daemon restarted
+        while not self.stop.wait(self.lease_sec() / 3):
+            try:
+                self.renew()
+            except OSError as e:
+                self.keepalive_error = e
+                print(f"[gpio] keepalive failed, leases will expire: {e}", file=sys.stderr)
+                return
+
+    def _call(self, ops):
+        n = len(ops) // OP.size
+        if n > MAX_BATCH:
+            raise ValueError(f"{n} ops in one datagram; the broker takes at most {MAX_BATCH}")
+        with self.lock:
+            self.sock.send(ops)
+            reply = self.sock.recv(RESULT.size * MAX_BATCH)
+        if not reply:
+            raise ConnectionError(errno.ECONNRESET, "GPIO broker closed the connection")
+        results = list(RESULT.iter_unpack(reply))
+        if len(results) != n:
+            raise ConnectionError(errno.EPROTO, f"broker answered {len(results)} of {n} ops")
+        return results
+
+    def _one(self, op, pin, arg=0):
+        status, value = self._call(OP.pack(op, pin, arg))[0]
+        if status != ST_OK:
+            raise BrokerError(pin, status)
+        return value
+
+    def batch(self):
+        return Batch(self)
+
+    def claim_output(self, pin, level=0): return self._one(OP_CLAIM_OUT, pin, level)
+    def claim_input(self, pin, pull=PULL_NONE): return self._one(OP_CLAIM_IN, pin, pull)
+    def release(self, pin): self._one(OP_RELEASE, pin)
+    def write(self, pin, level): self._one(OP_WRITE, pin, 1 if level else 0)
+    def read_line(self, pin): return self._one(OP_READ, pin)
+
+    def renew(self):
+        # Call at least every lease_sec() when otherwise idle
+        self._one(OP_RENEW, 0)
+
+    def _read_snap(self):
+        mm = self.mm
+        while True:
+            seq = SEQ.unpack_from(mm, 0)[0]
+            if seq & 1:
+                continue
+            snap = SNAP.unpack_from(mm, 0)
+            if snap[0] == seq and SEQ.unpack_from(mm, 0)[0] == seq:
+                return snap
+
+    def lease_sec(self):
+        # The daemon's lease length, from the shared page
+        return self._read_snap()[1] / 1000 or LEASE_SEC
+
+    def snapshot(self):
+        # -> (levels, claimed, outputs, stamp_ns) bitmasks, torn-read free
+        return self._read_snap()[2:]
+
+    def levels(self):
+        return self.snapshot()[0]
+
+    def read(self, pin):
+        return (self.levels() >> pin) & 1
+
+    def close(self):
+        self.stop.set()
+        if self.keeper is not None:
+            self.keeper.join()
+        try:
+            self.sock.close()
+        finally:
+            self.mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def bench(pin, n=10000, sock_path=SOCKET_PATH, shm_path=SHM_PATH):
+    # Mean write round trip in microseconds, single ops vs. batches of 8
+    with GPIOClient(sock_path, shm_path) as gpio:
+        gpio.claim_output(pin)
+        t0 = monotonic()
+        for i in range(n):
+            gpio.write(pin, i & 1)
+        single = (monotonic() - t0) / n * 1e6
+        b = gpio.batch()
+        t0 = monotonic()
+        for i in range(n // 8):
+            for j in range(8):
+                b.write(pin, j & 1)
+            b.send()
+        batched = (monotonic() - t0) / (n // 8 * 8) * 1e6
+        gpio.release(pin)
+    return single, batched
+
+
+def bench_pigpio(pin, n=10000):
+    # Same single-write loop through pigpiod, the baseline the broker
+    # replaces; None when pigpio or its daemon is not available
+    try:
+        import pigpio
+    except ImportError:
+        return None
+    pi = pigpio.pi()
+    if not pi.connected:
+        return None
+    try:
+        pi.set_mode(pin, pigpio.OUTPUT)
+        t0 = monotonic()
+        for i in range(n):
+            pi.write(pin, i & 1)
+        return (monotonic() - t0) / n * 1e6
+    finally:
+        pi.stop()
+
+
+# -------- Main --------
+def main():
+    ap = argparse.ArgumentParser(description="GPIO broker daemon")
+    ap.add_argument("--chip", type=int, default=GPIO_CHIP)
+    ap.add_argument("--socket", default=SOCKET_PATH)
+    ap.add_argument("--shm", default=SHM_PATH)
+    ap.add_argument("--lease", type=float, default=LEASE_SEC)
+    ap.add_argument("--bench", type=int, metavar="PIN",
+                    help="act as a client and time write round trips on PIN")
+    args = ap.parse_args()
+
+    if args.bench is not None:
+        single, batched = bench(args.bench, sock_path=args.socket, shm_path=args.shm)
+        print(f"write round trip: {single:.1f} us single, {batched:.1f} us/op in batches of 8")
+        baseline = bench_pigpio(args.bench)
+        print("pigpio baseline: " + (f"{baseline:.1f} us per write" if baseline is not None
+                                     else "not measured (pigpio/pigpiod not available)"))
+        return
+
+    broker = Broker(args.chip, args.socket, args.shm, args.lease)
+
+    def handle_stop(sig, frame):
+        broker.running = False
+    signal(SIGINT, handle_stop)
+    signal(SIGTERM, handle_stop)
+
+    try:
+        broker.run()
+    finally:
+        broker.close()
+
+if __name__ == "__main__":
+    main()
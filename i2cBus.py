@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# i2cBus.py — one owner per I2C bus, transactions granted by device priority
+#
+#   bus = shared_bus(1)                                   # one per process and bus
+#   imu = ICM20948(bus=bus.client("icm20948", PRIO_IMU))
+#   rgb = TCS34725(bus=bus.client("tcs34725", PRIO_COLOR))
+#   oled = ssd1306(bus.display_serial(0x3C), width=128, height=64)
+#   print(bus.report())                                   # bus time per device
+#
+# A client has the SMBus methods the drivers already call, so any driver that
+# takes bus= works unchanged; each call is one transaction. Before it touches
+# the bus a transaction takes a ticket; when the bus is released the waiting
+# ticket with the best (priority, arrival) goes next and runs in its own
+# caller's thread — no worker thread, no hand-off latency. A transaction is
+# never interrupted, so preemption happens between transactions: the display
+# serial sends a frame as DISPLAY_CHUNK-byte writes, and an IMU read that
+# arrives mid-frame waits for at most one chunk (~0.8 ms at 400 kHz) instead of
+# the whole 1 KiB frame. client.hold() keeps the bus across several calls
+# (e.g. a bank select followed by the read it selects for).
+#
+# Arbitration is per process: roverSensorPanel.py runs the IMU, colour sensor
+# and OLED through one shared_bus(1). Separate scripts (readI2c, RGBsensor,
+# imuStream, imuMulti, ...) each open their own SMBus and are serialised only
+# per transfer by the kernel, with no priorities between them.
+
+import time
+from heapq import heappush, heappop
+from itertools import count
+from contextlib import contextmanager
+from threading import Condition, get_ident
+
+from smbus2 import SMBus, i2c_msg
+
+I2C_BUS = 1
+
+PRIO_IMU     = 0          # lower runs first
+PRIO_COLOR   = 1
+PRIO_DISPLAY = 2
+
+DISPLAY_CHUNK = 32        # bytes of display data per transaction
+SSD1306_CMD   = 0x00      # control byte: command stream
+SSD1306_DATA  = 0x40      # control byte: data stream
+
+class DeviceStats:
+    __slots__ = ("transactions", "bytes", "busy_s", "wait_s", "max_wait_s")
+
+    def __init__(self):
+        self.transactions = 0
+        self.bytes = 0
+        self.busy_s = 0.0        # time holding the bus
+        self.wait_s = 0.0        # time queued behind other devices
+        self.max_wait_s = 0.0
+
+    def add(self, nbytes, wait, busy):
+        self.transactions += 1
+        self.bytes += nbytes
+        self.busy_s += busy
+        self.wait_s += wait
+        if wait > self.max_wait_s:
+            self.max_wait_s = wait
+
+class I2CBus:
+    def __init__(self, bus_num=I2C_BUS, bus=None):
+        self.own_bus = bus is None
+        self.bus = SMBus(bus_num) if bus is None else bus
+        self.bus_num = bus_num
+        self.cond = Condition()      # RLock inside: run() accounts and releases under it
+        self.queue = []              # (priority, seq) tickets waiting for the bus
+        self.seq = count()
+        self.owner = None            # thread id holding the bus
+        self.depth = 0               # nested holds by that thread
+        self.stats = {}              # device name -> DeviceStats
+        self.t0 = time.monotonic()
+
+    # ---- arbitration ----
+    def acquire(self, priority):
+        # -> seconds spent waiting
+        me = get_ident()
+        with self.cond:
+            if self.owner == me:
+                self.depth += 1
+                return 0.0
+            if self.owner is None and not self.queue:
+                self.owner, self.depth = me, 1
+                return 0.0
+            t = time.perf_counter()
+            ticket = (priority, next(self.seq))
+            heappush(self.queue, ticket)
+            while self.owner is not None or self.queue[0] != ticket:
+                self.cond.wait()
+            heappop(self.queue)
+            self.owner, self.depth = me, 1
+            return time.perf_counter() - t
+
+    def release(self):
+        with self.cond:
+            self.depth -= 1
+            if self.depth == 0:
+                self.owner = None
+                if self.queue:
+                    self.cond.notify_all()
+
+    def run(self, name, priority, nbytes, fn, *args):
+        # One transaction for device `name`, accounted to it
+        wait = self.acquire(priority)
+        t = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            busy = time.perf_counter() - t
+            with self.cond:
+                st = self.stats.get(name)
+                if st is None:
+                    st = self.stats[name] = DeviceStats()
+                st.add(nbytes, wait, busy)
+                self.release()
+
+    # ---- clients ----
+    def client(self, name, priority):
+        return BusClient(self, name, priority)
+
+    def display_serial(self, addr=0x3C, priority=PRIO_DISPLAY, chunk=DISPLAY_CHUNK):
+        return DisplaySerial(self.client("ssd1306", priority), addr, chunk)
+
+    # ---- accounting ----
+    def report(self):
+        # One line per device: share of wall time on the bus and queueing
+        elapsed = time.monotonic() - self.t0
+        lines = []
+        with self.cond:
+            for name, st in sorted(self.stats.items()):
+                n = max(st.transactions, 1)
+                lines.append(f"{name:10} {st.transactions:8} xfers {st.bytes:10} B  "
+                             f"bus {st.busy_s / elapsed * 100:5.1f} %  "
+                             f"wait avg {st.wait_s / n * 1e3:6.2f} ms  max {st.max_wait_s * 1e3:6.2f} ms")
+        return "\n".join(lines)
+
+    def close(self):
+        if self.own_bus:
+            self.bus.close()
+
+class BusClient:
+    # SMBus-compatible view of an I2CBus for one device
+    def __init__(self, owner, name, priority):
+        self.owner = owner
+        self.name = name
+        self.priority = priority
+
+    def _run(self, nbytes, fn, *args):
+        return self.owner.run(self.name, self.priority, nbytes, fn, *args)
+
+    @contextmanager
+    def hold(self):
+        self.owner.acquire(self.priority)
+        try:
+            yield self
+        finally:
+            self.owner.release()
+
+    def read_byte(self, addr):
+        return self._run(1, self.owner.bus.read_byte, addr)
+
+    def write_byte(self, addr, value):
+        return self._run(1, self.owner.bus.write_byte, addr, value)
+
+    def read_byte_data(self, addr, reg):
+        return self._run(2, self.owner.bus.read_byte_data, addr, reg)
+
+    def write_byte_data(self, addr, reg, value):
+        return self._run(2, self.owner.bus.write_byte_data, addr, reg, value)
+
+    def read_i2c_block_data(self, addr, reg, length):
+        return self._run(1 + length, self.owner.bus.read_i2c_block_data, addr, reg, length)
+
+    def write_i2c_block_data(self, addr, reg, data):
+        return self._run(1 + len(data), self.owner.bus.write_i2c_block_data, addr, reg, data)
+
+    def i2c_rdwr(self, *msgs):
+        return self._run(sum(m.len for m in msgs), self.owner.bus.i2c_rdwr, *msgs)
+
+    def close(self):
+        pass                     # the I2CBus owns the handle
+
+class DisplaySerial:
+    # luma.core serial interface (command/data/cleanup) over a BusClient,
+    # sending display data in preemptible chunks
+    def __init__(self, client, addr=0x3C, chunk=DISPLAY_CHUNK):
+        self.client = client
+        self.addr = addr
+        self.chunk = chunk
+
+    def command(self, *cmd):
+        self.client.i2c_rdwr(i2c_msg.write(self.addr, [SSD1306_CMD, *cmd]))
+
+    def data(self, data):
+        data = list(data)
+        for i in range(0, len(data), self.chunk):
+            self.client.i2c_rdwr(i2c_msg.write(self.addr, [SSD1306_DATA] + data[i:i + self.chunk]))
+
+    def cleanup(self):
+        pass
+
+_shared = {}
+
+def shared_bus(bus_num=I2C_BUS):
+    # The process-wide I2CBus for bus_num
+    bus = _shared.get(bus_num)
+    if bus is None:
+        bus = _shared[bus_num] = I2CBus(bus_num)
+    return bus
+
+class _SimDisplay:
+    # Write-only stand-in for the SSD1306 on an icmSim.SimBus: takes the
+    # wire time of each message and keeps nothing
+    def __init__(self, addr=0x3C, bus_hz=400e3):
+        self.addr = addr
+        self.latency = 0.0
+        self.byte_time = 9.0 / bus_hz if bus_hz else 0.0
+        self.bytes = 0
+
+    def transfer(self, msg):
+        self.bytes += msg.len
+        return (msg.len + 1) * self.byte_time
+
+def benchmark(seconds=2.0, chunk=DISPLAY_CHUNK, bus_hz=400e3):
+    # IMU read latency while a display thread pushes full frames, against the
+    # simulator; returns (mean, max) IMU wait in ms and the bus report
+    from threading import Thread, Event
+    from icmSim import SimICM20948, SimBus
+    bus = I2CBus(bus=SimBus(SimICM20948(bus_hz=bus_hz), _SimDisplay(0x3C, bus_hz)))
+    imu = bus.client("icm20948", PRIO_IMU)
+    disp = bus.client("ssd1306", PRIO_DISPLAY)
+    frame = bytes(1024)
+    stop = Event()
+
+    def display():
+        while not stop.is_set():
+            for i in range(0, len(frame), chunk):
+                disp.i2c_rdwr(i2c_msg.write(0x3C, [SSD1306_DATA] + list(frame[i:i + chunk])))
+
+    t = Thread(target=display, daemon=True)
+    t.start()
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        imu.read_i2c_block_data(0x68, 0x2D, 14)
+        time.sleep(0.001)
+    stop.set()
+    t.join()
+    st = bus.stats["icm20948"]
+    return st.wait_s / st.transactions * 1e3, st.max_wait_s * 1e3, bus.report()
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description="Shared I2C bus: IMU latency under display load")
+    ap.add_argument("--seconds", type=float, default=2.0)
+    ap.add_argument("--bus-hz", type=float, default=400e3)
+    args = ap.parse_args()
+    for chunk in (1024, DISPLAY_CHUNK):
+        mean, worst, report = benchmark(args.seconds, chunk, args.bus_hz)
+        print(f"display chunk {chunk:5} B: IMU wait avg {mean:6.2f} ms  max {worst:6.2f} ms")
+        print(report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# i2cDiscovery.py — find the rover's I2C chips once and remember where they are
+#
+#   python3 i2cDiscovery.py            show what is on bus 1 (cache if still valid)
+#   python3 i2cDiscovery.py --rescan   ignore the cache
+#
+#   from i2cDiscovery import address
+#   imu = ICM20948(addr=address("icm20948"))
+#   oled = ssd1306(i2c(port=1, address=address("ssd1306", 0x3C)))
+#
+# A cold scan reads one byte from every address (like `i2cdetect -r`) and then
+# identifies the chips we know by their ID registers. The result is cached in
+# ~/.config/rover/i2c-<bus>.json under the bus topology (adapter name and its
+# sysfs path, so a mux channel or another controller never matches). On the
+# next start only the addresses our chips can strap to are probed (one read
+# each) and compared with the cached scan, then each cached device is
+# re-identified (one or two transactions per chip) instead of scanning the
+# whole bus. Any mismatch — a chip missing, added, moved, a different
+# topology, or a cache that found nothing — falls back to a full scan.
+
+import os
+import json
+import time
+import argparse
+
+from smbus2 import SMBus
+
+I2C_BUS   = 1
+CACHE_DIR = os.path.expanduser("~/.config/rover")
+SCAN_ADDRS = range(0x08, 0x78)         # 7-bit addresses not reserved by the spec
+
+# ---- identification, one function per chip: (bus, addr) -> bool ----
+def _is_icm20948(bus, addr):
+    bus.write_byte_data(addr, 0x7F, 0x00)          # REG_BANK_SEL: Bank 0
+    return bus.read_byte_data(addr, 0x00) == 0xEA  # WHO_AM_I
+
+def _is_tcs34725(bus, addr):
+    # COMMAND bit | ID register; 0x44 = TCS34721/5, 0x4D = TCS34723/7
+    return bus.read_byte_data(addr, 0x80 | 0x12) in (0x44, 0x4D)
+
+def _is_ssd1306(bus, addr):
+    # No ID register; a read returns the status byte, whose low bits are 0
+    # on the SSD1306 (the SH1106 reports 0x08 there)
+    return bus.read_byte(addr) & 0x0F == 0x00
+
+# name -> (addresses the chip can strap to, identify function)
+KNOWN = {
+    "icm20948": ((0x68, 0x69), _is_icm20948),
+    "tcs34725": ((0x29,), _is_tcs34725),
+    "ssd1306":  ((0x3C, 0x3D), _is_ssd1306),
+}
+
+def adapter_name(bus_num=I2C_BUS):
+    # e.g. "bcm2835 (i2c@7e804000)"; the cache is only valid for the same adapter
+    try:
+        with open(f"/sys/bus/i2c/devices/i2c-{bus_num}/name") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+def topology(bus_num=I2C_BUS):
+    # Adapter name plus where it sits in the device tree
+    path = os.path.realpath(f"/sys/bus/i2c/devices/i2c-{bus_num}")
+    return f"{adapter_name(bus_num)}@{path}"
+
+def cache_path(bus_num=I2C_BUS, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, f"i2c-{bus_num}.json")
+
+def _identify(bus, name, addr):
+    try:
+        return KNOWN[name][1](bus, addr)
+    except OSError:
+        return False
+
+def _responding(bus, addrs):
+    present = []
+    for addr in addrs:
+        try:
+            bus.read_byte(addr)
+            present.append(addr)
+        except OSError:
+            continue
+    return present
+
+KNOWN_ADDRS = sorted({a for addrs, _ in KNOWN.values() for a in addrs})
+
+def scan(bus):
+    # -> (responding addresses, {name: [addrs]}) by probing the whole bus
+    present = _responding(bus, SCAN_ADDRS)
+    devices = {}
+    for name, (addrs, _) in KNOWN.items():
+        found = [a for a in addrs if a in present and _identify(bus, name, a)]
+        if found:
+            devices[name] = found
+    return present, devices
+
+def _verify(bus, cached):
+    # Cheap presence check of the known addresses against the cached scan,
+    # then re-identify every cached device. An empty result is never trusted
+    devices = cached["devices"]
+    if not devices:
+        return False
+    known = set(KNOWN_ADDRS)
+    if _responding(bus, KNOWN_ADDRS) != sorted(known.intersection(cached["present"])):
+        return False
+    return all(_identify(bus, name, a) for name, addrs in devices.items() for a in addrs)
+
+def discover(bus_num=I2C_BUS, bus=None, rescan=False, cache_dir=CACHE_DIR):
+    # -> {name: [addrs]} for the known chips on the bus
+    own = bus is None
+    if own:
+        bus = SMBus(bus_num)
+    try:
+        key = topology(bus_num)
+        path = cache_path(bus_num, cache_dir)
+        if not rescan:
+            try:
+                with open(path) as f:
+                    cached = json.load(f)
+                if cached.get("topology") == key and _verify(bus, cached):
+                    return cached["devices"]
+            except (OSError, ValueError, KeyError):
+                pass
+        present, devices = scan(bus)
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"topology": key, "present": present, "devices": devices}, f)
+        os.replace(tmp, path)
+        return devices
+    finally:
+        if own:
+            bus.close()
+
+_devices = None
+
+def address(name, default=None, bus_num=I2C_BUS):
+    # First address of a known chip (discovering once per process), or default
+    global _devices
+    if _devices is None:
+        try:
+            _devices = discover(bus_num)
+        except OSError:
+            _devices = {}                  # no bus at all: use the defaults
+    addrs = _devices.get(name)
+    return addrs[0] if addrs else default
+
+def main():
+    ap = argparse.ArgumentParser(description="I2C device discovery")
+    ap.add_argument("--bus", type=int, default=I2C_BUS)
+    ap.add_argument("--rescan", action="store_true", help="ignore the cache")
+    args = ap.parse_args()
+    t0 = time.perf_counter()
+    devices = discover(args.bus, rescan=args.rescan)
+    dt = time.perf_counter() - t0
+    print(f"i2c-{args.bus} ({adapter_name(args.bus) or 'unknown adapter'}), {dt * 1e3:.1f} ms:")
+    for name in KNOWN:
+        addrs = devices.get(name)
+        print(f"  {name:9} " + (", ".join(f"0x{a:02X}" for a in addrs) if addrs else "not found"))
+
+if __name__ == "__main__":
+    main()
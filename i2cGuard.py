@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# i2cGuard.py — keep running through I2C errors: retry, back off, re-initialise
+#
+#   imu = GuardedDevice("icm20948", lambda: ICM20948(), probe=ICM20948.alive)
+#   frame = imu.call(ICM20948.read_raw_frame)     # None while the IMU is down
+#   if imu.up: ...
+#   print(imu.stats)                             # errors, retries, latency
+#
+# Every call goes through classify():
+#   TRANSIENT  EIO / EAGAIN / ETIMEDOUT / EBUSY — a glitch (noise, arbitration
+#              lost, clock stretching); retried inline with doubling backoff
+#   ABSENT     EREMOTEIO / ENXIO — the device NACKs its address: unplugged or
+#              browning out. Retried like TRANSIENT; if it persists, down
+#   BUS        ENODEV / EBADF / ESHUTDOWN — the adapter or handle is gone; down
+#              at once, no retry can help
+#   FATAL      anything else (EINVAL, EOPNOTSUPP, ...) is a bug and is raised
+#
+# Inline retries are bounded by `retries` and by `max_block_s`, so a call
+# never holds up the control loop for more than a few ms. A device that is
+# down is re-initialised by a background thread calling open_fn() with
+# exponential backoff (RECOVER_MIN_S .. RECOVER_MAX_S); meanwhile call()
+# returns `default` at once without touching the bus. Driver constructors
+# already write the full configuration, so re-opening is the re-init.
+#
+# A brown-out can reset a chip without a single NACK — it just comes back
+# with its power-on defaults (ICM-20948 asleep, TCS34725 powered down) and
+# returns stale or zero data. `probe(dev) -> bool`, run every `probe_s` after
+# a good call, catches that and triggers the same re-init.
+
+import time
+import errno
+from threading import Lock, Thread, Event
+
+TRANSIENT = "transient"
+ABSENT    = "absent"
+BUS       = "bus"
+FATAL     = "fatal"
+
+ERRNO_CLASS = {
+    errno.EIO: TRANSIENT,
+    errno.EAGAIN: TRANSIENT,
+    errno.ETIMEDOUT: TRANSIENT,
+    errno.EBUSY: TRANSIENT,
+    errno.EREMOTEIO: ABSENT,
+    errno.ENXIO: ABSENT,
+    errno.ENODEV: BUS,
+    errno.EBADF: BUS,
+    errno.ESHUTDOWN: BUS,
+}
+
+RETRIES       = 2          # inline retries per call
+BACKOFF_S     = 0.0005     # first inline retry delay, doubled each time
+MAX_BLOCK_S   = 0.005      # an unlucky call returns within about this long
+PROBE_S       = 1.0
+RECOVER_MIN_S = 0.05
+RECOVER_MAX_S = 2.0
+LATENCY_ALPHA = 0.05       # EMA weight of the latest call
+
+def classify(exc):
+    return ERRNO_CLASS.get(getattr(exc, "errno", None), FATAL)
+
+class GuardStats:
+    def __init__(self):
+        self.calls = 0
+        self.skipped = 0           # calls answered with `default` while down
+        self.retries = 0
+        self.errors = {TRANSIENT: 0, ABSENT: 0, BUS: 0}
+        self.last_errno = None
+        self.downs = 0
+        self.recoveries = 0
+        self.resets = 0            # brown-outs caught by the probe
+        self.latency_s = 0.0       # EMA over successful calls, retries included
+        self.max_latency_s = 0.0
+
+    def good(self, dt):
+        self.calls += 1
+        self.latency_s += LATENCY_ALPHA * (dt - self.latency_s)
+        if dt > self.max_latency_s:
+            self.max_latency_s = dt
+
+    def __repr__(self):
+        errs = " ".join(f"{k}={v}" for k, v in self.errors.items())
+        return (f"calls={self.calls} skipped={self.skipped} retries={self.retries} {errs}"
+                f" downs={self.downs} recoveries={self.recoveries} resets={self.resets}"
+                f" latency={self.latency_s * 1e3:.2f}ms max={self.max_latency_s * 1e3:.2f}ms")
+
+class GuardedDevice:
+    # open_fn() -> driver object; it may raise OSError or RuntimeError (e.g.
+    # WHO_AM_I mismatch) while the device is unavailable. dev: an already
+    # open driver to start with. on_down(reason) / on_up(dev) are called
+    # when the device is lost and when it is back (from the recovery thread).
+    def __init__(self, name, open_fn, dev=None, probe=None, probe_s=PROBE_S,
+                 retries=RETRIES, max_block_s=MAX_BLOCK_S, on_down=None, on_up=None):
+        self.name = name
+        self.open_fn = open_fn
+        self.probe = probe
+        self.probe_s = probe_s
+        self.retries = retries
+        self.max_block_s = max_block_s
+        self.on_down = on_down
+        self.on_up = on_up
+        self.stats = GuardStats()
+        self.lock = Lock()
+        self.stop = Event()
+        self.thread = None
+        self.stale = None            # lost driver, closed by the recovery thread
+        self.next_probe = time.monotonic() + probe_s
+        self.dev = None
+        if dev is None:
+            try:
+                dev = open_fn()
+            except (OSError, RuntimeError) as e:
+                if isinstance(e, OSError) and classify(e) == FATAL:
+                    raise
+                self._lose(None, e)
+                return
+        self.dev = dev
+
+    @property
+    def up(self):
+        return self.dev is not None
+
+    def call(self, fn, *args, default=None):
+        # fn(dev, *args) with retries; `default` when the device is down or
+        # is lost during this call
+        dev = self.dev
+        if dev is None:
+            self.stats.skipped += 1
+            return default
+        st = self.stats
+        t0 = time.perf_counter()
+        deadline = t0 + self.max_block_s
+        delay = BACKOFF_S
+        attempt = 0
+        while True:
+            try:
+                result = fn(dev, *args)
+                break
+            except OSError as e:
+                kind = classify(e)
+                if kind == FATAL:
+                    raise
+                st.errors[kind] += 1
+                st.last_errno = e.errno
+                attempt += 1
+                if kind == BUS or attempt > self.retries or \
+                        time.perf_counter() + delay > deadline:
+                    self._lose(dev, e)
+                    return default
+                st.retries += 1
+                time.sleep(delay)
+                delay *= 2
+        st.good(time.perf_counter() - t0)
+        if self.probe is not None and time.monotonic() >= self.next_probe:
+            self.next_probe = time.monotonic() + self.probe_s
+            try:
+                if not self.probe(dev):
+                    st.resets += 1
+                    self._lose(dev, "device reset")
+                    return default
+            except OSError as e:
+                kind = classify(e)
+                if kind == FATAL:
+                    raise
+                st.errors[kind] += 1
+                st.last_errno = e.errno
+                self._lose(dev, e)
+                return default
+        return result
+
+    def _lose(self, dev, reason):
+        with self.lock:
+            if self.dev is not dev:
+                return                   # another thread got there first
+            self.dev = None
+            self.stale = dev
+            self.stats.downs += 1
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = Thread(target=self._recover, daemon=True)
+                self.thread.start()
+        if self.on_down is not None:
+            self.on_down(reason)
+
+    def _close_stale(self):
+        # Drivers here have close(); luma devices only cleanup()
+        dev, self.stale = self.stale, None
+        close = getattr(dev, "close", None) or getattr(dev, "cleanup", None)
+        if close is not None:
+            try:
+                close()
+            except Exception:
+                pass
+
+    def _recover(self):
+        delay = RECOVER_MIN_S
+        self._close_stale()
+        while not self.stop.wait(delay):
+            dev = None
+            try:
+                dev = self.open_fn()
+                if self.probe is not None and not self.probe(dev):
+                    raise RuntimeError("probe failed after re-init")
+            except (OSError, RuntimeError) as e:
+                if isinstance(e, OSError):
+                    self.stats.last_errno = e.errno
+                if dev is not None:
+                    self.stale = dev
+                    self._close_stale()
+                delay = min(delay * 2, RECOVER_MAX_S)
+                continue
+            with self.lock:
+                self.dev = dev
+                self.stats.recoveries += 1
+                self.next_probe = time.monotonic() + self.probe_s
+            if self.on_up is not None:
+                self.on_up(dev)
+            return
+
+    def close(self):
+        self.stop.set()
+        if self.thread is not None:
+            self.thread.join()
+        dev, self.dev = self.dev, None
+        self.stale = dev
+        self._close_stale()
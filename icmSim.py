@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# icmSim.py — register-level ICM-20948 (+ AK09916) simulator on an SMBus-shaped bus
+#
+#   from icmSim import SimICM20948
+#   imu = ICM20948(bus=SimICM20948(noise=0.01, odr_hz=None, bus_hz=400e3))
+#
+#   python3 icmSim.py          benchmark the IMU pipeline against the simulator
+#
+# What is modelled: WHO_AM_I, REG_BANK_SEL, PWR_MGMT_1 sleep/reset, the sample
+# rate dividers in Bank 2, accel/gyro/temp data registers refreshed at the ODR,
+# RAW_DATA_0_RDY in INT_STATUS_1, the FIFO (accel/gyro/temp enables, reset,
+# stream/snapshot mode, count, overflow in INT_STATUS_2) and the I2C master
+# (SLV4 one-shots and SLV0 auto-reads of the AK09916 into EXT_SLV_SENS_DATA).
+# Time is the host's monotonic clock; samples produced since the last access
+# are generated lazily on the next one. Each transaction (one SMBus call or
+# one i2c_rdwr) sleeps for its wire time at bus_hz plus a fixed latency, so
+# throughput numbers are meaningful. i2c_rdwr accepts what the Pi's bcm2835
+# driver does: at most one read message, and only as the last one.
+
+import time
+import errno
+import random
+import struct
+import argparse
+from ctypes import memmove
+
+from readI2c import (REG_BANK_SEL, WHO_AM_I, WHO_AM_I_EXPECT, PWR_MGMT_1, USER_CTRL,
+                     INT_STATUS_1, INT_STATUS_2, I2C_MST_STATUS, EXT_SLV_SENS_DATA_00,
+                     FIFO_EN_2, FIFO_RST, FIFO_MODE, FIFO_COUNTH, FIFO_R_W, ACCEL_XOUT_H,
+                     GYRO_SMPLRT_DIV, I2C_SLV0_ADDR, I2C_SLV0_REG, I2C_SLV0_CTRL,
+                     I2C_SLV4_ADDR, I2C_SLV4_REG, I2C_SLV4_CTRL, I2C_SLV4_DO, I2C_SLV4_DI,
+                     AK09916_ADDR, AK_WIA2, AK_ST1, AK_CNTL2, AK_CNTL3, AK_WIA2_EXPECT,
+                     BASE_ODR_HZ)
+
+FIFO_SIZE    = 512
+ACCEL_LSB_G  = 16384.0     # ±2 g
+GYRO_LSB_DPS = 131.0       # ±250 dps
+MAG_LSB_UT   = 1 / 0.15
+BANK0, BANK2, BANK3 = 0, 2, 3
+I2C_M_RD     = 0x0001
+
+def check_rdwr(msgs):
+    # The Pi's bcm2835 I2C driver takes at most one read per i2c_rdwr, and
+    # only as the last message; anything else fails before touching the bus
+    reads = [i for i, m in enumerate(msgs) if m.flags & I2C_M_RD]
+    if len(reads) > 1 or (reads and reads[0] != len(msgs) - 1):
+        raise OSError(errno.EOPNOTSUPP, "Operation not supported")
+
+class SimICM20948:
+    def __init__(self, addr=0x68, accel_g=(0.0, 0.0, 1.0), gyro_dps=(0.0, 0.0, 0.0),
+                 mag_ut=(20.0, 0.0, -40.0), temp_c=25.0, noise=0.01, odr_hz=None,
+                 bus_hz=400e3, latency=0.0, seed=0):
+        # noise: std dev as a fraction of 1 g / 1 dps / 1 µT. odr_hz overrides
+        # the rate programmed through Bank 2 (None = follow the registers).
+        self.addr = addr
+        self.accel_g = accel_g
+        self.gyro_dps = gyro_dps
+        self.mag_ut = mag_ut
+        self.temp_c = temp_c
+        self.noise = noise
+        self.odr_override = odr_hz
+        self.byte_time = 9.0 / bus_hz if bus_hz else 0.0   # 8 data bits + ACK
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.stats = {"transactions": 0, "bytes": 0, "samples": 0}
+        self.reset()
+
+    # ---- device state ----
+    def reset(self):
+        self.regs = [bytearray(128) for _ in range(4)]
+        self.regs[BANK0][WHO_AM_I] = WHO_AM_I_EXPECT
+        self.regs[BANK0][PWR_MGMT_1] = 0x41          # asleep after reset
+        self.bank = BANK0
+        self.ptr = 0
+        self.fifo = bytearray()
+        self.ak = bytearray(0x33)
+        self.ak[AK_WIA2] = AK_WIA2_EXPECT
+        self.last_sample = time.monotonic()
+
+    @property
+    def odr(self):
+        if self.odr_override:
+            return self.odr_override
+        return BASE_ODR_HZ / (1 + self.regs[BANK2][GYRO_SMPLRT_DIV])
+
+    def _sample(self):
+        r0 = self.regs[BANK0]
+        gauss, n = self.rng.gauss, self.noise
+        accel = [int(max(-32768, min(32767, (v + gauss(0, n)) * ACCEL_LSB_G)))
+                 for v in self.accel_g]
+        gyro = [int(max(-32768, min(32767, (v + gauss(0, n)) * GYRO_LSB_DPS)))
+                for v in self.gyro_dps]
+        temp = int((self.temp_c - 21.0) * 333.87)
+        frame = struct.pack(">7h", *accel, *gyro, temp)
+        r0[ACCEL_XOUT_H:ACCEL_XOUT_H + 14] = frame
+        r0[INT_STATUS_1] |= 0x01                      # RAW_DATA_0_RDY
+        self._master_read()
+        if r0[USER_CTRL] & 0x40:
+            en = r0[FIFO_EN_2]
+            rec = (frame[0:6] if en & 0x10 else b"") + \
+                  (frame[6:12] if en & 0x0E == 0x0E else b"") + \
+                  (frame[12:14] if en & 0x01 else b"")
+            if len(self.fifo) + len(rec) > FIFO_SIZE:
+                r0[INT_STATUS_2] |= 0x1F
+                if r0[FIFO_MODE] & 0x01:               # snapshot: drop new data
+                    rec = b""
+                else:                                  # stream: overwrite oldest
+                    del self.fifo[:len(self.fifo) + len(rec) - FIFO_SIZE]
+            self.fifo += rec
+        self.stats["samples"] += 1
+
+    def _advance(self):
+        now = time.monotonic()
+        if self.regs[BANK0][PWR_MGMT_1] & 0x40:       # asleep: no conversions
+            self.last_sample = now
+            return
+        period = 1.0 / self.odr
+        due = int((now - self.last_sample) / period)
+        if due <= 0:
+            return
+        # Beyond a FIFO's worth only the overflow matters; cap the work
+        for _ in range(min(due, FIFO_SIZE // 6 + 1)):
+            self._sample()
+        self.last_sample += due * period
+
+    # ---- AK09916 behind the I2C master ----
+    def _ak_read(self, reg):
+        if reg == AK_ST1 + 8:                          # reading ST2 clears DRDY
+            self.ak[AK_ST1] = 0
+        return self.ak[reg] if reg < len(self.ak) else 0
+
+    def _mag_sample(self):
+        if self.ak[AK_CNTL2] == 0:
+            return
+        gauss, n = self.rng.gauss, self.noise
+        # sensor axes: Y and Z are opposite to the accel/gyro body frame
+        mx, my, mz = self.mag_ut
+        hx, hy, hz = (int((v + gauss(0, n)) * MAG_LSB_UT) for v in (mx, -my, -mz))
+        self.ak[AK_ST1:AK_ST1 + 9] = struct.pack("<B3hxB", 0x01, hx, hy, hz, 0x00)
+
+    def _master_read(self):
+        r0, r3 = self.regs[BANK0], self.regs[BANK3]
+        if not r0[USER_CTRL] & 0x20 or not r3[I2C_SLV0_CTRL] & 0x80:
+            return
+        if r3[I2C_SLV0_ADDR] != (AK09916_ADDR | 0x80):
+            return
+        self._mag_sample()
+        start, n = r3[I2C_SLV0_REG], r3[I2C_SLV0_CTRL] & 0x0F
+        for i in range(n):
+            r0[EXT_SLV_SENS_DATA_00 + i] = self._ak_read(start + i)
+
+    def _slv4(self):
+        r3 = self.regs[BANK3]
+        addr, reg = r3[I2C_SLV4_ADDR], r3[I2C_SLV4_REG]
+        if addr & 0x7F == AK09916_ADDR:
+            if addr & 0x80:
+                r3[I2C_SLV4_DI] = self._ak_read(reg)
+            elif reg == AK_CNTL3 and r3[I2C_SLV4_DO] & 0x01:
+                self.ak[AK_CNTL2] = 0                  # soft reset
+            elif reg < len(self.ak):
+                self.ak[reg] = r3[I2C_SLV4_DO]
+        r3[I2C_SLV4_CTRL] &= 0x7F
+        self.regs[BANK0][I2C_MST_STATUS] |= 0x40      # SLV4_DONE
+
+    # ---- register file ----
+    def _write(self, reg, val):
+        if reg == REG_BANK_SEL:
+            self.bank = (val >> 4) & 0x03
+            return
+        if self.bank == BANK0 and reg == PWR_MGMT_1 and val & 0x80:
+            self.reset()
+            return
+        self.regs[self.bank][reg] = val
+        if self.bank == BANK0 and reg == FIFO_RST and val & 0x1F:
+            self.fifo.clear()
+        elif self.bank == BANK0 and reg == PWR_MGMT_1 and not val & 0x40:
+            self.last_sample = time.monotonic()
+        elif self.bank == BANK3 and reg == I2C_SLV4_CTRL and val & 0x80:
+            self._slv4()
+
+    def _read(self, reg):
+        if reg == REG_BANK_SEL:
+            return self.bank << 4
+        r = self.regs[self.bank]
+        if self.bank == BANK0:
+            if reg == FIFO_R_W:
+                if not self.fifo:
+                    return 0xFF
+                v = self.fifo[0]
+                del self.fifo[0]
+                return v
+            if reg == FIFO_COUNTH:
+                return (len(self.fifo) >> 8) & 0x1F
+            if reg == FIFO_COUNTH + 1:
+                return len(self.fifo) & 0xFF
+            if reg in (INT_STATUS_1, INT_STATUS_2, I2C_MST_STATUS):
+                v = r[reg]
+                r[reg] = 0                             # read-to-clear
+                return v
+        return r[reg]
+
+    def _read_burst(self, reg, n):
+        if self.bank == BANK0 and reg == FIFO_R_W:     # data port, no auto-increment
+            out = bytes(self.fifo[:n]).ljust(n, b"\xff")
+            del self.fifo[:n]
+            return out
+        return bytes(self._read((reg + i) & 0x7F) for i in range(n))
+
+    # ---- SMBus surface ----
+    def _xfer(self, addr, nbytes):
+        if addr != self.addr:
+            raise OSError(errno.EREMOTEIO, "Remote I/O error")   # NACK, like the kernel
+        self._advance()
+        self.stats["transactions"] += 1
+        self.stats["bytes"] += nbytes
+        return (nbytes + 1) * self.byte_time
+
+    def _wire(self, seconds):
+        # One sleep per ioctl: the kernel's cost is per transaction, not per message
+        seconds += self.latency
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def write_byte_data(self, addr, reg, val):
+        self._wire(self._xfer(addr, 2))
+        self._write(reg, val & 0xFF)
+
+    def read_byte_data(self, addr, reg):
+        self._wire(self._xfer(addr, 2))
+        return self._read(reg)
+
+    def read_byte(self, addr):
+        # receive byte: reads at the current register pointer
+        self._wire(self._xfer(addr, 1))
+        return self._read(self.ptr)
+
+    def write_i2c_block_data(self, addr, reg, data):
+        self._wire(self._xfer(addr, 1 + len(data)))
+        for i, v in enumerate(data):
+            self._write((reg + i) & 0x7F, v & 0xFF)
+
+    def read_i2c_block_data(self, addr, reg, n):
+        self._wire(self._xfer(addr, 1 + n))
+        return list(self._read_burst(reg, n))
+
+    def transfer(self, msg):
+        # One smbus2.i2c_msg: a write sets the register pointer (and writes any
+        # further bytes); a following read bursts from that pointer
+        wire = self._xfer(msg.addr, msg.len)
+        if msg.flags & I2C_M_RD:
+            memmove(msg.buf, self._read_burst(self.ptr, msg.len), msg.len)
+        else:
+            data = bytes(msg)
+            self.ptr = data[0]
+            for i, v in enumerate(data[1:]):
+                self._write((self.ptr + i) & 0x7F, v)
+        return wire
+
+    def i2c_rdwr(self, *msgs):
+        check_rdwr(msgs)
+        self._wire(sum(self.transfer(msg) for msg in msgs))
+
+    def close(self):
+        pass
+
+
+class SimBus:
+    # Several simulated devices on one bus, e.g. two IMUs on 0x68 and 0x69:
+    #   bus = SimBus(SimICM20948(0x68), SimICM20948(0x69, seed=1))
+    # A combined i2c_rdwr routes each message to the device it addresses.
+    def __init__(self, *devices):
+        self.devices = {d.addr: d for d in devices}
+
+    def _dev(self, addr):
+        try:
+            return self.devices[addr]
+        except KeyError:
+            raise OSError(errno.EREMOTEIO, "Remote I/O error") from None
+
+    def write_byte_data(self, addr, reg, val):
+        self._dev(addr).write_byte_data(addr, reg, val)
+
+    def read_byte_data(self, addr, reg):
+        return self._dev(addr).read_byte_data(addr, reg)
+
+    def read_byte(self, addr):
+        return self._dev(addr).read_byte(addr)
+
+    def write_i2c_block_data(self, addr, reg, data):
+        self._dev(addr).write_i2c_block_data(addr, reg, data)
+
+    def read_i2c_block_data(self, addr, reg, n):
+        return self._dev(addr).read_i2c_block_data(addr, reg, n)
+
+    def i2c_rdwr(self, *msgs):
+        check_rdwr(msgs)
+        wire = sum(self._dev(msg.addr).transfer(msg) for msg in msgs)
+        seconds = wire + max(d.latency for d in self.devices.values())
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def close(self):
+        pass
+
+
+def benchmark(seconds=2.0, odr_hz=1125.0, bus_hz=400e3):
+    # Runs the real driver stack against the simulator; -> dict of results
+    from readI2c import ICM20948
+    from imuFifo import FifoStream
+    results = {}
+
+    sim = SimICM20948(bus_hz=bus_hz)
+    imu = ICM20948(bus=sim)
+    n, t0 = 0, time.perf_counter()
+    while time.perf_counter() - t0 < seconds / 2:
+        imu.read_all()
+        n += 1
+    results["burst reads/s"] = n / (time.perf_counter() - t0)
+
+    sim = SimICM20948(bus_hz=bus_hz)
+    imu = ICM20948(bus=sim)
+    fifo = FifoStream(imu, odr_hz)
+    frames, t0 = 0, time.perf_counter()
+    for batch, _ in fifo.stream():
+        frames += len(batch)
+        if time.perf_counter() - t0 >= seconds / 2:
+            break
+    elapsed = time.perf_counter() - t0
+    results["fifo frames/s"] = frames / elapsed
+    results["fifo overflows"] = fifo.overflows
+    results["fifo bus bytes/s"] = sim.stats["bytes"] / elapsed
+    results["elided writes"] = imu.reg_stats["writes_elided"]
+    return results
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the IMU pipeline on the simulator")
+    ap.add_argument("--seconds", type=float, default=4.0)
+    ap.add_argument("--odr", type=float, default=1125.0)
+    ap.add_argument("--bus-hz", type=float, default=400e3)
+    args = ap.parse_args()
+    for name, value in benchmark(args.seconds, args.odr, args.bus_hz).items():
+        print(f"{name:18} {value:10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# imuCalib.py — ICM-20948 bias/scale calibration, stored per sensor address
+#
+#   python3 imuCalib.py gyro      keep the rover still; averages the gyro bias
+#   python3 imuCalib.py accel     6-position accel offset/scale (prompts)
+#   python3 imuCalib.py show      print the stored calibration
+#
+# A calibration is a per-channel affine correction in raw counts,
+#     corrected = (counts - bias) * gain
+# for the 7 frame channels (ax ay az gx gy gz temp). Decoder.apply_calibration
+# folds it into the decoder's scale/offset vectors, so calibrated decoding
+# costs exactly what uncalibrated decoding does. The file is 64 bytes and
+# loads with one read + one struct unpack.
+
+import os
+import sys
+import time
+import struct
+import argparse
+
+import numpy as np
+
+from imuDecode import FRAME_CHANNELS, ACCEL, GYRO, ACCEL_LSB_PER_G, raw_frames
+
+CAL_DIR     = os.path.expanduser("~/.config/rover")
+CAL_MAGIC   = b"ICMC"
+CAL_VERSION = 1
+# magic, version, i2c addr, pad, then bias[7] and gain[7] as float32
+CAL_HEADER  = struct.Struct("<4sBBxx")
+CAL_BODY    = struct.Struct(f"<{FRAME_CHANNELS}f{FRAME_CHANNELS}f")
+
+GYRO_STILL_STD = 30.0     # counts (~0.23 dps at ±250 dps); more means it moved
+
+class Calibration:
+    def __init__(self, addr, bias=None, gain=None):
+        self.addr = addr
+        self.bias = np.zeros(FRAME_CHANNELS, dtype=np.float32) if bias is None else \
+            np.asarray(bias, dtype=np.float32)
+        self.gain = np.ones(FRAME_CHANNELS, dtype=np.float32) if gain is None else \
+            np.asarray(gain, dtype=np.float32)
+
+    def pack(self):
+        return CAL_HEADER.pack(CAL_MAGIC, CAL_VERSION, self.addr) + \
+            CAL_BODY.pack(*self.bias.tolist(), *self.gain.tolist())
+
+    @classmethod
+    def unpack(cls, data):
+        magic, version, addr = CAL_HEADER.unpack_from(data)
+        if magic != CAL_MAGIC or version != CAL_VERSION:
+            raise ValueError(f"not an IMU calibration v{CAL_VERSION} file")
+        vals = CAL_BODY.unpack_from(data, CAL_HEADER.size)
+        return cls(addr, vals[:FRAME_CHANNELS], vals[FRAME_CHANNELS:])
+
+    def __repr__(self):
+        bias = [round(float(b), 1) for b in self.bias]
+        gain = [round(float(g), 4) for g in self.gain]
+        return f"Calibration(addr=0x{self.addr:02X}, bias={bias}, gain={gain})"
+
+def cal_path(addr, cal_dir=CAL_DIR):
+    return os.path.join(cal_dir, f"imu_0x{addr:02X}.cal")
+
+def save(cal, cal_dir=CAL_DIR):
+    os.makedirs(cal_dir, exist_ok=True)
+    path = cal_path(cal.addr, cal_dir)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(cal.pack())
+    os.replace(tmp, path)        # never leave a half-written file behind
+    return path
+
+def load(addr, cal_dir=CAL_DIR):
+    # -> Calibration, or None when this sensor has not been calibrated. A
+    # truncated, corrupt, old-format or other sensor's file is warned about
+    # and ignored (identity), never fatal at startup
+    path = cal_path(addr, cal_dir)
+    try:
+        with open(path, "rb") as f:
+            cal = Calibration.unpack(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, struct.error) as e:
+        print(f"warning: ignoring {path}: {e}", file=sys.stderr)
+        return None
+    if cal.addr != addr:
+        print(f"warning: ignoring {path}: calibration is for 0x{cal.addr:02X}, "
+              f"not 0x{addr:02X}", file=sys.stderr)
+        return None
+    return cal
+
+def load_into(decoder, addr, cal_dir=CAL_DIR):
+    # Startup helper: apply the stored calibration if there is one
+    cal = load(addr, cal_dir)
+    if cal is not None:
+        decoder.apply_calibration(cal)
+    return cal
+
+# -------- Capture --------
+def capture(imu, seconds=2.0, rate_hz=200.0):
+    # -> (n, 7) float64 raw counts sampled at ~rate_hz
+    n = max(1, int(seconds * rate_hz))
+    buf = bytearray(n * 2 * FRAME_CHANNELS)
+    step = 2 * FRAME_CHANNELS
+    next_t = time.monotonic()
+    for i in range(n):
+        buf[i * step:(i + 1) * step] = imu.read_raw_frame()[:step]
+        next_t += 1.0 / rate_hz
+        delay = next_t - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+    return raw_frames(buf, n).astype(np.float64)
+
+def calibrate_gyro(imu, cal, seconds=5.0):
+    samples = capture(imu, seconds)[:, GYRO]
+    spread = samples.std(axis=0).max()
+    if spread > GYRO_STILL_STD:
+        raise RuntimeError(f"gyro moved during capture (std {spread:.0f} counts); keep it still")
+    cal.bias[GYRO] = samples.mean(axis=0)
+    return cal
+
+POSITIONS = ["+X up", "-X up", "+Y up", "-Y up", "+Z up", "-Z up"]
+
+def calibrate_accel(imu, cal, seconds=2.0, prompt=input, accel_fs_g=2):
+    # Each axis sees +1 g and -1 g once: offset is the midpoint, gain maps the
+    # measured span onto the nominal 2 g span
+    one_g = ACCEL_LSB_PER_G[accel_fs_g]
+    means = {}
+    for pos in POSITIONS:
+        prompt(f"Place the IMU {pos} and keep it still, then press Enter...")
+        means[pos] = capture(imu, seconds)[:, ACCEL].mean(axis=0)
+    for axis, name in enumerate("XYZ"):
+        hi = means[f"+{name} up"][axis]
+        lo = means[f"-{name} up"][axis]
+        if hi - lo < one_g:
+            raise RuntimeError(f"{name} axis span too small ({hi - lo:.0f} counts); check orientation")
+        cal.bias[ACCEL.start + axis] = (hi + lo) / 2.0
+        cal.gain[ACCEL.start + axis] = (2.0 * one_g) / (hi - lo)
+    return cal
+
+def main():
+    ap = argparse.ArgumentParser(description="ICM-20948 calibration")
+    ap.add_argument("command", choices=["gyro", "accel", "show"])
+    ap.add_argument("--seconds", type=float, default=5.0, help="capture time per position")
+    ap.add_argument("--dir", default=CAL_DIR)
+    args = ap.parse_args()
+
+    from readI2c import ICM20948
+    imu = ICM20948()
+    try:
+        t0 = time.perf_counter()
+        cal = load(imu.addr, args.dir)
+        print(f"loaded in {(time.perf_counter() - t0) * 1e3:.2f} ms: {cal}")
+        if args.command == "show":
+            return
+        cal = cal or Calibration(imu.addr)
+        if args.command == "gyro":
+            calibrate_gyro(imu, cal, args.seconds)
+        else:
+            calibrate_accel(imu, cal, args.seconds)
+        print(f"saved {save(cal, args.dir)}: {cal}")
+    finally:
+        imu.close()
+
+if __name__ == "__main__":
+    main()
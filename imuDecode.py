@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# imuDecode.py — batch decode + unit conversion for ICM-20948 frames
+#
+# A burst frame (readI2c.FRAME) is 7 big-endian int16: ax ay az gx gy gz temp.
+# FIFO frames (imuFifo) are the first 6 of those. With the magnetometer on,
+# each burst is 23 bytes and the AK09916 block (readI2c.MAG_PART) follows.
+# N frames back to back are decoded with one np.frombuffer call and scaled
+# with two in-place vector ops into buffers the caller owns, so steady-state
+# decoding allocates nothing.
+#
+#   dec = Decoder()
+#   out = np.empty((256, 7), np.float32)
+#   scaled = dec.decode(buf, out=out)      # g, dps, °C; view into out
+
+import numpy as np
+
+FRAME_CHANNELS = 7
+ACCEL = slice(0, 3)
+GYRO  = slice(3, 6)
+TEMP  = 6
+
+# LSB per unit for each full-scale setting (datasheet table 1/2).
+# readI2c.ICM20948.set_odr() leaves FS_SEL at 0: ±2 g, ±250 dps.
+ACCEL_LSB_PER_G   = {2: 16384.0, 4: 8192.0, 8: 4096.0, 16: 2048.0}
+GYRO_LSB_PER_DPS  = {250: 131.0, 500: 65.5, 1000: 32.8, 2000: 16.4}
+TEMP_LSB_PER_C    = 333.87
+TEMP_OFFSET_C     = 21.0
+MAG_UT_PER_LSB    = 0.15
+MAG_AXES          = np.array([1.0, -1.0, -1.0], dtype=np.float32)  # AK09916 -> body frame
+MAG_OFFSET        = 2 * FRAME_CHANNELS + 1     # after the ICM frame and ST1
+MAG_FRAME_BYTES   = 2 * FRAME_CHANNELS + 9     # readI2c.FRAME_LEN_MAG
+
+def raw_frames(buf, n=None, channels=FRAME_CHANNELS, frame_bytes=None):
+    # Zero-copy (n, channels) big-endian int16 view of buf. frame_bytes is the
+    # stride between frames when they carry more than `channels` words.
+    if frame_bytes is None:
+        frame_bytes = 2 * channels
+    if n is None:
+        n = len(buf) // frame_bytes
+    if frame_bytes == 2 * channels:
+        return np.frombuffer(buf, dtype=">i2", count=n * channels).reshape(n, channels)
+    return np.ndarray((n, channels), dtype=">i2", buffer=buf, strides=(frame_bytes, 2))
+
+def raw_mag(buf, n=None, frame_bytes=MAG_FRAME_BYTES):
+    # Zero-copy (n, 3) little-endian AK09916 counts (sensor axes) of 23-byte frames
+    if n is None:
+        n = len(buf) // frame_bytes
+    return np.ndarray((n, 3), dtype="<i2", buffer=buf, offset=MAG_OFFSET,
+                      strides=(frame_bytes, 2))
+
+def frames_to_int16(buf, n=None, channels=FRAME_CHANNELS, out=None):
+    # Native-endian (n, channels) int16 counts, written into out[:n] if given
+    raw = raw_frames(buf, n, channels)
+    if out is None:
+        return raw.astype(np.int16)
+    dst = out[:len(raw)]
+    dst[...] = raw
+    return dst
+
+class Decoder:
+    def __init__(self, accel_fs_g=2, gyro_fs_dps=250, channels=FRAME_CHANNELS,
+                 frame_bytes=None):
+        self.channels = channels
+        self.frame_bytes = frame_bytes if frame_bytes is not None else 2 * channels
+        scale = np.empty(FRAME_CHANNELS, dtype=np.float32)
+        scale[ACCEL] = 1.0 / ACCEL_LSB_PER_G[accel_fs_g]
+        scale[GYRO] = 1.0 / GYRO_LSB_PER_DPS[gyro_fs_dps]
+        scale[TEMP] = 1.0 / TEMP_LSB_PER_C
+        offset = np.zeros(FRAME_CHANNELS, dtype=np.float32)
+        offset[TEMP] = TEMP_OFFSET_C
+        # Per-channel affine map applied as counts * scale + offset
+        self.scale = scale[:channels].copy()
+        self.offset = offset[:channels].copy()
+        self.mag_scale = MAG_AXES * MAG_UT_PER_LSB
+        self.mag_offset = np.zeros(3, dtype=np.float32)
+
+    def apply_calibration(self, cal):
+        # Fold (counts - bias) * gain (imuCalib.Calibration) into the affine
+        # map; call on a fresh Decoder, it composes with whatever is set
+        c = self.channels
+        gain = cal.gain[:c].astype(np.float32)
+        self.offset -= cal.bias[:c] * gain * self.scale
+        self.scale *= gain
+
+    def decode(self, buf, n=None, out=None, out_raw=None):
+        # buf: bytes/bytearray/memoryview holding n frames (all of it if n is None)
+        # out: float32 (>= n, channels) for scaled values; out_raw: optional
+        # int16 (>= n, channels) to keep the counts too. Returns out[:n].
+        raw = raw_frames(buf, n, self.channels, self.frame_bytes)
+        n = len(raw)
+        if out_raw is not None:
+            out_raw[:n] = raw
+        if out is None:
+            out = np.empty((n, self.channels), dtype=np.float32)
+        dst = out[:n]
+        np.multiply(raw, self.scale, out=dst)
+        np.add(dst, self.offset, out=dst)
+        return dst
+
+    def decode_counts(self, counts, out=None):
+        # Same conversion for int16 counts already in memory (e.g. FIFO frames)
+        if out is None:
+            out = np.empty(counts.shape, dtype=np.float32)
+        dst = out[:len(counts)]
+        np.multiply(counts, self.scale, out=dst)
+        np.add(dst, self.offset, out=dst)
+        return dst
+
+    def decode_mag(self, buf, n=None, out=None):
+        # 23-byte frames -> (n, 3) float32 µT in the accel/gyro body frame
+        raw = raw_mag(buf, n, max(self.frame_bytes, MAG_FRAME_BYTES))
+        if out is None:
+            out = np.empty((len(raw), 3), dtype=np.float32)
+        dst = out[:len(raw)]
+        np.multiply(raw, self.mag_scale, out=dst)
+        np.add(dst, self.mag_offset, out=dst)
+        return dst
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# imuDrdy.py — data-ready interrupt driven ICM-20948 acquisition
+#
+# Wiring: ICM-20948 INT -> BCM27 (pin 13). The sensor pulses INT for ~50 µs
+# each time a new accel/gyro sample lands in the data registers; the kernel
+# timestamps the rising edge and lgpio hands it to us. Every edge wakes the
+# acquisition thread, which does exactly one 14-byte burst read and passes the
+# frame on together with the edge timestamp.
+#
+# A read that fails is counted in .errors and skipped; the next edge tries
+# again. Pass read= (e.g. a GuardedDevice call) to retry and re-initialise a
+# lost IMU, and call rearm() with the re-opened driver: a reset chip has lost
+# the data-ready configuration and sends no more edges until it is rewritten.
+
+from collections import deque
+from threading import Thread, Event
+
+import lgpio
+
+from readI2c import INT_PIN_CFG, INT_ENABLE_1, INT_STATUS_1
+
+PIN_IMU_INT = 27     # BCM
+GPIO_CHIP   = 0
+
+INT_PIN_CFG_PULSE = 0x00   # active high, push-pull, 50 µs pulse (no latch)
+RAW_DATA_0_RDY_EN = 0x01
+
+class DataReadyReader:
+    # on_sample(stamp_ns, frame) runs in the acquisition thread; frame is the
+    # raw 14-byte burst (see readI2c.FRAME). Without a callback the newest
+    # sample is kept in .latest as (stamp_ns, frame). read() -> frame, or None
+    # to skip this edge; defaults to imu.read_raw_frame.
+    def __init__(self, imu, odr_hz=100.0, int_pin=PIN_IMU_INT, chip=GPIO_CHIP,
+                 on_sample=None, read=None):
+        self.int_pin = int_pin
+        self.on_sample = on_sample
+        self.read = read
+        self.odr_hz = odr_hz
+        self.latest = None
+        self.samples = 0
+        self.missed = 0          # edges that arrived while a read was pending
+        self.errors = 0          # reads that raised OSError
+        self.last_error = None
+        self.pending = deque()
+        self.wake = Event()
+        self.running = False
+        self.rearm(imu)
+
+        self.h = lgpio.gpiochip_open(chip)
+        lgpio.gpio_claim_alert(self.h, int_pin, lgpio.RISING_EDGE)
+        self.cb = None
+        self.thread = Thread(target=self._run, daemon=True)
+
+    def rearm(self, imu):
+        # Configure data-ready on imu (a re-opened driver after a reset);
+        # None while the IMU is down
+        if imu is not None:
+            self.odr = imu.set_odr(self.odr_hz)
+            imu.write_reg(INT_PIN_CFG, INT_PIN_CFG_PULSE)
+            imu.write_reg(INT_ENABLE_1, RAW_DATA_0_RDY_EN)
+            imu.read_reg(INT_STATUS_1)   # clear a stale data-ready
+        self.imu = imu
+
+    def _on_edge(self, chip, gpio, level, tick):
+        # lgpio's thread: just hand the kernel edge timestamp (ns) over
+        self.pending.append(tick)
+        self.wake.set()
+
+    def _run(self):
+        while self.running:
+            self.wake.wait()
+            self.wake.clear()
+            if not self.pending:
+                continue
+            # If we fell behind, the data registers only hold the newest
+            # sample: read once and stamp it with the newest edge
+            stamp = self.pending.pop()
+            while self.pending:
+                self.pending.popleft()
+                self.missed += 1
+            try:
+                frame = self.read() if self.read is not None else self.imu.read_raw_frame()
+            except OSError as e:
+                self.errors += 1
+                self.last_error = e
+                continue
+            if frame is None:
+                continue
+            self.samples += 1
+            if self.on_sample is not None:
+                self.on_sample(stamp, frame)
+            else:
+                self.latest = (stamp, frame)
+
+    def start(self):
+        self.running = True
+        self.thread.start()
+        self.cb = lgpio.callback(self.h, self.int_pin, lgpio.RISING_EDGE, self._on_edge)
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+        if self.cb is not None:
+            self.cb.cancel()
+        if self.thread.is_alive():
+            self.thread.join()
+        if self.imu is not None:
+            try:
+                self.imu.write_reg(INT_ENABLE_1, 0x00)
+            except OSError:
+                pass
+        lgpio.gpio_free(self.h, self.int_pin)
+        lgpio.gpiochip_close(self.h)
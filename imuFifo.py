@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# imuFifo.py — gap-free ICM-20948 accel+gyro streaming through the hardware FIFO
+#
+# The sensor queues every sample at its own ODR; we only have to empty the FIFO
+# before it fills (512 bytes = 42 frames, ~37 ms at 1125 Hz). Each drain is one
+# count read plus one bulk read, and the frames are decoded in one NumPy call
+# into a buffer allocated once per stream.
+
+import time
+import numpy as np
+
+from imuDecode import frames_to_int16
+from readI2c import (USER_CTRL, INT_ENABLE_2, INT_STATUS_2, FIFO_EN_2, FIFO_RST,
+                     FIFO_MODE, FIFO_COUNTH, FIFO_R_W, BASE_ODR_HZ)
+
+FIFO_SIZE      = 512     # bytes of FIFO RAM
+FRAME_BYTES    = 12      # accel XYZ then gyro XYZ (register order), big-endian int16
+FRAME_CHANNELS = 6
+FIFO_EN_ACCEL_GYRO = 0x1E
+USER_CTRL_FIFO_EN  = 0x40
+READ_CHUNK     = (FIFO_SIZE // FRAME_BYTES) * FRAME_BYTES   # 504, whole frames only
+FILL_TARGET    = 0.5     # drain when the FIFO is expected to be about half full
+
+class FifoStream:
+    def __init__(self, imu, odr_hz=BASE_ODR_HZ, fill_target=FILL_TARGET):
+        self.imu = imu
+        self.odr = imu.set_odr(odr_hz)
+        self.period = fill_target * (FIFO_SIZE // FRAME_BYTES) / self.odr
+        self.buf = bytearray(FIFO_SIZE)
+        self.frames = np.empty((FIFO_SIZE // FRAME_BYTES, FRAME_CHANNELS), dtype=np.int16)
+        self.overflows = 0       # drains that found the FIFO full (samples lost)
+        self.frames_read = 0     # running sample index; gaps show up as overflows
+        self.drain_ns = 0        # monotonic_ns of the last drain
+        self.start()
+
+    def reset(self):
+        self.imu.write_reg(FIFO_RST, 0x1F)
+        self.imu.write_reg(FIFO_RST, 0x00)
+
+    def start(self):
+        imu = self.imu
+        user = imu.read_reg(USER_CTRL, cached=True)
+        imu.write_reg(USER_CTRL, user & ~USER_CTRL_FIFO_EN)
+        # Snapshot mode: a full FIFO stops accepting samples instead of
+        # overwriting, so what we read is contiguous and frame-aligned
+        imu.write_reg(FIFO_MODE, 0x1F)
+        imu.write_reg(INT_ENABLE_2, 0x1F)        # latch FIFO overflow status
+        imu.write_reg(FIFO_EN_2, FIFO_EN_ACCEL_GYRO)
+        self.reset()
+        imu.read_reg(INT_STATUS_2)               # clear any stale overflow
+        imu.write_reg(USER_CTRL, user | USER_CTRL_FIFO_EN)
+        self.drain_ns = time.monotonic_ns()
+
+    def stop(self):
+        self.imu.write_reg(FIFO_EN_2, 0x00)
+        self.imu.write_reg(USER_CTRL, self.imu.read_reg(USER_CTRL, cached=True) & ~USER_CTRL_FIFO_EN)
+
+    def close(self):
+        # Stop the FIFO and close the IMU; for i2cGuard, which closes lost devices
+        try:
+            self.stop()
+        finally:
+            self.imu.close()
+
+    def count(self):
+        hi, lo = self.imu.read_block(FIFO_COUNTH, 2)
+        return ((hi & 0x1F) << 8) | lo
+
+    def drain(self):
+        # -> (frames, overflowed); frames is (N, 6) int16 [ax ay az gx gy gz],
+        # oldest first. overflowed means samples were dropped after these.
+        # frames is a view of self.frames, valid until the next drain: copy
+        # it to keep it.
+        overflowed = bool(self.imu.read_reg(INT_STATUS_2) & 0x1F)
+        nbytes = min(self.count(), FIFO_SIZE) // FRAME_BYTES * FRAME_BYTES
+        self.drain_ns = time.monotonic_ns()
+        view = memoryview(self.buf)
+        pos = 0
+        while pos < nbytes:
+            k = min(READ_CHUNK, nbytes - pos)
+            view[pos:pos + k] = self.imu.read_block(FIFO_R_W, k)
+            pos += k
+        n = nbytes // FRAME_BYTES
+        frames = frames_to_int16(self.buf, n, FRAME_CHANNELS, out=self.frames)
+        if overflowed:
+            # a full snapshot FIFO may end in a partial frame; start clean.
+            # Samples dropped since the status read re-latched the overflow
+            # bit: clear it, or the next drain would count this one again
+            self.overflows += 1
+            self.reset()
+            self.imu.read_reg(INT_STATUS_2)
+        self.frames_read += n
+        return frames, overflowed
+
+    def frame_times(self, n):
+        # Estimated monotonic_ns of the last n drained frames (newest = drain time)
+        step = 1e9 / self.odr
+        return self.drain_ns - (np.arange(n - 1, -1, -1) * step).astype(np.int64)
+
+    def stream(self):
+        # Yields drain() results forever, paced so the FIFO stays below FILL_TARGET
+        next_t = time.monotonic()
+        while True:
+            yield self.drain()
+            next_t += self.period
+            delay = next_t - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_t = time.monotonic()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# imuOrientation.py — streaming Madgwick attitude estimator for the ICM-20948
+#
+#   est = Madgwick(beta=0.05)
+#   q = est.update_batch(gyro_dps, accel_g, dt=1/1125)   # whole FIFO drain
+#   roll, pitch, yaw = est.euler()                        # degrees
+#
+#   python3 imuOrientation.py            live roll/pitch/yaw from the FIFO
+#   python3 imuOrientation.py --bench    samples/s vs. the 1 kHz budget
+#
+# update_batch() walks a drain of N samples in one call: the arrays are turned
+# into Python floats once and the filter runs on plain locals, which on a
+# Pi Zero 2 is far cheaper than per-sample NumPy calls or method dispatch.
+# Magnetometer samples must already be in the accel/gyro body frame.
+
+import math
+import time
+import argparse
+
+import numpy as np
+
+DEG2RAD = math.pi / 180.0
+BETA    = 0.05           # gradient step; higher trusts accel/mag more
+
+def quat_to_euler(q):
+    # (..., 4) quaternions [w x y z] -> (..., 3) roll, pitch, yaw in degrees
+    q = np.asarray(q, dtype=np.float64)
+    w, x, y, z = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    roll = np.arctan2(2.0 * (w * x + y * z), 1.0 - 2.0 * (x * x + y * y))
+    pitch = np.arcsin(np.clip(2.0 * (w * y - z * x), -1.0, 1.0))
+    yaw = np.arctan2(2.0 * (w * z + x * y), 1.0 - 2.0 * (y * y + z * z))
+    return np.degrees(np.stack((roll, pitch, yaw), axis=-1))
+
+class Madgwick:
+    def __init__(self, beta=BETA, q=(1.0, 0.0, 0.0, 0.0)):
+        self.beta = beta
+        self.q = list(q)
+        self.last_ns = None
+
+    def euler(self):
+        return tuple(quat_to_euler(self.q).tolist())
+
+    def update_batch(self, gyro_dps, accel, mag=None, dt=None, stamps=None, out=None):
+        # gyro_dps, accel (and mag): (N, 3). Either a fixed dt in seconds or
+        # stamps (N,) in ns. out: optional (>= N, 4) array that receives the
+        # quaternion after every sample. Returns the final quaternion.
+        n = len(gyro_dps)
+        if not n:
+            return tuple(self.q)
+        if stamps is not None:
+            stamps = np.asarray(stamps, dtype=np.int64)
+            prev = self.last_ns if self.last_ns is not None else stamps[0]
+            dts = (np.diff(stamps, prepend=prev) * 1e-9).tolist()
+            self.last_ns = int(stamps[-1])
+        elif dt is not None:
+            dts = None
+        else:
+            raise ValueError("update_batch needs dt or stamps")
+        g = (np.asarray(gyro_dps, dtype=np.float64) * DEG2RAD).tolist()
+        a = np.asarray(accel, dtype=np.float64).tolist()
+        m = np.asarray(mag, dtype=np.float64).tolist() if mag is not None else None
+        step = self._marg if m is not None else self._imu
+        beta = self.beta
+        q0, q1, q2, q3 = self.q
+        for i in range(n):
+            h = dts[i] if dts is not None else dt
+            if m is not None:
+                q0, q1, q2, q3 = step(q0, q1, q2, q3, g[i], a[i], m[i], h, beta)
+            else:
+                q0, q1, q2, q3 = step(q0, q1, q2, q3, g[i], a[i], h, beta)
+            if out is not None:
+                out[i] = (q0, q1, q2, q3)
+        self.q = [q0, q1, q2, q3]
+        return q0, q1, q2, q3
+
+    def update(self, gyro_dps, accel, mag=None, dt=None):
+        return self.update_batch([gyro_dps], [accel], None if mag is None else [mag], dt)
+
+    @staticmethod
+    def _imu(q0, q1, q2, q3, g, a, dt, beta):
+        gx, gy, gz = g
+        ax, ay, az = a
+        qd0 = 0.5 * (-q1 * gx - q2 * gy - q3 * gz)
+        qd1 = 0.5 * (q0 * gx + q2 * gz - q3 * gy)
+        qd2 = 0.5 * (q0 * gy - q1 * gz + q3 * gx)
+        qd3 = 0.5 * (q0 * gz + q1 * gy - q2 * gx)
+        norm = ax * ax + ay * ay + az * az
+        if norm > 0.0:
+            r = 1.0 / math.sqrt(norm)
+            ax *= r; ay *= r; az *= r
+            _2q0 = 2.0 * q0; _2q1 = 2.0 * q1; _2q2 = 2.0 * q2; _2q3 = 2.0 * q3
+            _4q0 = 4.0 * q0; _4q1 = 4.0 * q1; _4q2 = 4.0 * q2
+            _8q1 = 8.0 * q1; _8q2 = 8.0 * q2
+            q0q0 = q0 * q0; q1q1 = q1 * q1; q2q2 = q2 * q2; q3q3 = q3 * q3
+            s0 = _4q0 * q2q2 + _2q2 * ax + _4q0 * q1q1 - _2q1 * ay
+            s1 = (_4q1 * q3q3 - _2q3 * ax + 4.0 * q0q0 * q1 - _2q0 * ay - _4q1
+                  + _8q1 * q1q1 + _8q1 * q2q2 + _4q1 * az)
+            s2 = (4.0 * q0q0 * q2 + _2q0 * ax + _4q2 * q3q3 - _2q3 * ay - _4q2
+                  + _8q2 * q1q1 + _8q2 * q2q2 + _4q2 * az)
+            s3 = 4.0 * q1q1 * q3 - _2q1 * ax + 4.0 * q2q2 * q3 - _2q2 * ay
+            snorm = s0 * s0 + s1 * s1 + s2 * s2 + s3 * s3
+            if snorm > 0.0:
+                r = beta / math.sqrt(snorm)
+                qd0 -= r * s0; qd1 -= r * s1; qd2 -= r * s2; qd3 -= r * s3
+        q0 += qd0 * dt; q1 += qd1 * dt; q2 += qd2 * dt; q3 += qd3 * dt
+        r = 1.0 / math.sqrt(q0 * q0 + q1 * q1 + q2 * q2 + q3 * q3)
+        return q0 * r, q1 * r, q2 * r, q3 * r
+
+    @staticmethod
+    def _marg(q0, q1, q2, q3, g, a, m, dt, beta):
+        mx, my, mz = m
+        mnorm = mx * mx + my * my + mz * mz
+        if mnorm == 0.0:
+            return Madgwick._imu(q0, q1, q2, q3, g, a, dt, beta)
+        gx, gy, gz = g
+        ax, ay, az = a
+        qd0 = 0.5 * (-q1 * gx - q2 * gy - q3 * gz)
+        qd1 = 0.5 * (q0 * gx + q2 * gz - q3 * gy)
+        qd2 = 0.5 * (q0 * gy - q1 * gz + q3 * gx)
+        qd3 = 0.5 * (q0 * gz + q1 * gy - q2 * gx)
+        norm = ax * ax + ay * ay + az * az
+        if norm > 0.0:
+            r = 1.0 / math.sqrt(norm)
+            ax *= r; ay *= r; az *= r
+            r = 1.0 / math.sqrt(mnorm)
+            mx *= r; my *= r; mz *= r
+
+            _2q0mx = 2.0 * q0 * mx; _2q0my = 2.0 * q0 * my
+            _2q0mz = 2.0 * q0 * mz; _2q1mx = 2.0 * q1 * mx
+            _2q0 = 2.0 * q0; _2q1 = 2.0 * q1; _2q2 = 2.0 * q2; _2q3 = 2.0 * q3
+            _2q0q2 = 2.0 * q0 * q2; _2q2q3 = 2.0 * q2 * q3
+            q0q0 = q0 * q0; q0q1 = q0 * q1; q0q2 = q0 * q2; q0q3 = q0 * q3
+            q1q1 = q1 * q1; q1q2 = q1 * q2; q1q3 = q1 * q3
+            q2q2 = q2 * q2; q2q3 = q2 * q3; q3q3 = q3 * q3
+
+            # Earth's field direction in the current estimate
+            hx = (mx * q0q0 - _2q0my * q3 + _2q0mz * q2 + mx * q1q1 + _2q1 * my * q2
+                  + _2q1 * mz * q3 - mx * q2q2 - mx * q3q3)
+            hy = (_2q0mx * q3 + my * q0q0 - _2q0mz * q1 + _2q1mx * q2 - my * q1q1
+                  + my * q2q2 + _2q2 * mz * q3 - my * q3q3)
+            _2bx = math.sqrt(hx * hx + hy * hy)
+            _2bz = (-_2q0mx * q2 + _2q0my * q1 + mz * q0q0 + _2q1mx * q3 - mz * q1q1
+                    + _2q2 * my * q3 - mz * q2q2 + mz * q3q3)
+            _4bx = 2.0 * _2bx; _4bz = 2.0 * _2bz
+
+            # Objective function terms shared by the gradient
+            fa_x = 2.0 * q1q3 - _2q0q2 - ax
+            fa_y = 2.0 * q0q1 + _2q2q3 - ay
+            fa_z = 1.0 - 2.0 * q1q1 - 2.0 * q2q2 - az
+            fm_x = _2bx * (0.5 - q2q2 - q3q3) + _2bz * (q1q3 - q0q2) - mx
+            fm_y = _2bx * (q1q2 - q0q3) + _2bz * (q0q1 + q2q3) - my
+            fm_z = _2bx * (q0q2 + q1q3) + _2bz * (0.5 - q1q1 - q2q2) - mz
+
+            s0 = (-_2q2 * fa_x + _2q1 * fa_y - _2bz * q2 * fm_x
+                  + (-_2bx * q3 + _2bz * q1) * fm_y + _2bx * q2 * fm_z)
+            s1 = (_2q3 * fa_x + _2q0 * fa_y - 4.0 * q1 * fa_z + _2bz * q3 * fm_x
+                  + (_2bx * q2 + _2bz * q0) * fm_y + (_2bx * q3 - _4bz * q1) * fm_z)
+            s2 = (-_2q0 * fa_x + _2q3 * fa_y - 4.0 * q2 * fa_z
+                  + (-_4bx * q2 - _2bz * q0) * fm_x + (_2bx * q1 + _2bz * q3) * fm_y
+                  + (_2bx * q0 - _4bz * q2) * fm_z)
+            s3 = (_2q1 * fa_x + _2q2 * fa_y + (-_4bx * q3 + _2bz * q1) * fm_x
+                  + (-_2bx * q0 + _2bz * q2) * fm_y + _2bx * q1 * fm_z)
+            snorm = s0 * s0 + s1 * s1 + s2 * s2 + s3 * s3
+            if snorm > 0.0:
+                r = beta / math.sqrt(snorm)
+                qd0 -= r * s0; qd1 -= r * s1; qd2 -= r * s2; qd3 -= r * s3
+        q0 += qd0 * dt; q1 += qd1 * dt; q2 += qd2 * dt; q3 += qd3 * dt
+        r = 1.0 / math.sqrt(q0 * q0 + q1 * q1 + q2 * q2 + q3 * q3)
+        return q0 * r, q1 * r, q2 * r, q3 * r
+
+
+def benchmark(n=20000, rate_hz=1000.0):
+    # -> {name: samples/s} on synthetic data; >= rate_hz means real time
+    rng = np.random.default_rng(0)
+    gyro = rng.normal(0.0, 2.0, (n, 3))
+    accel = rng.normal(0.0, 0.02, (n, 3)) + (0.0, 0.0, 1.0)
+    mag = rng.normal(0.0, 0.5, (n, 3)) + (20.0, 0.0, -40.0)
+    out = np.empty((n, 4))
+    results = {}
+    for name, m in (("imu", None), ("marg", mag)):
+        est = Madgwick()
+        t0 = time.perf_counter()
+        est.update_batch(gyro, accel, m, dt=1.0 / rate_hz, out=out)
+        results[name] = n / (time.perf_counter() - t0)
+    return results
+
+def main():
+    ap = argparse.ArgumentParser(description="Madgwick orientation from the ICM-20948 FIFO")
+    ap.add_argument("--odr", type=float, default=1125.0)
+    ap.add_argument("--beta", type=float, default=BETA)
+    ap.add_argument("--bench", action="store_true", help="benchmark on synthetic data and exit")
+    args = ap.parse_args()
+
+    if args.bench:
+        for name, rate in benchmark(rate_hz=args.odr).items():
+            print(f"{name:5} {rate:9.0f} samples/s  ({rate / args.odr:.1f}x real time at {args.odr:.0f} Hz)")
+        return
+
+    from readI2c import ICM20948
+    from imuFifo import FifoStream
+    from imuDecode import Decoder, ACCEL, GYRO
+    from imuCalib import load_into
+
+    imu = ICM20948()
+    fifo = FifoStream(imu, args.odr)
+    dec = Decoder(channels=6)
+    load_into(dec, imu.addr)
+    est = Madgwick(args.beta)
+    print(f"Orientation at {fifo.odr:.1f} Hz. Ctrl+C to stop.")
+    try:
+        t_next = time.monotonic() + 0.5
+        for frames, _ in fifo.stream():
+            if not len(frames):
+                continue
+            rows = dec.decode_counts(frames)
+            est.update_batch(rows[:, GYRO], rows[:, ACCEL], dt=1.0 / fifo.odr)
+            if time.monotonic() >= t_next:
+                roll, pitch, yaw = est.euler()
+                print(f"Roll {roll:+7.2f}  Pitch {pitch:+7.2f}  Yaw {yaw:+7.2f}")
+                t_next += 0.5
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fifo.stop()
+        imu.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# imuRecord.py — chunked, columnar on-disk recording of raw IMU streams
+#
+#   python3 imuRecord.py record run.imu --odr 1125 --seconds 3600
+#   python3 imuRecord.py info run.imu
+#
+#   rec = Recording("run.imu")
+#   ts, ch = rec.chunk(0)              # views: (C,) int64 ns, (7, C) int16 counts
+#   ax = rec.channel(0)                # (n_chunks, C) strided view, no parsing
+#   t, counts = rec.samples()          # flat (N,), (N, 7); one vectorised copy
+#
+# File layout (little-endian):
+#   [header, HEADER_SIZE bytes]
+#   [chunk 0][chunk 1]...          chunk = ts int64[C] | ch0 int16[C] | ... | ch6 int16[C]
+# Every chunk is the same size (22*C bytes, page aligned for C = 4096), so any
+# column across the whole file is one strided view of the mmap. The writer
+# grows the file a segment of chunks at a time and fills it through an mmap,
+# so recording is plain memory stores. 22 bytes/sample: 1 kHz for an hour is
+# ~79 MB.
+
+import os
+import mmap
+import time
+import struct
+import argparse
+
+import numpy as np
+
+from imuDecode import Decoder, FRAME_CHANNELS
+
+REC_MAGIC      = b"IMUR"
+REC_VERSION    = 1
+HEADER_SIZE    = mmap.ALLOCATIONGRANULARITY
+CHUNK_LEN      = 4096            # samples per chunk
+SEGMENT_CHUNKS = 16              # chunks mapped/preallocated at a time (~1.4 MB)
+# magic, version, channels, chunk_len, pad, samples, odr_hz, start wall ns,
+# scale[7], offset[7] (counts -> g / dps / °C as in imuDecode.Decoder)
+HEADER = struct.Struct(f"<4sHHI4xqdq{FRAME_CHANNELS}f{FRAME_CHANNELS}f")
+
+def chunk_bytes(chunk_len=CHUNK_LEN, channels=FRAME_CHANNELS):
+    return chunk_len * (8 + 2 * channels)
+
+class Recorder:
+    def __init__(self, path, odr_hz=0.0, decoder=None, chunk_len=CHUNK_LEN,
+                 segment_chunks=SEGMENT_CHUNKS):
+        self.path = path
+        self.odr = odr_hz
+        self.dec = decoder or Decoder()
+        self.channels = FRAME_CHANNELS
+        self.chunk_len = chunk_len
+        self.chunk_bytes = chunk_bytes(chunk_len)
+        self.segment_chunks = segment_chunks
+        self.count = 0                    # samples written
+        self.start_ns = time.time_ns()
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.ftruncate(self.fd, HEADER_SIZE)
+        self._write_header()
+        self.mm = None
+        self.seg_first = 0                # first chunk index of the mapped segment
+        self._map_segment(0)
+
+    def _write_header(self):
+        hdr = HEADER.pack(REC_MAGIC, REC_VERSION, self.channels, self.chunk_len,
+                          self.count, self.odr, self.start_ns,
+                          *self.dec.scale.tolist(), *self.dec.offset.tolist())
+        os.pwrite(self.fd, hdr, 0)
+
+    def _map_segment(self, first_chunk):
+        if self.mm is not None:
+            self.mm.flush()
+            self.mm.close()
+        seg_size = self.segment_chunks * self.chunk_bytes
+        offset = HEADER_SIZE + first_chunk * self.chunk_bytes
+        os.ftruncate(self.fd, offset + seg_size)          # preallocate the segment
+        # mmap offsets must be page aligned; chunks only are for C = 4096
+        skew = offset % mmap.ALLOCATIONGRANULARITY
+        self.mm = mmap.mmap(self.fd, skew + seg_size, offset=offset - skew)
+        self.seg_first = first_chunk
+        # Column views for every chunk of the segment: (chunks, C) and (chunks, ch, C)
+        c, cb = self.chunk_len, self.chunk_bytes
+        self.ts = np.ndarray((self.segment_chunks, c), dtype="<i8", buffer=self.mm,
+                             offset=skew, strides=(cb, 8))
+        self.ch = np.ndarray((self.segment_chunks, self.channels, c), dtype="<i2",
+                             buffer=self.mm, offset=skew + 8 * c, strides=(cb, 2 * c, 2))
+
+    def append(self, stamps, counts):
+        # stamps: (n,) int64 ns; counts: (n, 7) int16 raw frame channels
+        n = len(stamps)
+        done = 0
+        while done < n:
+            chunk, pos = divmod(self.count, self.chunk_len)
+            local = chunk - self.seg_first
+            if local >= self.segment_chunks:
+                self._write_header()
+                self._map_segment(chunk)
+                local = 0
+            k = min(n - done, self.chunk_len - pos)
+            self.ts[local, pos:pos + k] = stamps[done:done + k]
+            self.ch[local, :, pos:pos + k] = counts[done:done + k].T
+            done += k
+            self.count += k
+
+    def close(self):
+        if self.mm is None:
+            return
+        self.ts = self.ch = None
+        self.mm.flush()
+        self.mm.close()
+        self.mm = None
+        used = -(-self.count // self.chunk_len)           # whole chunks in use
+        os.ftruncate(self.fd, HEADER_SIZE + used * self.chunk_bytes)
+        self._write_header()
+        os.close(self.fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Recording:
+    def __init__(self, path):
+        self.mm = np.memmap(path, dtype=np.uint8, mode="r")
+        (magic, version, self.channels, self.chunk_len, self.count, self.odr,
+         self.start_ns, *rest) = HEADER.unpack_from(self.mm, 0)
+        if magic != REC_MAGIC or version != REC_VERSION:
+            raise ValueError(f"{path}: not an IMU recording v{REC_VERSION}")
+        self.scale = np.array(rest[:self.channels], dtype=np.float32)
+        self.offset = np.array(rest[self.channels:], dtype=np.float32)
+        self.chunk_bytes = chunk_bytes(self.chunk_len, self.channels)
+        self.n_chunks = (len(self.mm) - HEADER_SIZE) // self.chunk_bytes
+        c, cb = self.chunk_len, self.chunk_bytes
+        self.ts = np.ndarray((self.n_chunks, c), dtype="<i8", buffer=self.mm,
+                             offset=HEADER_SIZE, strides=(cb, 8))
+        self.ch = np.ndarray((self.n_chunks, self.channels, c), dtype="<i2",
+                             buffer=self.mm, offset=HEADER_SIZE + 8 * c,
+                             strides=(cb, 2 * c, 2))
+        if -(-self.count // c) != self.n_chunks:
+            # The writer died before close() (the file still has preallocated
+            # chunks): trust the timestamps, which are non-zero for every
+            # sample actually written
+            self.count = int(np.count_nonzero(self.ts))
+
+    def __len__(self):
+        return self.count
+
+    def chunk(self, k):
+        n = min(self.chunk_len, self.count - k * self.chunk_len)
+        return self.ts[k, :n], self.ch[k, :, :n]
+
+    def channel(self, i):
+        return self.ch[:, i, :]
+
+    def samples(self):
+        # Flat (N,) stamps and (N, channels) counts; a single copy of each
+        n = self.count
+        return (self.ts.reshape(-1)[:n],
+                self.ch.transpose(0, 2, 1).reshape(-1, self.channels)[:n])
+
+    def scaled(self):
+        t, counts = self.samples()
+        return t, counts * self.scale + self.offset
+
+
+def record(imu, path, odr_hz=1125.0, seconds=None, decoder=None):
+    # Stream the FIFO into a recording; temp is read once per drain. Ctrl+C
+    # ends the recording normally. -> (samples, FIFO overflows)
+    from imuFifo import FifoStream, FIFO_SIZE, FRAME_BYTES
+    from readI2c import TEMP_OUT_H
+    fifo = FifoStream(imu, odr_hz)
+    counts = np.empty((FIFO_SIZE // FRAME_BYTES, FRAME_CHANNELS), dtype=np.int16)
+    end = None if seconds is None else time.monotonic() + seconds
+    with Recorder(path, fifo.odr, decoder) as rec:
+        try:
+            for frames, _ in fifo.stream():
+                n = len(frames)
+                if n:
+                    counts[:n, :6] = frames
+                    counts[:n, 6] = int.from_bytes(imu.read_block(TEMP_OUT_H, 2), "big", signed=True)
+                    rec.append(fifo.frame_times(n), counts[:n])
+                if end is not None and time.monotonic() >= end:
+                    break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            fifo.stop()
+    return rec.count, fifo.overflows
+
+def main():
+    ap = argparse.ArgumentParser(description="IMU recording")
+    sub = ap.add_subparsers(dest="command", required=True)
+    r = sub.add_parser("record")
+    r.add_argument("path")
+    r.add_argument("--odr", type=float, default=1125.0)
+    r.add_argument("--seconds", type=float)
+    i = sub.add_parser("info")
+    i.add_argument("path")
+    args = ap.parse_args()
+
+    if args.command == "info":
+        t0 = time.perf_counter()
+        rec = Recording(args.path)
+        t, counts = rec.scaled()
+        dt = time.perf_counter() - t0
+        span = (t[-1] - t[0]) / 1e9 if len(t) else 0.0
+        print(f"{len(rec)} samples, {span:.1f} s at {rec.odr:.1f} Hz, loaded in {dt * 1e3:.0f} ms")
+        if len(t):
+            print("mean:", np.round(counts.mean(axis=0), 3).tolist())
+        return
+
+    from readI2c import ICM20948
+    from imuCalib import load_into
+    imu = ICM20948()
+    dec = Decoder()
+    load_into(dec, imu.addr)
+    print(f"Recording to {args.path} at {args.odr:.0f} Hz. Ctrl+C to stop.")
+    try:
+        n, overflows = record(imu, args.path, args.odr, args.seconds, dec)
+        print(f"{n} samples, {overflows} overflows")
+    finally:
+        imu.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# imuStream.py — background IMU acquisition into a preallocated ring buffer
+#
+# One IMUStream owns the ICM-20948; the control loop, display and loggers read
+# from the ring and never touch I2C themselves.
+#
+#   stream = IMUStream(ICM20948(), source="fifo", rate_hz=1125)
+#   stream.start()
+#   seq = stream.wait_new()               # block until a new sample lands
+#   t, row = stream.latest()              # ns timestamp, [ax ay az gx gy gz temp]
+#   ts, rows = stream.window(0.5)         # last 0.5 s
+#
+# Rows are g, dps, °C (imuDecode.Decoder, with the imuCalib correction for
+# this sensor applied when one is stored). latest()/window() return views into
+# the ring whenever the data is contiguous; a view stays valid until the
+# writer wraps around onto it (capacity samples later), so copy anything you
+# keep longer than that.
+
+import time
+from threading import Thread, Condition
+
+import numpy as np
+
+from imuDecode import Decoder, FRAME_CHANNELS, TEMP
+
+CAPACITY = 8192          # ~7 s at 1125 Hz
+SOURCES  = ("poll", "fifo", "drdy")
+
+class IMUStream:
+    def __init__(self, imu, source="poll", rate_hz=200.0, capacity=CAPACITY,
+                 decoder=None):
+        if source not in SOURCES:
+            raise ValueError(f"source must be one of {SOURCES}")
+        self.imu = imu
+        self.source = source
+        self.rate_hz = rate_hz
+        self.capacity = capacity
+        if decoder is None:
+            from imuCalib import load_into
+            decoder = Decoder()
+            load_into(decoder, imu.addr)     # stored bias/scale, if any
+        self.dec = decoder
+        self.t = np.zeros(capacity, dtype=np.int64)                    # monotonic ns
+        self.data = np.zeros((capacity, FRAME_CHANNELS), dtype=np.float32)
+        self.count = 0           # samples written since start; newest is count-1
+        self.cond = Condition()
+        self.running = False
+        self.thread = None
+        self.fifo = None
+        self.drdy = None
+
+    # ---- writer side ----
+    def _push(self, stamps, rows):
+        n = len(rows)
+        if n > self.capacity:
+            stamps, rows, n = stamps[-self.capacity:], rows[-self.capacity:], self.capacity
+        with self.cond:
+            i = self.count % self.capacity
+            k = min(n, self.capacity - i)
+            self.t[i:i + k] = stamps[:k]
+            self.data[i:i + k] = rows[:k]
+            if k < n:
+                self.t[:n - k] = stamps[k:]
+                self.data[:n - k] = rows[k:]
+            self.count += n
+            self.cond.notify_all()
+
+    def _poll_loop(self):
+        row = np.empty((1, FRAME_CHANNELS), dtype=np.float32)
+        stamp = np.empty(1, dtype=np.int64)
+        period = 1.0 / self.rate_hz
+        next_t = time.monotonic()
+        while self.running:
+            frame = self.imu.read_raw_frame()
+            stamp[0] = time.monotonic_ns()
+            self.dec.decode(frame, out=row)
+            self._push(stamp, row)
+            next_t += period
+            delay = next_t - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_t = time.monotonic()
+
+    def _fifo_loop(self):
+        from imuFifo import FIFO_SIZE, FRAME_BYTES
+        fifo = self.fifo
+        rows = np.empty((FIFO_SIZE // FRAME_BYTES, FRAME_CHANNELS), dtype=np.float32)
+        motion = Decoder(channels=FRAME_CHANNELS - 1)
+        motion.scale[:], motion.offset[:] = self.dec.scale[:TEMP], self.dec.offset[:TEMP]
+        try:
+            for frames, _ in fifo.stream():
+                if not self.running:
+                    break
+                n = len(frames)
+                if not n:
+                    continue
+                # The FIFO carries accel+gyro only; temp is read once per drain
+                motion.decode_counts(frames, out=rows[:, :TEMP])
+                rows[:n, TEMP] = self.imu.read_temp_c()
+                self._push(fifo.frame_times(n), rows[:n])
+        finally:
+            fifo.stop()
+
+    def _on_drdy(self, stamp, frame):
+        self._stamp_buf[0] = stamp
+        self._push(self._stamp_buf, self.dec.decode(frame, out=self._row_buf))
+
+    # ---- control ----
+    def start(self):
+        self.running = True
+        if self.source == "drdy":
+            from imuDrdy import DataReadyReader
+            self._row_buf = np.empty((1, FRAME_CHANNELS), dtype=np.float32)
+            self._stamp_buf = np.empty(1, dtype=np.int64)
+            self.drdy = DataReadyReader(self.imu, self.rate_hz, on_sample=self._on_drdy)
+            self.rate_hz = self.drdy.odr
+            self.drdy.start()
+            return self
+        loop = self._poll_loop
+        if self.source == "fifo":
+            from imuFifo import FifoStream
+            self.fifo = FifoStream(self.imu, self.rate_hz)
+            self.rate_hz = self.fifo.odr
+            loop = self._fifo_loop
+        self.thread = Thread(target=loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.drdy is not None:
+            self.drdy.stop()
+        if self.thread is not None:
+            self.thread.join()
+        with self.cond:
+            self.cond.notify_all()
+
+    # ---- reader side ----
+    def latest(self):
+        # -> (stamp_ns, row view) or None before the first sample
+        with self.cond:
+            if not self.count:
+                return None
+            i = (self.count - 1) % self.capacity
+            return int(self.t[i]), self.data[i]
+
+    def last(self, n):
+        # -> (stamps, rows) for the newest n samples, oldest first
+        with self.cond:
+            n = min(n, self.count, self.capacity)
+            end = self.count % self.capacity or (self.capacity if self.count else 0)
+            start = end - n
+            if start >= 0:
+                return self.t[start:end], self.data[start:end]
+            # wrapped: the only case that copies
+            return (np.concatenate((self.t[start:], self.t[:end])),
+                    np.concatenate((self.data[start:], self.data[:end])))
+
+    def window(self, seconds):
+        # -> (stamps, rows) whose stamps lie within `seconds` of the newest
+        with self.cond:
+            if not self.count:
+                return self.t[:0], self.data[:0]
+            n = min(self.count, self.capacity)
+            span = int(seconds * self.rate_hz * 1.25) + 2   # bound from the rate, with slack
+            stamps, rows = self.last(min(n, span))
+            cut = np.searchsorted(stamps, stamps[-1] - int(seconds * 1e9), side="left")
+            return stamps[cut:], rows[cut:]
+
+    def wait_new(self, seen=None, timeout=None):
+        # Block until more than `seen` samples exist (default: the current
+        # count); returns the new count, or None on timeout/stop
+        with self.cond:
+            if seen is None:
+                seen = self.count
+            ok = self.cond.wait_for(lambda: self.count > seen or not self.running, timeout)
+            return self.count if ok and self.count > seen else None
+
+
+if __name__ == "__main__":
+    import sys
+    from readI2c import ICM20948
+    stream = IMUStream(ICM20948(), source=sys.argv[1] if len(sys.argv) > 1 else "poll").start()
+    print(f"IMU stream ({stream.source}) at {stream.rate_hz:.1f} Hz. Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1.0)
+            ts, rows = stream.window(1.0)
+            if len(rows):
+                m = rows.mean(axis=0)
+                print(f"{len(rows):5} samples/s  mean Accel: ({m[0]:+.3f}, {m[1]:+.3f}, {m[2]:+.3f}) g"
+                      f"  Gyro: ({m[3]:+.2f}, {m[4]:+.2f}, {m[5]:+.2f}) dps  Temp: {m[6]:.2f} °C")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stream.stop()
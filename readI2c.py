@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 import time
-from smbus2 import SMBus
+import struct
+import argparse
+from smbus2 import SMBus, i2c_msg
 
 # ICM-20948 constants (Bank 0 unless noted)
 REG_BANK_SEL      = 0x7F  # write 0x00 for Bank 0
@@ -10,6 +12,69 @@ PWR_MGMT_2        = 0x07  # enable/disable accel/gyro axes (0=enabled)
 ACCEL_XOUT_H      = 0x2D  # XH,XL,YH,YL,ZH,ZL
 GYRO_XOUT_H       = 0x33  # XH,XL,YH,YL,ZH,ZL
 TEMP_OUT_H        = 0x39  # TH,TL
+USER_CTRL         = 0x03  # bit6 FIFO_EN, bit5 I2C_MST_EN, bit1 I2C_MST_RST
+INT_PIN_CFG       = 0x0F  # INT polarity / latch / clear behaviour
+INT_ENABLE_1      = 0x11  # bit0 RAW_DATA_0_RDY_EN
+INT_ENABLE_2      = 0x12  # FIFO_OVERFLOW_EN[4:0]
+INT_STATUS_1      = 0x1A  # bit0 RAW_DATA_0_RDY_INT
+INT_STATUS_2      = 0x1B  # FIFO_OVERFLOW_INT[4:0], clears on read
+I2C_MST_STATUS    = 0x17  # bit6 I2C_SLV4_DONE
+EXT_SLV_SENS_DATA_00 = 0x3B  # data fetched by the I2C master (follows TEMP_OUT_L)
+FIFO_EN_2         = 0x67  # bit4 ACCEL, bits3:1 GYRO Z/Y/X, bit0 TEMP
+FIFO_RST          = 0x68  # write 0x1F then 0x00
+FIFO_MODE         = 0x69  # 0 = stream (overwrite), 1 = snapshot (stop when full)
+FIFO_COUNTH       = 0x70  # COUNTH,COUNTL (13 bits, bytes)
+FIFO_R_W          = 0x72  # FIFO data port (does not auto-increment)
+
+# Bank 2 (sample rate / full scale)
+BANK_0            = 0x00
+BANK_2            = 0x20
+GYRO_SMPLRT_DIV   = 0x00  # ODR = 1125 / (1 + div)
+GYRO_CONFIG_1     = 0x01  # bits2:1 FS_SEL, bit0 FCHOICE (1 = DLPF on)
+ACCEL_SMPLRT_DIV_1 = 0x10 # div[11:8]
+ACCEL_SMPLRT_DIV_2 = 0x11 # div[7:0]
+ACCEL_CONFIG      = 0x14  # bits2:1 FS_SEL, bit0 FCHOICE
+BASE_ODR_HZ       = 1125.0
+
+# Bank 3 (I2C master for the AK09916)
+BANK_3            = 0x30
+I2C_MST_CTRL      = 0x01  # bit4 P_NSR, bits3:0 clock (7 = 345.6 kHz)
+I2C_SLV0_ADDR     = 0x03  # bit7 = read
+I2C_SLV0_REG      = 0x04
+I2C_SLV0_CTRL     = 0x05  # bit7 EN, bits3:0 length
+I2C_SLV4_ADDR     = 0x13
+I2C_SLV4_REG      = 0x14
+I2C_SLV4_CTRL     = 0x15  # bit7 EN (one-shot)
+I2C_SLV4_DO       = 0x16
+I2C_SLV4_DI       = 0x17
+
+# AK09916 magnetometer behind the ICM-20948's I2C master
+AK09916_ADDR      = 0x0C
+AK_WIA2           = 0x01  # expect 0x09
+AK_ST1            = 0x10  # bit0 DRDY; ST1..ST2 is read as one 9-byte block
+AK_CNTL2          = 0x31  # mode
+AK_CNTL3          = 0x32  # bit0 SRST
+AK_WIA2_EXPECT    = 0x09
+AK_MODE_10HZ      = 0x02
+AK_MODE_20HZ      = 0x04
+AK_MODE_50HZ      = 0x06
+AK_MODE_100HZ     = 0x08
+AK_UT_PER_LSB     = 0.15
+AK_HOFL           = 0x08  # ST2 magnetic overflow
+
+# ACCEL_XOUT_H (0x2D) .. TEMP_OUT_L (0x3A) are contiguous: one 14-byte burst
+# gives accel, gyro and temp from the same sample instant.
+FRAME_REG         = ACCEL_XOUT_H
+FRAME_LEN         = 14
+FRAME             = struct.Struct(">7h")   # ax ay az gx gy gz temp
+
+# With the magnetometer enabled, the I2C master copies AK09916 ST1..ST2 into
+# EXT_SLV_SENS_DATA_00.., straight after TEMP_OUT_L, so the burst grows to 23
+# bytes. The AK09916 is little-endian and its Y/Z axes point opposite to the
+# accel/gyro axes.
+MAG_LEN           = 9
+FRAME_LEN_MAG     = FRAME_LEN + MAG_LEN
+MAG_PART          = struct.Struct("<B3hxB")   # st1 hx hy hz (tmps) st2
 
 WHO_AM_I_EXPECT   = 0xEA
 I2C_BUS           = 1
@@ -19,16 +84,72 @@ def to_int16(high, low):
     v = (high << 8) | low
     return v - 0x10000 if v & 0x8000 else v
 
+def temp_c_from_raw(raw):
+    # InvenSense 20xx family temp conversion (datasheet/guides use this form)
+    # T(°C) ≈ (raw / 333.87) + 21.0
+    return (raw / 333.87) + 21.0
+
+class IMUSample:
+    # Reusable record filled in place by ICM20948.read_all()
+    __slots__ = ("ax", "ay", "az", "gx", "gy", "gz", "temp_raw", "temp_c",
+                 "mx", "my", "mz", "mag_ok")
+
+    def __init__(self):
+        self.ax = self.ay = self.az = 0
+        self.gx = self.gy = self.gz = 0
+        self.temp_raw = 0
+        self.temp_c = 0.0
+        self.mx = self.my = self.mz = 0     # counts, body frame
+        self.mag_ok = False
+
+    @property
+    def accel(self):
+        return self.ax, self.ay, self.az
+
+    @property
+    def gyro(self):
+        return self.gx, self.gy, self.gz
+
+    @property
+    def mag(self):
+        return self.mx, self.my, self.mz
+
+    def __repr__(self):
+        return (f"IMUSample(accel={self.accel}, gyro={self.gyro}, "
+                f"temp_c={self.temp_c:.2f})")
+
+# Registers the chip changes by itself (self-clearing strobes); writes to
+# these are never elided by the register shadow
+VOLATILE_REGS = {
+    (BANK_0, PWR_MGMT_1),      # DEVICE_RESET self-clears
+    (BANK_0, FIFO_RST),
+    (BANK_3, I2C_SLV4_CTRL),   # EN clears when the one-shot transfer is done
+}
+
 class ICM20948:
-    def __init__(self, bus_num=I2C_BUS):
-        self.bus = SMBus(bus_num)
-        self.addr = self._find_addr()
-        self._select_bank(0x00)               # Bank 0
+    # bus: anything with the smbus2.SMBus methods used here (read_byte_data,
+    # write_byte_data, read_i2c_block_data, i2c_rdwr, close), e.g.
+    # icmSim.SimICM20948 to run without the rover. Defaults to SMBus(bus_num).
+    # A bus passed in is shared (imuMulti) and left open by close().
+    # addr: use the sensor at this address instead of the first one found.
+    def __init__(self, bus_num=I2C_BUS, bus=None, addr=None):
+        self.own_bus = bus is None
+        self.bus = SMBus(bus_num) if bus is None else bus
+        # Register shadow: last value written to / read from each (bank, reg),
+        # plus the currently selected bank (None = unknown)
+        self.bank = None
+        self.shadow = {}
+        self.reg_stats = {"writes": 0, "writes_elided": 0,
+                          "bank_switches": 0, "bank_switches_elided": 0}
+        self.addr = self._find_addr([addr] if addr is not None else POSSIBLE_ADDRS)
+        self.bank = BANK_0                     # _find_addr leaves Bank 0 selected
         self._wake_and_enable()
+        self.sample = IMUSample()
+        self.frame_len = FRAME_LEN
 
-    def _find_addr(self):
-        # Probe both typical addresses and verify WHO_AM_I
-        for a in POSSIBLE_ADDRS:
+    def _find_addr(self, addrs=POSSIBLE_ADDRS):
+        # Probe the candidate addresses and verify WHO_AM_I
+        for a in addrs:
             try:
                 self.bus.write_byte_data(a, REG_BANK_SEL, 0x00)  # Bank 0
                 who = self.bus.read_byte_data(a, WHO_AM_I)
@@ -36,21 +157,129 @@ class ICM20948:
                     return a
             except OSError:
                 continue
-        raise RuntimeError("ICM-20948 not found on 0x68/0x69 or WHO_AM_I mismatch.")
+        where = "/".join(f"0x{a:02X}" for a in addrs)
+        raise RuntimeError(f"ICM-20948 not found on {where} or WHO_AM_I mismatch.")
 
     def _select_bank(self, bank_val):
-        # 0x00 for Bank 0; other banks are 0x10,0x20,0x30 (not needed here)
-        self.bus.write_byte_data(self.addr, REG_BANK_SEL, bank_val & 0x30)
+        # 0x00 for Bank 0; other banks are 0x10,0x20,0x30. Skipped when the
+        # bank is already selected.
+        bank_val &= 0x30
+        if bank_val == self.bank:
+            self.reg_stats["bank_switches_elided"] += 1
+            return
+        self.bank = None                       # unknown until the write lands
+        self.bus.write_byte_data(self.addr, REG_BANK_SEL, bank_val)
+        self.bank = bank_val
+        self.reg_stats["bank_switches"] += 1
+
+    def write_reg(self, reg, val, bank=BANK_0, force=False):
+        # Skips the bus write when the shadow says the register already holds val
+        val &= 0xFF
+        key = (bank, reg)
+        if not force and key not in VOLATILE_REGS and self.shadow.get(key) == val:
+            self.reg_stats["writes_elided"] += 1
+            return
+        self._select_bank(bank)
+        self.shadow.pop(key, None)
+        self.bus.write_byte_data(self.addr, reg, val)
+        self.shadow[key] = val
+        self.reg_stats["writes"] += 1
+
+    def read_reg(self, reg, bank=BANK_0, cached=False):
+        # Reads through to the chip and refreshes the shadow; cached=True
+        # returns the shadowed value when there is one (config registers we own)
+        key = (bank, reg)
+        if cached and key in self.shadow:
+            return self.shadow[key]
+        self._select_bank(bank)
+        val = self.bus.read_byte_data(self.addr, reg)
+        self.shadow[key] = val
+        return val
+
+    def invalidate(self, reg=None, bank=None):
+        # Forget shadowed state after something outside this object touched the
+        # chip (reset, brown-out, another process): no args drops everything
+        # including the selected bank
+        if reg is None and bank is None:
+            self.shadow.clear()
+            self.bank = None
+            return
+        for key in [k for k in self.shadow
+                    if (bank is None or k[0] == bank) and (reg is None or k[1] == reg)]:
+            del self.shadow[key]
+
+    def read_block(self, reg, n):
+        # Bank 0 block read of any length; SMBus block reads stop at 32 bytes,
+        # so this is a plain I2C write-register + read with repeated start
+        self._select_bank(BANK_0)
+        wr = i2c_msg.write(self.addr, [reg])
+        rd = i2c_msg.read(self.addr, n)
+        self.bus.i2c_rdwr(wr, rd)
+        return bytes(rd)
+
+    def set_odr(self, hz):
+        # Same ODR for accel and gyro, DLPF on; returns the rate actually set
+        div = max(0, min(255, round(BASE_ODR_HZ / hz) - 1))
+        self.write_reg(GYRO_SMPLRT_DIV, div, BANK_2)
+        self.write_reg(GYRO_CONFIG_1, 0x01, BANK_2)       # ±250 dps, DLPF on
+        self.write_reg(ACCEL_SMPLRT_DIV_1, div >> 8, BANK_2)
+        self.write_reg(ACCEL_SMPLRT_DIV_2, div & 0xFF, BANK_2)
+        self.write_reg(ACCEL_CONFIG, 0x01, BANK_2)        # ±2 g, DLPF on
+        self._select_bank(BANK_0)
+        return BASE_ODR_HZ / (1 + div)
+
+    def _slv4(self, reg, val=None, timeout=0.1):
+        # One-shot transfer to the AK09916 through I2C_SLV4; returns the byte
+        # read when val is None
+        read = val is None
+        self.write_reg(I2C_SLV4_ADDR, AK09916_ADDR | (0x80 if read else 0x00), BANK_3)
+        self.write_reg(I2C_SLV4_REG, reg, BANK_3)
+        if not read:
+            self.write_reg(I2C_SLV4_DO, val, BANK_3)
+        self.write_reg(I2C_SLV4_CTRL, 0x80, BANK_3)
+        deadline = time.monotonic() + timeout
+        while not self.read_reg(I2C_MST_STATUS) & 0x40:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"AK09916 transfer to 0x{reg:02X} timed out")
+            time.sleep(0.001)
+        return self.read_reg(I2C_SLV4_DI, BANK_3) if read else None
+
+    def enable_mag(self, mode=AK_MODE_100HZ):
+        # Let the ICM-20948's I2C master poll the AK09916 every sample and
+        # append ST1..ST2 to the burst; read_raw_frame() then returns 23 bytes
+        self.write_reg(USER_CTRL, self.read_reg(USER_CTRL, cached=True) | 0x20)  # I2C_MST_EN
+        self.write_reg(I2C_MST_CTRL, 0x17, BANK_3)                   # 345.6 kHz, stop between reads
+        self._slv4(AK_CNTL3, 0x01)                                   # soft reset
+        time.sleep(0.010)
+        if self._slv4(AK_WIA2) != AK_WIA2_EXPECT:
+            raise RuntimeError("AK09916 not answering behind the ICM-20948 I2C master.")
+        self._slv4(AK_CNTL2, mode)
+        self.write_reg(I2C_SLV0_ADDR, AK09916_ADDR | 0x80, BANK_3)
+        self.write_reg(I2C_SLV0_REG, AK_ST1, BANK_3)
+        self.write_reg(I2C_SLV0_CTRL, 0x80 | MAG_LEN, BANK_3)       # reading ST2 re-arms DRDY
+        self._select_bank(BANK_0)
+        self.frame_len = FRAME_LEN_MAG
+
+    def disable_mag(self):
+        self.write_reg(I2C_SLV0_CTRL, 0x00, BANK_3)
+        self._slv4(AK_CNTL2, 0x00)                                   # power down
+        self.write_reg(USER_CTRL, self.read_reg(USER_CTRL, cached=True) & ~0x20)
+        self.frame_len = FRAME_LEN
 
     def _wake_and_enable(self):
         # Clear sleep, select best clock source (auto)
-        self.bus.write_byte_data(self.addr, PWR_MGMT_1, 0x01)  # CLKSEL=1, SLEEP=0
+        self.write_reg(PWR_MGMT_1, 0x01)  # CLKSEL=1, SLEEP=0
         time.sleep(0.010)
         # Enable accel+gyro on all axes (0x00 = all enabled)
-        self.bus.write_byte_data(self.addr, PWR_MGMT_2, 0x00)
+        self.write_reg(PWR_MGMT_2, 0x00)
         time.sleep(0.010)
 
+    def alive(self):
+        # False once the chip has reset (brown-out): it wakes up asleep
+        return self.read_reg(PWR_MGMT_1) == 0x01
+
     def read_accel(self):
+        self._select_bank(BANK_0)
         data = self.bus.read_i2c_block_data(self.addr, ACCEL_XOUT_H, 6)
         ax = to_int16(data[0], data[1])
         ay = to_int16(data[2], data[3])
@@ -58,6 +287,7 @@ class ICM20948:
         return ax, ay, az
 
     def read_gyro(self):
+        self._select_bank(BANK_0)
         data = self.bus.read_i2c_block_data(self.addr, GYRO_XOUT_H, 6)
         gx = to_int16(data[0], data[1])
         gy = to_int16(data[2], data[3])
@@ -65,32 +295,236 @@ class ICM20948:
         return gx, gy, gz
 
     def read_temp_c(self):
+        self._select_bank(BANK_0)
         th, tl = self.bus.read_i2c_block_data(self.addr, TEMP_OUT_H, 2)
-        raw = to_int16(th, tl)
-        # InvenSense 20xx family temp conversion (datasheet/guides use this form)
-        # T(°C) ≈ (raw / 333.87) + 21.0
-        return (raw / 333.87) + 21.0
+        return temp_c_from_raw(to_int16(th, tl))
+
+    def read_raw_frame(self):
+        # One bus transaction for accel+gyro+temp (+ magnetometer when
+        # enabled), bytes as on the wire
+        if self.bank != BANK_0:
+            self._select_bank(BANK_0)
+        return bytes(self.bus.read_i2c_block_data(self.addr, FRAME_REG, self.frame_len))
+
+    def read_all(self, out=None):
+        # Burst read decoded into a preallocated IMUSample (self.sample unless
+        # the caller passes its own), so callers don't build tuples per sample
+        s = self.sample if out is None else out
+        frame = self.read_raw_frame()
+        (s.ax, s.ay, s.az, s.gx, s.gy, s.gz,
+         s.temp_raw) = FRAME.unpack_from(frame)
+        s.temp_c = temp_c_from_raw(s.temp_raw)
+        if self.frame_len == FRAME_LEN_MAG:
+            st1, hx, hy, hz, st2 = MAG_PART.unpack_from(frame, FRAME_LEN)
+            s.mx, s.my, s.mz = hx, -hy, -hz
+            s.mag_ok = not st2 & AK_HOFL
+        return s
 
     def close(self):
+        if not self.own_bus:
+            return
         try:
             self.bus.close()
         except Exception:
             pass
 
+def format_row(row):
+    # Console line for one decoded sample (g, dps, °C[, µT])
+    ax, ay, az, gx, gy, gz, tc = row[:7]
+    line = (f"Accel: ({ax:+.3f}, {ay:+.3f}, {az:+.3f}) g  "
+            f"Gyro: ({gx:+.2f}, {gy:+.2f}, {gz:+.2f}) dps  Temp: {tc:.2f} °C")
+    if len(row) > 7:
+        mx, my, mz = row[7:]
+        line += f"  Mag: ({mx:+.1f}, {my:+.1f}, {mz:+.1f}) uT"
+    return line
+
 def main():
-    imu = ICM20948()
+    from sensorSink import open_sink, add_sink_args
+    ap = argparse.ArgumentParser(description="ICM-20948 reader")
+    ap.add_argument("--stream", type=float, metavar="ODR",
+                    help="stream accel+gyro through the FIFO at ODR Hz")
+    ap.add_argument("--drdy", type=float, metavar="ODR",
+                    help="read one sample per data-ready interrupt at ODR Hz; "
+                         "--out csv/bin records every sample with its edge time")
+    ap.add_argument("--record", metavar="PATH",
+                    help="record the FIFO stream (--stream ODR, default 1125 Hz) to PATH")
+    ap.add_argument("--mag", action="store_true",
+                    help="also read the AK09916 magnetometer in the same burst")
+    add_sink_args(ap, "imu.bin")
+    args = ap.parse_args()
+    if args.mag and (args.stream or args.record):
+        ap.error("the FIFO carries accel and gyro only; use --mag with the polled or --drdy modes")
+
+    from i2cDiscovery import address
+    imu = ICM20948(addr=address("icm20948"))   # None: probe 0x68/0x69
+    if args.mag:
+        imu.enable_mag()
+    if args.record:
+        from imuRecord import record
+        from imuDecode import Decoder
+        from imuCalib import load_into
+        dec = Decoder()
+        if load_into(dec, imu.addr):
+            print("Applied stored calibration.")
+        print(f"ICM-20948 at 0x{imu.addr:02X}, recording to {args.record}. Ctrl+C to stop.")
+        try:
+            n, overflows = record(imu, args.record, args.stream or BASE_ODR_HZ, decoder=dec)
+            print(f"{n} frames recorded, {overflows} FIFO overflows")
+        finally:
+            imu.close()
+        return
+
+    from i2cGuard import GuardedDevice
+    if args.stream:
+        from imuFifo import FifoStream
+        fifo = FifoStream(imu, args.stream)
+        # File sinks get every frame as raw int16 counts
+        sink = None if args.out == "console" else open_sink(
+            args.out, args.out_path, ("ax", "ay", "az", "gx", "gy", "gz"),
+            dtype="<i2" if args.out == "bin" else "<f8")
+        # A failed drain is retried; a lost IMU is re-opened with a fresh
+        # FIFO in the background, and the samples missed meanwhile are a gap
+        guard = GuardedDevice("icm20948", lambda: FifoStream(ICM20948(addr=imu.addr), args.stream),
+                              dev=fifo, probe=lambda f: f.imu.alive(),
+                              on_down=lambda reason: print(f"IMU lost ({reason}), re-initialising"),
+                              on_up=lambda f: print("IMU back, FIFO restarted"))
+        print(f"ICM-20948 at 0x{imu.addr:02X}, FIFO streaming at {fifo.odr:.1f} Hz. Ctrl+C to stop.")
+        try:
+            # Report once a second; printing every drain would cost more than the reads
+            n_frames = overflows = shown = 0
+            next_t, t_next = time.monotonic(), time.monotonic() + 1.0
+            while True:
+                drained = guard.call(FifoStream.drain)
+                if drained is not None:
+                    frames, overflowed = drained
+                    n_frames += len(frames)
+                    overflows += overflowed
+                    if sink is not None:
+                        sink.write_many(frames)
+                    if time.monotonic() >= t_next and len(frames):
+                        ax, ay, az, gx, gy, gz = frames[-1]
+                        print(f"{n_frames - shown:5} frames/s  overflows: {overflows}"
+                              f"  re-inits: {guard.stats.recoveries}"
+                              f"  Accel: ({ax}, {ay}, {az})  Gyro: ({gx}, {gy}, {gz})")
+                        shown, t_next = n_frames, t_next + 1.0
+                next_t += fifo.period
+                delay = next_t - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_t = time.monotonic()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if sink is not None:
+                sink.close()
+            guard.close()              # stops the FIFO and closes the IMU
+        return
+
+    if args.drdy:
+        from imuDrdy import DataReadyReader
+
+        def reopen_drdy():
+            dev = ICM20948(addr=imu.addr)
+            if args.mag:
+                dev.enable_mag()
+            drdy.rearm(dev)            # a reset chip has lost its INT setup
+            return dev
+        # Reads go through the guard; when the edges stop (a reset chip has
+        # no INT configured) the main loop polls once so the guard notices
+        guard = GuardedDevice("icm20948", reopen_drdy, dev=imu, probe=ICM20948.alive,
+                              on_down=lambda reason: (drdy.rearm(None),
+                                                      print(f"IMU lost ({reason}), re-initialising")),
+                              on_up=lambda dev: print("IMU back"))
+        from imuDecode import Decoder
+        dec = Decoder(frame_bytes=imu.frame_len)
+        on_sample = sink = None
+        if args.out != "console":
+            # File sinks get every sample, calibrated, stamped with its edge
+            import numpy as np
+            from imuCalib import load_into
+            if load_into(dec, imu.addr):
+                print("Applied stored calibration.")
+            scaled = dec.decode(bytes(imu.frame_len))
+            fields = ("stamp_ns", "ax", "ay", "az", "gx", "gy", "gz", "temp") + \
+                     (("mx", "my", "mz") if args.mag else ())
+            row = np.empty(len(fields), dtype=np.float64)
+            sink = open_sink(args.out, args.out_path, fields, dtype="<f8")
+
+            def on_sample(stamp, frame):
+                row[0] = stamp
+                row[1:8] = dec.decode(frame, out=scaled)[0]
+                if args.mag:
+                    row[8:] = dec.decode_mag(frame)[0]
+                sink.write(row)
+                drdy.latest = (stamp, frame)
+        drdy = DataReadyReader(imu, args.drdy, on_sample=on_sample,
+                               read=lambda: guard.call(ICM20948.read_raw_frame))
+        print(f"ICM-20948 at 0x{imu.addr:02X}, data-ready at {drdy.odr:.1f} Hz. Ctrl+C to stop.")
+        drdy.start()
+        try:
+            shown = 0
+            while True:
+                time.sleep(1.0)
+                if drdy.samples == shown:
+                    guard.call(ICM20948.read_raw_frame)
+                    print(f"no samples  errors: {guard.stats.errors}  IMU {'up' if guard.up else 'down'}")
+                elif drdy.latest:
+                    stamp, frame = drdy.latest
+                    ax, ay, az, gx, gy, gz, _ = FRAME.unpack_from(frame)
+                    line = (f"{drdy.samples - shown:5} samples/s  missed: {drdy.missed}"
+                            f"  @{stamp} ns  Accel: ({ax}, {ay}, {az})  Gyro: ({gx}, {gy}, {gz})")
+                    if args.mag:
+                        mx, my, mz = dec.decode_mag(frame)[0]
+                        line += f"  Mag: ({mx:+.1f}, {my:+.1f}, {mz:+.1f}) uT"
+                    print(line)
+                    shown = drdy.samples
+        except KeyboardInterrupt:
+            pass
+        finally:
+            drdy.stop()
+            if sink is not None:
+                sink.close()
+            guard.close()
+        return
+
+    import numpy as np
+    from imuDecode import Decoder
+    from imuCalib import load_into
+    dec = Decoder(frame_bytes=imu.frame_len)
+    if load_into(dec, imu.addr):
+        print("Applied stored calibration.")
+    scaled = dec.decode(bytes(imu.frame_len))   # preallocated (1, 7) float32 row
+    fields = ("ax", "ay", "az", "gx", "gy", "gz", "temp") + (("mx", "my", "mz") if args.mag else ())
+    row = np.empty(len(fields), dtype=np.float32)
+    sink = open_sink(args.out, args.out_path, fields,
+                     **({"fmt": format_row} if args.out == "console" else {}))
+
+    def reopen():
+        dev = ICM20948(addr=imu.addr)
+        if args.mag:
+            dev.enable_mag()
+        return dev
+    # Bus errors are retried; a lost or reset IMU is re-initialised in the
+    # background while the loop keeps running
+    guard = GuardedDevice("icm20948", reopen, dev=imu, probe=ICM20948.alive,
+                          on_down=lambda reason: print(f"IMU lost ({reason}), re-initialising"),
+                          on_up=lambda dev: print("IMU back"))
     print(f"ICM-20948 found at I2C 0x{imu.addr:02X}, reading every 2s. Ctrl+C to stop.")
     try:
         while True:
-            ax, ay, az = imu.read_accel()
-            gx, gy, gz = imu.read_gyro()
-            tc = imu.read_temp_c()
-            print(f"Accel: ({ax}, {ay}, {az})  Gyro: ({gx}, {gy}, {gz})  Temp: {tc:.2f} °C")
+            frame = guard.call(ICM20948.read_raw_frame)
+            if frame is not None:
+                row[:7] = dec.decode(frame, out=scaled)[0]
+                if args.mag:
+                    row[7:] = dec.decode_mag(frame)[0]
+                sink.write(row)
             time.sleep(2.0)
     except KeyboardInterrupt:
         pass
     finally:
-        imu.close()
+        sink.close()
+        guard.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# rgbCalib.py — TCS34725 colour calibration: black/white references + 3x3 matrix
+#
+#   python3 rgbCalib.py black            sensor covered (or over matte black)
+#   python3 rgbCalib.py white            over the white reference card
+#   python3 rgbCalib.py patch 200 30 40  over a patch of known 8-bit colour
+#   python3 rgbCalib.py fit              3x3 matrix from the stored patches
+#   python3 rgbCalib.py show
+#   python3 rgbCalib.py apply run.npy    correct saved (N, 4) r g b c counts
+#
+# Readings are first divided by the sensitivity (integration ms x gain), so a
+# calibration holds across auto-exposure changes. Then
+#     linear = ((rgb - black) / (white - black)) @ M.T + offset
+# white balances the channels, black removes the LED leakage / dark level,
+# and M with offset corrects the filters' cross-talk; with no patches M is
+# the identity. All three fold into one affine map A, b, so correcting a
+# block of N samples is a single (N, 3) @ (3, 3) matmul plus an add into a
+# caller-owned buffer. The file is 80 bytes and loads with one unpack.
+
+import os
+import sys
+import time
+import struct
+import argparse
+
+import numpy as np
+
+CAL_DIR     = os.path.expanduser("~/.config/rover")
+CAL_MAGIC   = b"RGBC"
+CAL_VERSION = 1
+# magic, version, i2c addr, pad, then matrix[9], offset[3], black[3], white[3] (float32)
+CAL_HEADER  = struct.Struct("<4sBBxx")
+CAL_BODY    = struct.Struct("<9f3f3f3f")
+GAMMA       = 2.2
+
+class ColorCalibration:
+    def __init__(self, addr, black=None, white=None, matrix=None, offset=None):
+        self.addr = addr
+        self.black = np.zeros(3, dtype=np.float32) if black is None else \
+            np.asarray(black, dtype=np.float32)
+        self.white = np.ones(3, dtype=np.float32) if white is None else \
+            np.asarray(white, dtype=np.float32)
+        self.matrix = np.eye(3, dtype=np.float32) if matrix is None else \
+            np.asarray(matrix, dtype=np.float32).reshape(3, 3)
+        self.offset = np.zeros(3, dtype=np.float32) if offset is None else \
+            np.asarray(offset, dtype=np.float32)
+
+    # ---- the folded affine map ----
+    @property
+    def A(self):
+        # linear = flux @ A.T + b
+        return (self.matrix / (self.white - self.black)).astype(np.float32)
+
+    @property
+    def b(self):
+        return (self.offset - self.A @ self.black).astype(np.float32)
+
+    def pack(self):
+        return CAL_HEADER.pack(CAL_MAGIC, CAL_VERSION, self.addr) + CAL_BODY.pack(
+            *self.matrix.ravel().tolist(), *self.offset.tolist(),
+            *self.black.tolist(), *self.white.tolist())
+
+    @classmethod
+    def unpack(cls, data):
+        magic, version, addr = CAL_HEADER.unpack_from(data)
+        if magic != CAL_MAGIC or version != CAL_VERSION:
+            raise ValueError(f"not a colour calibration v{CAL_VERSION} file")
+        v = CAL_BODY.unpack_from(data, CAL_HEADER.size)
+        return cls(addr, black=v[12:15], white=v[15:18], matrix=v[:9], offset=v[9:12])
+
+    def __repr__(self):
+        black = [round(float(x), 3) for x in self.black]
+        white = [round(float(x), 3) for x in self.white]
+        m = [[round(float(x), 3) for x in row] for row in self.matrix]
+        return (f"ColorCalibration(addr=0x{self.addr:02X}, black={black}, "
+                f"white={white}, matrix={m})")
+
+class ColorCorrector:
+    # Applies a ColorCalibration to blocks of samples, live or recorded
+    #   cc = ColorCorrector(cal)
+    #   lin = cc.apply(raw, sens, out=buf)   # raw (N, >=3) r g b [c] counts
+    def __init__(self, cal):
+        self.A_T = np.ascontiguousarray(cal.A.T)
+        self.b = cal.b
+
+    def apply(self, raw, sens=1.0, out=None):
+        # sens: integration ms x gain, scalar or (N,) for mixed settings.
+        # Returns (N, 3) float32 linear RGB, 0..1 between black and white
+        raw = np.asarray(raw)
+        n = len(raw)
+        if out is None:
+            out = np.empty((n, 3), dtype=np.float32)
+        dst = out[:n]
+        flux = raw[:, :3] / (np.asarray(sens, dtype=np.float32).reshape(-1, 1)
+                             if np.ndim(sens) else np.float32(sens))
+        np.matmul(flux, self.A_T, out=dst)
+        np.add(dst, self.b, out=dst)
+        return dst
+
+    def to_bytes(self, linear, out=None):
+        # (N, 3) linear -> (N, 3) uint8 with display gamma
+        if out is None:
+            out = np.empty(linear.shape, dtype=np.uint8)
+        v = np.clip(linear, 0.0, 1.0) ** (1.0 / GAMMA) * 255.0 + 0.5
+        out[...] = v
+        return out
+
+    def sample_bytes(self, s):
+        # One rgbDriver.ColorSample -> (r, g, b) calibrated bytes
+        lin = self.apply(np.array([s.raw]), s.integration_ms * s.gain)
+        return tuple(int(x) for x in self.to_bytes(lin)[0])
+
+def fit_matrix(cal, measured, target):
+    # Least-squares M, offset mapping white/black-normalised patch readings
+    # (N, 3 flux) onto target linear colours (N, 3, 0..1); N >= 4 patches
+    norm = (np.asarray(measured, np.float64) - cal.black) / (cal.white - cal.black)
+    X = np.hstack((norm, np.ones((len(norm), 1))))
+    coef, *_ = np.linalg.lstsq(X, np.asarray(target, np.float64), rcond=None)
+    cal.matrix = coef[:3].T.astype(np.float32)
+    cal.offset = coef[3].astype(np.float32)
+    return cal
+
+def bytes_to_linear(rgb8):
+    return (np.asarray(rgb8, dtype=np.float64) / 255.0) ** GAMMA
+
+# -------- storage (same layout as imuCalib) --------
+def cal_path(addr, cal_dir=CAL_DIR):
+    return os.path.join(cal_dir, f"rgb_0x{addr:02X}.cal")
+
+def patches_path(addr, cal_dir=CAL_DIR):
+    return os.path.join(cal_dir, f"rgb_0x{addr:02X}_patches.npy")
+
+def save(cal, cal_dir=CAL_DIR):
+    os.makedirs(cal_dir, exist_ok=True)
+    path = cal_path(cal.addr, cal_dir)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(cal.pack())
+    os.replace(tmp, path)
+    return path
+
+def load(addr, cal_dir=CAL_DIR):
+    # -> ColorCalibration, or None when this sensor has not been calibrated.
+    # A truncated, corrupt, old-format or other sensor's file is warned about
+    # and ignored (uncorrected colour), never fatal at startup
+    path = cal_path(addr, cal_dir)
+    try:
+        with open(path, "rb") as f:
+            cal = ColorCalibration.unpack(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, struct.error) as e:
+        print(f"warning: ignoring {path}: {e}", file=sys.stderr)
+        return None
+    if cal.addr != addr:
+        print(f"warning: ignoring {path}: calibration is for 0x{cal.addr:02X}, "
+              f"not 0x{addr:02X}", file=sys.stderr)
+        return None
+    return cal
+
+# -------- capture --------
+def capture(sampler, seconds=2.0):
+    # -> mean (3,) flux (counts per ms x gain) over `seconds`
+    rows = []
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        s = sampler.read(timeout=1.0)
+        if s is not None:
+            rows.append(np.array(s.raw[:3], dtype=np.float64) / (s.integration_ms * s.gain))
+    if not rows:
+        raise RuntimeError("no samples captured")
+    return np.mean(rows, axis=0)
+
+def main():
+    ap = argparse.ArgumentParser(description="TCS34725 colour calibration")
+    sub = ap.add_subparsers(dest="command", required=True)
+    for name in ("black", "white", "fit", "show"):
+        p = sub.add_parser(name)
+        p.add_argument("--seconds", type=float, default=2.0)
+    p = sub.add_parser("patch")
+    p.add_argument("rgb", type=int, nargs=3, metavar=("R", "G", "B"))
+    p.add_argument("--seconds", type=float, default=2.0)
+    p = sub.add_parser("apply")
+    p.add_argument("path", help="(N, 4) r g b c counts, .npy")
+    p.add_argument("--sens", type=float, default=100.0 * 4,
+                   help="integration ms x gain the counts were taken with")
+    ap.add_argument("--addr", type=lambda s: int(s, 0), default=None)
+    ap.add_argument("--dir", default=CAL_DIR)
+    args = ap.parse_args()
+
+    from i2cDiscovery import address
+    addr = args.addr if args.addr is not None else address("tcs34725", 0x29)
+    t0 = time.perf_counter()
+    cal = load(addr, args.dir)
+    print(f"loaded in {(time.perf_counter() - t0) * 1e3:.2f} ms: {cal}")
+    if args.command == "show":
+        return
+    cal = cal or ColorCalibration(addr)
+    if args.command == "apply":
+        raw = np.load(args.path)
+        t0 = time.perf_counter()
+        lin = ColorCorrector(cal).apply(raw, args.sens)
+        dt = time.perf_counter() - t0
+        out = os.path.splitext(args.path)[0] + "_cal.npy"
+        np.save(out, lin)
+        print(f"{len(raw)} samples in {dt * 1e3:.2f} ms -> {out}")
+        return
+    if args.command == "fit":
+        patches = np.load(patches_path(addr, args.dir))
+        if len(patches) < 4:
+            raise SystemExit(f"need at least 4 patches, have {len(patches)}")
+        fit_matrix(cal, patches[:, :3], bytes_to_linear(patches[:, 3:]))
+        print(f"saved {save(cal, args.dir)}: {cal}")
+        return
+
+    from rgbDriver import TCS34725
+    from rgbSync import ColorSampler
+    sensor = TCS34725(addr=addr)
+    sampler = ColorSampler(sensor)
+    try:
+        input("Position the sensor, then press Enter...")
+        flux = capture(sampler, args.seconds)
+        if args.command == "black":
+            cal.black = flux.astype(np.float32)
+        elif args.command == "white":
+            cal.white = flux.astype(np.float32)
+        else:
+            path = patches_path(addr, args.dir)
+            row = np.concatenate((flux, args.rgb))[None]
+            patches = np.concatenate((np.load(path), row)) if os.path.exists(path) else row
+            os.makedirs(args.dir, exist_ok=True)
+            np.save(path, patches)
+            print(f"{path}: {len(patches)} patches")
+            return
+        print(f"saved {save(cal, args.dir)}: {cal}")
+    finally:
+        sampler.close()
+        sensor.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# rgbClassify.py — colour classification by precomputed lookup table
+#
+#   python3 rgbClassify.py capture track --seconds 5   record training samples
+#   python3 rgbClassify.py capture marker
+#   python3 rgbClassify.py capture floor
+#   python3 rgbClassify.py build                       fit and save the LUT
+#   python3 rgbClassify.py run                         print label changes
+#   python3 rgbClassify.py bench                       per-sample cost
+#
+#   clf = ColorClassifier.load()
+#   label = clf.classify(r, g, b, c)         # one table index
+#   labels = clf.classify_batch(raw)         # (N, 4) r g b c -> (N,) uint8
+#
+# Features are the chromaticity r/(r+g+b), g/(r+g+b) (independent of gain,
+# integration time and distance) and log2 of the clear count (so black tape
+# and white floor separate even when both are grey). Each is quantised into
+# LUT_BINS bins; every cell of the table holds the label of the nearest class
+# centre (distance scaled by each class's spread), or UNKNOWN when no class is
+# within REJECT standard deviations. All of that happens once, offline;
+# classifying is a few integer ops and one array index.
+
+import os
+import math
+import time
+import argparse
+from collections import deque
+
+import numpy as np
+
+CAL_DIR   = os.path.expanduser("~/.config/rover")
+LUT_PATH  = os.path.join(CAL_DIR, "color_lut.npz")
+TRAIN_DIR = os.path.join(CAL_DIR, "color_train")
+
+UNKNOWN   = 0
+LUT_BINS  = (32, 32, 16)        # r chroma, g chroma, log2 clear
+LOG_C_MAX = 16.0                # clear is 16 bit
+REJECT    = 4.0                 # max scaled distance to a class centre
+MIN_STD   = (0.01, 0.01, 0.02)  # floor on each class's spread (about a bin; 1/3 octave of clear)
+
+def features(raw):
+    # (N, 4) r g b c counts -> (N, 3) float features in [0, 1]
+    raw = np.asarray(raw, dtype=np.float64)
+    rgb = raw[:, :3].sum(axis=1)
+    rgb[rgb == 0] = 1.0
+    out = np.empty((len(raw), 3))
+    out[:, 0] = raw[:, 0] / rgb
+    out[:, 1] = raw[:, 1] / rgb
+    out[:, 2] = np.log2(np.maximum(raw[:, 3], 1.0)) / LOG_C_MAX
+    return out
+
+def build_lut(samples, bins=LUT_BINS, reject=REJECT):
+    # samples: {label name: (N, 4) raw} -> (lut uint8, names). Label i+1 is
+    # names[i]; 0 is UNKNOWN
+    names = sorted(samples)
+    means, stds = [], []
+    for name in names:
+        f = features(samples[name])
+        means.append(f.mean(axis=0))
+        stds.append(np.maximum(f.std(axis=0), MIN_STD))
+    means, stds = np.array(means), np.array(stds)
+    # Centres of every cell, as features: (cells, 3)
+    axes = [(np.arange(n) + 0.5) / n for n in bins]
+    grid = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, 3)
+    dist = np.sqrt((((grid[:, None, :] - means[None]) / stds[None]) ** 2).sum(axis=2))
+    best = dist.argmin(axis=1)
+    lut = (best + 1).astype(np.uint8)
+    lut[dist[np.arange(len(grid)), best] > reject] = UNKNOWN
+    return lut.reshape(bins), names
+
+class ColorClassifier:
+    def __init__(self, lut, names):
+        self.lut = lut
+        self.names = ["unknown"] + list(names)
+        self.bins = lut.shape
+        # Quantisation factors: chroma bin = r * bins // (r + g + b)
+        self.nr, self.ng, self.nc = self.bins
+        self.c_scale = self.nc / LOG_C_MAX
+
+    @classmethod
+    def load(cls, path=LUT_PATH):
+        with np.load(path) as z:
+            return cls(z["lut"], [str(n) for n in z["names"]])
+
+    def save(self, path=LUT_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, lut=self.lut, names=np.array(self.names[1:]))
+        os.replace(tmp, path)
+        return path
+
+    def classify(self, r, g, b, c):
+        # One sample -> label index (self.names[label] for its name)
+        s = r + g + b or 1
+        qr = min(r * self.nr // s, self.nr - 1)
+        qg = min(g * self.ng // s, self.ng - 1)
+        qc = min(int(math.log2(c) * self.c_scale), self.nc - 1) if c else 0
+        return self.lut[qr, qg, qc]
+
+    def classify_batch(self, raw):
+        # (N, 4) integer r g b c -> (N,) uint8 labels
+        raw = np.asarray(raw, dtype=np.int64)
+        s = raw[:, :3].sum(axis=1)
+        s[s == 0] = 1
+        qr = np.minimum(raw[:, 0] * self.nr // s, self.nr - 1)
+        qg = np.minimum(raw[:, 1] * self.ng // s, self.ng - 1)
+        # Same bins as features()/build_lut for any number of clear bins
+        lc = np.log2(np.maximum(raw[:, 3], 1))
+        qc = np.minimum((lc * self.c_scale).astype(np.int64), self.nc - 1)
+        return self.lut[qr, qg, qc]
+
+class LabelEvents:
+    # Debounced label changes for the control FSM. feed() returns the new
+    # label when one has held for `hold` consecutive samples, else None; the
+    # same (stamp, label) also goes to on_change and the events deque.
+    def __init__(self, names, hold=3, on_change=None, maxlen=64):
+        self.names = names
+        self.hold = hold
+        self.on_change = on_change
+        self.events = deque(maxlen=maxlen)
+        self.label = None            # last emitted
+        self.candidate = None
+        self.run = 0
+
+    def feed(self, label, stamp=None):
+        if label == self.candidate:
+            self.run += 1
+        else:
+            self.candidate, self.run = label, 1
+        if self.run != self.hold or label == self.label:
+            return None
+        self.label = label
+        event = (stamp, label)
+        self.events.append(event)
+        if self.on_change is not None:
+            self.on_change(*event)
+        return label
+
+# -------- offline / CLI --------
+def train_path(label, train_dir=TRAIN_DIR):
+    return os.path.join(train_dir, f"{label}.npy")
+
+def capture(sampler, seconds):
+    rows = []
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        s = sampler.read(timeout=1.0)
+        if s is not None:
+            rows.append(s.raw)
+    return np.array(rows, dtype=np.int64).reshape(-1, 4)
+
+def load_training(train_dir=TRAIN_DIR):
+    out = {}
+    for fn in sorted(os.listdir(train_dir)):
+        if fn.endswith(".npy"):
+            out[fn[:-4]] = np.load(os.path.join(train_dir, fn))
+    return out
+
+def benchmark(clf, n=100000, seed=0):
+    rng = np.random.default_rng(seed)
+    raw = rng.integers(0, 20000, (n, 4))
+    rows = raw[:10000].tolist()
+    t0 = time.perf_counter()
+    for r, g, b, c in rows:
+        clf.classify(r, g, b, c)
+    per_sample = (time.perf_counter() - t0) / len(rows)
+    t0 = time.perf_counter()
+    clf.classify_batch(raw)
+    per_batch = (time.perf_counter() - t0) / n
+    return per_sample, per_batch
+
+def main():
+    ap = argparse.ArgumentParser(description="Colour classification LUT")
+    sub = ap.add_subparsers(dest="command", required=True)
+    c = sub.add_parser("capture")
+    c.add_argument("label")
+    c.add_argument("--seconds", type=float, default=5.0)
+    sub.add_parser("build")
+    sub.add_parser("run")
+    sub.add_parser("bench")
+    args = ap.parse_args()
+
+    if args.command == "build":
+        samples = load_training()
+        lut, names = build_lut(samples)
+        path = ColorClassifier(lut, names).save()
+        counts = np.bincount(lut.ravel(), minlength=len(names) + 1)
+        print(f"saved {path}: " + ", ".join(f"{n} {k} cells" for n, k in
+                                             zip(["unknown"] + names, counts)))
+        return
+    if args.command == "bench":
+        try:
+            clf = ColorClassifier.load()
+        except FileNotFoundError:
+            # No trained table yet: time a synthetic one of the same shape
+            rng = np.random.default_rng(0)
+            clf = ColorClassifier(rng.integers(0, 4, LUT_BINS).astype(np.uint8),
+                                  ["track", "marker", "floor"])
+        per_sample, per_batch = benchmark(clf)
+        print(f"classify(): {per_sample * 1e9:7.0f} ns/sample   "
+              f"classify_batch(): {per_batch * 1e9:5.0f} ns/sample")
+        return
+
+    from rgbDriver import TCS34725
+    from rgbSync import ColorSampler
+    from i2cDiscovery import address
+    sensor = TCS34725(addr=address("tcs34725", 0x29), integration_ms=24)
+    sampler = ColorSampler(sensor)
+    try:
+        if args.command == "capture":
+            input(f"Put the sensor over '{args.label}' and press Enter...")
+            rows = capture(sampler, args.seconds)
+            os.makedirs(TRAIN_DIR, exist_ok=True)
+            path = train_path(args.label)
+            if os.path.exists(path):
+                rows = np.concatenate((np.load(path), rows))
+            np.save(path, rows)
+            print(f"{path}: {len(rows)} samples")
+            return
+        clf = ColorClassifier.load()
+        events = LabelEvents(clf.names, on_change=lambda stamp, label:
+                             print(f"@{stamp} ns  -> {clf.names[label]}"))
+        print("Press Ctrl+C to stop.")
+        while True:
+            s = sampler.read()
+            events.feed(clf.classify(s.r, s.g, s.b, s.c), s.stamp)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sampler.close()
+        sensor.close()
+
+if __name__ == "__main__":
+    main()
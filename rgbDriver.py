@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# rgbDriver.py — TCS34725 colour sensor over smbus2, one block read per sample
+#
+#   sensor = TCS34725(integration_ms=100, gain=4)
+#   s = sensor.read_all()      # ColorSample: r g b c, lux, ct (K or None), rgb bytes
+#
+# CDATA, RDATA, GDATA, BDATA are consecutive little-endian words at 0x14..0x1B,
+# read with one 8-byte auto-increment transaction; the chip latches all four
+# at the end of an integration cycle, so they always belong together. Lux and
+# colour temperature use the DN40 open-loop method (ams application note
+# DN40, the same constants adafruit_tcs34725 uses) and the 8-bit RGB is
+# the channel/clear ratio with a 2.5 gamma, all computed from that one raw
+# sample instead of re-reading the sensor for every derived value.
+
+import time
+import struct
+import argparse
+from smbus2 import SMBus
+
+I2C_BUS       = 1
+TCS34725_ADDR = 0x29
+
+# Command byte: bit7 CMD, bits6:5 type (01 = auto-increment, 11 = special)
+CMD           = 0x80
+CMD_AUTO_INC  = 0xA0
+CMD_CLEAR_INT = 0xE6      # special function: clear the RGBC interrupt
+
+ENABLE   = 0x00  # bit0 PON, bit1 AEN, bit3 WEN, bit4 AIEN
+ATIME    = 0x01  # integration time = (256 - ATIME) * 2.4 ms
+WTIME    = 0x03
+AILTL    = 0x04  # clear-channel low threshold (16 bit)
+AIHTL    = 0x06  # clear-channel high threshold (16 bit)
+PERS     = 0x0C  # interrupt persistence
+CONFIG   = 0x0D  # bit1 WLONG
+CONTROL  = 0x0F  # AGAIN bits1:0
+ID       = 0x12  # 0x44 (TCS34725) or 0x4D (TCS34727)
+STATUS   = 0x13  # bit0 AVALID, bit4 AINT
+CDATAL   = 0x14  # CDATA, RDATA, GDATA, BDATA: 4 x uint16 LE
+
+ENABLE_PON  = 0x01
+ENABLE_AEN  = 0x02
+ENABLE_AIEN = 0x10
+STATUS_AVALID = 0x01
+STATUS_AINT   = 0x10
+PERS_EVERY_CYCLE = 0x00   # AINT on every completed integration
+# PERS value n: AINT after PERS_CYCLES[n] consecutive out-of-band integrations
+PERS_CYCLES = (0, 1, 2, 3, 5, 10, 15, 20, 25, 30, 35, 40, 45, 50, 55, 60)
+
+ID_EXPECT   = (0x44, 0x4D)
+GAINS       = (1, 4, 16, 60)       # CONTROL AGAIN 0..3
+ATIME_STEP_MS = 2.4
+RGBC        = struct.Struct("<4H")  # c, r, g, b
+RGBC_LEN    = 8
+STATUS_RGBC = struct.Struct("<B4H") # STATUS then c, r, g, b: one read from 0x13
+
+# DN40 coefficients
+DN40_R, DN40_G, DN40_B = 0.136, 1.000, -0.444
+DN40_GA     = 1.0           # glass attenuation
+DN40_DF     = 310.0         # device factor
+DN40_CT     = 3810.0
+DN40_CT_OFS = 1391.0
+GAMMA       = 2.5
+
+def atime_for(integration_ms):
+    # ATIME register value for the nearest integration time (2.4 .. 614.4 ms)
+    cycles = max(1, min(256, round(integration_ms / ATIME_STEP_MS)))
+    return 256 - cycles
+
+def saturation(atime):
+    # Highest clear count this integration time can report; below 150 ms
+    # the ripple of the ADC lowers the usable ceiling by a quarter (DN40)
+    cycles = 256 - atime
+    sat = 65535 if cycles > 63 else 1024 * cycles
+    if cycles * ATIME_STEP_MS < 150:
+        sat -= sat // 4
+    return sat
+
+def lux_cct(r, g, b, c, integration_ms, gain, sat=65535):
+    # -> (lux, cct Kelvin or None); (None, None) when the clear channel saturates
+    if c >= sat:
+        return None, None
+    ir = (r + g + b - c) / 2 if r + g + b > c else 0.0
+    r2, g2, b2 = r - ir, g - ir, b - ir
+    cpl = (integration_ms * gain) / (DN40_GA * DN40_DF)
+    lux = (DN40_R * r2 + DN40_G * g2 + DN40_B * b2) / cpl
+    cct = DN40_CT * b2 / r2 + DN40_CT_OFS if r2 > 0 else None
+    return lux, cct
+
+def pers_for(cycles):
+    # PERS value for at least `cycles` consecutive out-of-band integrations
+    for n, k in enumerate(PERS_CYCLES):
+        if k >= cycles:
+            return n
+    return len(PERS_CYCLES) - 1
+
+def rgb_bytes(r, g, b, c):
+    # 8-bit gamma-corrected colour from the channel/clear ratios
+    if c == 0:
+        return 0, 0, 0
+    return tuple(min(255, int((int(v / c * 256) / 255) ** GAMMA * 255)) for v in (r, g, b))
+
+class ColorSample:
+    # Reusable record filled in place by TCS34725.read_all()
+    __slots__ = ("r", "g", "b", "c", "lux", "ct", "rgb", "stamp", "integration_ms", "gain")
+
+    def __init__(self):
+        self.r = self.g = self.b = self.c = 0
+        self.lux = None
+        self.ct = None
+        self.rgb = (0, 0, 0)
+        self.stamp = 0           # monotonic ns: end of the integration (or the read)
+        self.integration_ms = 0.0
+        self.gain = 1
+
+    @property
+    def start(self):
+        # monotonic ns when the integration began
+        return self.stamp - int(self.integration_ms * 1e6)
+
+    @property
+    def raw(self):
+        return self.r, self.g, self.b, self.c
+
+    def __repr__(self):
+        return (f"ColorSample(raw={self.raw}, lux={self.lux}, ct={self.ct}, "
+                f"rgb={self.rgb})")
+
+class TCS34725:
+    def __init__(self, bus=None, addr=TCS34725_ADDR, integration_ms=100.0, gain=4):
+        self.own_bus = bus is None
+        self.bus = SMBus(I2C_BUS) if bus is None else bus
+        self.addr = addr
+        chip_id = self.read_reg(ID)
+        if chip_id not in ID_EXPECT:
+            raise RuntimeError(f"TCS34725 not found at 0x{addr:02X} (ID 0x{chip_id:02X})")
+        self.atime = None
+        self.again = None
+        self.set_integration_ms(integration_ms)
+        self.set_gain(gain)
+        self.write_reg(ENABLE, ENABLE_PON)
+        time.sleep(0.003)                      # 2.4 ms warm-up before AEN
+        self.write_reg(ENABLE, ENABLE_PON | ENABLE_AEN)
+        self.sample = ColorSample()
+
+    def read_reg(self, reg):
+        return self.bus.read_byte_data(self.addr, CMD | reg)
+
+    def write_reg(self, reg, val):
+        self.bus.write_byte_data(self.addr, CMD | reg, val & 0xFF)
+
+    def alive(self):
+        # False once the chip has reset (brown-out): it comes back powered down
+        return self.read_reg(ENABLE) & (ENABLE_PON | ENABLE_AEN) == ENABLE_PON | ENABLE_AEN
+
+    # ---- configuration ----
+    @property
+    def integration_ms(self):
+        return (256 - self.atime) * ATIME_STEP_MS
+
+    @property
+    def gain(self):
+        return GAINS[self.again]
+
+    @property
+    def saturation(self):
+        return saturation(self.atime)
+
+    def set_integration_ms(self, ms):
+        # Returns the integration time actually configured
+        self.atime = atime_for(ms)
+        self.write_reg(ATIME, self.atime)
+        return self.integration_ms
+
+    def set_gain(self, gain):
+        if gain not in GAINS:
+            raise ValueError(f"gain must be one of {GAINS}")
+        self.again = GAINS.index(gain)
+        self.write_reg(CONTROL, self.again)
+        return gain
+
+    # ---- sampling ----
+    def read_raw(self):
+        # One 8-byte transaction -> (r, g, b, c)
+        c, r, g, b = RGBC.unpack(bytes(self.bus.read_i2c_block_data(
+            self.addr, CMD_AUTO_INC | CDATAL, RGBC_LEN)))
+        return r, g, b, c
+
+    def read_status_raw(self):
+        # STATUS and the four channels in one 9-byte transaction ->
+        # (status, r, g, b, c); used to poll for a completed integration
+        status, c, r, g, b = STATUS_RGBC.unpack(bytes(self.bus.read_i2c_block_data(
+            self.addr, CMD_AUTO_INC | STATUS, STATUS_RGBC.size)))
+        return status, r, g, b, c
+
+    def fill(self, s, r, g, b, c, stamp):
+        # Derive lux, CCT and RGB bytes for one raw reading into s
+        s.r, s.g, s.b, s.c = r, g, b, c
+        s.stamp = stamp
+        s.integration_ms = self.integration_ms
+        s.gain = self.gain
+        s.lux, s.ct = lux_cct(r, g, b, c, s.integration_ms, s.gain, self.saturation)
+        s.rgb = rgb_bytes(r, g, b, c)
+        return s
+
+    def read_all(self, out=None):
+        # Raw channels plus lux, CCT and RGB bytes derived from the same read,
+        # into a preallocated ColorSample (self.sample unless one is passed)
+        s = self.sample if out is None else out
+        return self.fill(s, *self.read_raw(), time.monotonic_ns())
+
+    # ---- interrupt ----
+    def enable_interrupt(self, pers=PERS_EVERY_CYCLE):
+        # AINT (and the open-drain, active-low INT pin) per `pers`; the
+        # default asserts it at the end of every integration
+        self.write_reg(PERS, pers)
+        self.write_reg(ENABLE, ENABLE_PON | ENABLE_AEN | ENABLE_AIEN)
+        self.clear_interrupt()
+
+    def set_thresholds(self, low, high):
+        # Clear-channel band: with pers > 0, AINT fires when CDATA < low or
+        # CDATA > high. Both words go out in one auto-increment write.
+        low = max(0, min(0xFFFF, int(low)))
+        high = max(0, min(0xFFFF, int(high)))
+        self.bus.write_i2c_block_data(self.addr, CMD_AUTO_INC | AILTL,
+                                      [low & 0xFF, low >> 8, high & 0xFF, high >> 8])
+
+    def disable_interrupt(self):
+        self.write_reg(ENABLE, ENABLE_PON | ENABLE_AEN)
+        self.clear_interrupt()
+
+    def clear_interrupt(self):
+        self.bus.write_byte(self.addr, CMD_CLEAR_INT)
+
+    def close(self):
+        if not self.own_bus:
+            return
+        try:
+            self.bus.close()
+        except Exception:
+            pass
+
+def main():
+    ap = argparse.ArgumentParser(description="TCS34725 reader")
+    ap.add_argument("--integration", type=float, default=100.0, help="ms")
+    ap.add_argument("--gain", type=int, default=4, choices=GAINS)
+    args = ap.parse_args()
+    from i2cDiscovery import address
+    sensor = TCS34725(addr=address("tcs34725", TCS34725_ADDR),
+                      integration_ms=args.integration, gain=args.gain)
+    print(f"TCS34725 at 0x{sensor.addr:02X}, {sensor.integration_ms:.1f} ms x{sensor.gain}. Ctrl+C to stop.")
+    try:
+        while True:
+            print(sensor.read_all())
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sensor.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# rgbExposure.py — auto gain / integration time for the TCS34725
+#
+#   python3 rgbExposure.py                 sample with auto-exposure, print rate
+#
+#   sensor = TCS34725()
+#   ae = AutoExposure(sensor, ColorSampler(sensor))
+#   s = ae.read()              # next completed integration, then re-ranges
+#
+# The clear channel measures how much light there is: clear / (t_ms * gain)
+# is a flux that doesn't depend on the setting it was measured with. From it
+# the controller predicts the clear count of every (ATIME, gain) pair and
+# picks the shortest integration whose count is at least `target` (enough
+# signal for stable colour ratios) without exceeding `high` x saturation;
+# ties go to the lower gain. Short integrations mean more samples per second.
+#
+# Hysteresis: the setting is only changed when the clear count leaves the band
+# [min_counts, high x saturation], or when a setting at least twice as fast
+# would do. A new setting aims at target = 2 x min_counts, well inside the
+# band, so one change settles instead of oscillating. The first sample after
+# a change straddles two settings and is dropped without re-ranging on it.
+
+import time
+import argparse
+
+import numpy as np
+
+from rgbDriver import GAINS, ATIME_STEP_MS, saturation
+
+MIN_COUNTS = 1000        # clear counts for ~1 % quantisation on the colour ratios
+HIGH_FRAC  = 0.8         # of saturation; above this the setting is too sensitive
+CYCLE_OVERHEAD_MS = 2.4  # RGBC init state before every integration (WEN off)
+
+# Every (gain, ATIME cycles) pair, flattened: sensitivity and saturation
+_GAIN   = np.repeat(np.array(GAINS, dtype=np.float64), 256)
+_CYCLES = np.tile(np.arange(1, 257), len(GAINS))
+_SENS   = _CYCLES * ATIME_STEP_MS * _GAIN                 # counts per unit flux
+_SAT    = np.array([saturation(256 - c) for c in _CYCLES], dtype=np.float64)
+_ORDER  = np.lexsort((_GAIN, _CYCLES))                    # shortest first, then low gain
+
+def choose(flux, target, high=HIGH_FRAC):
+    # -> (cycles, gain) for a flux in clear counts per (ms x gain)
+    pred = flux * _SENS
+    ok = (pred >= target) & (pred <= high * _SAT)
+    if ok.any():
+        i = _ORDER[ok[_ORDER]][0]
+    elif (pred < target).all():
+        i = int(np.argmax(_SENS))                         # too dark: most sensitive
+    else:
+        fits = pred <= high * _SAT
+        if not fits.any():
+            i = int(np.argmin(_SENS))                     # too bright for anything
+        else:
+            i = int(np.flatnonzero(fits)[np.argmax(pred[fits])])   # most signal unsaturated
+    return int(_CYCLES[i]), int(_GAIN[i])
+
+class AutoExposure:
+    def __init__(self, sensor, sampler=None, min_counts=MIN_COUNTS, high=HIGH_FRAC):
+        # sampler: rgbSync.ColorSampler to read once per completed integration;
+        # without one, read() sleeps a nominal cycle before each read
+        self.sensor = sensor
+        self.sampler = sampler
+        self.min_counts = min_counts
+        self.target = 2 * min_counts
+        self.high = high
+        self.changes = 0
+        self.dropped = 0
+        self.settling = True                 # the sample in flight used an older setting
+        self.rate_hz = 0.0                   # measured, samples kept per second
+        self._last_stamp = None
+
+    @property
+    def cycle_ms(self):
+        return self.sensor.integration_ms + CYCLE_OVERHEAD_MS
+
+    @property
+    def nominal_rate_hz(self):
+        return 1000.0 / self.cycle_ms
+
+    def update(self, s):
+        # Re-range from a ColorSample; returns True when the setting changed
+        sensor = self.sensor
+        sens = sensor.integration_ms * sensor.gain
+        sat = sensor.saturation
+        cycles = 256 - sensor.atime
+        if s.c >= sat:
+            flux = 4.0 * sat / sens          # saturated: true flux is higher, step hard
+        else:
+            flux = s.c / sens
+        want_cycles, want_gain = choose(flux, self.target, self.high)
+        in_band = self.min_counts <= s.c <= self.high * sat
+        faster = want_cycles * 2 <= cycles
+        if in_band and not faster:
+            return False
+        if (want_cycles, want_gain) == (cycles, sensor.gain):
+            return False
+        sensor.set_integration_ms(want_cycles * ATIME_STEP_MS)
+        sensor.set_gain(want_gain)
+        self.changes += 1
+        self.settling = True
+        return True
+
+    def read(self, out=None):
+        # Next sample, re-range. Returns the ColorSample, or None when the
+        # sample straddled a setting change and was dropped
+        if self.sampler is not None:
+            s = self.sampler.read(out=out)
+        else:
+            time.sleep(self.cycle_ms / 1000.0)
+            s = self.sensor.read_all(out)
+        if self.settling:
+            # Integrated partly under the old setting: its flux would be
+            # wrong for the new one, so it neither re-ranges nor counts
+            self.settling = False
+            self.dropped += 1
+            return None
+        self.update(s)
+        if self._last_stamp is not None:
+            dt = (s.stamp - self._last_stamp) / 1e9
+            if dt > 0:
+                self.rate_hz += 0.1 * (1.0 / dt - self.rate_hz)
+        self._last_stamp = s.stamp
+        return s
+
+def main():
+    ap = argparse.ArgumentParser(description="TCS34725 with auto-exposure")
+    ap.add_argument("--min-counts", type=int, default=MIN_COUNTS)
+    ap.add_argument("--int-pin", type=int, help="BCM pin wired to the sensor's INT")
+    args = ap.parse_args()
+    from rgbDriver import TCS34725
+    from rgbSync import ColorSampler
+    from i2cDiscovery import address
+    sensor = TCS34725(addr=address("tcs34725", 0x29))
+    sampler = ColorSampler(sensor, args.int_pin)
+    ae = AutoExposure(sensor, sampler, args.min_counts)
+    print("Press Ctrl+C to stop.")
+    try:
+        t_next = time.monotonic() + 1.0
+        while True:
+            s = ae.read()
+            if s is None or time.monotonic() < t_next:
+                continue
+            t_next += 1.0
+            print(f"{sensor.integration_ms:6.1f} ms x{sensor.gain:<2}  {ae.rate_hz:6.1f} Hz"
+                  f" (max {ae.nominal_rate_hz:6.1f})  changes: {ae.changes}"
+                  f"  C: {s.c:5}  Lux: {s.lux}  CT: {s.ct}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sampler.close()
+        sensor.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# rgbFilter.py — smoothing for multi-channel sensor readings (TCS34725 and co.)
+#
+#   fb = FilterBank(("r", "g", "b", "c", "lux", "ct"), window=32)
+#   fb.push((r, g, b, c, lux, ct))       # ct may be None
+#   r_m = fb.value("r")                  # float, or None with no valid samples
+#   means = fb.mean()                    # all channels, NaN where none valid
+#
+# Every channel is a column of one (window, channels) NumPy ring with a
+# validity mask, so a push is a single row store. Running sums and valid
+# counts make mean() O(1) in the window size; ema() is O(1) as well.
+# median()/minimum()/maximum() scan the ring in one vectorised call, cheap for
+# the window sizes a 2–10 Hz colour sensor uses. The window is the last
+# `window` pushes for every channel; a missing reading (None/NaN, e.g. colour
+# temperature under some lighting) is masked out, so that channel is smoothed
+# over its valid samples among those pushes only — fewer than `window` when
+# some are missing, and None when all are. (The old per-channel deques skipped
+# missing readings instead and always held the last `window` valid values,
+# reaching further back in time.)
+
+import numpy as np
+
+MODES   = ("mean", "ema", "median", "min", "max")
+RESYNC  = 4096           # pushes between exact recomputations of the running sums
+
+class FilterBank:
+    def __init__(self, channels, window=3, mode="mean", alpha=None):
+        # channels: names (or a count); mode selects what value()/push() report;
+        # alpha: EMA weight of the newest sample (default 2 / (window + 1))
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        if isinstance(channels, int):
+            channels = tuple(range(channels))
+        self.names = tuple(channels)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        n = len(self.names)
+        self.window = window
+        self.mode = mode
+        self.alpha = 2.0 / (window + 1) if alpha is None else alpha
+        self.ring = np.zeros((window, n), dtype=np.float64)
+        self.valid = np.zeros((window, n), dtype=bool)
+        self.sum = np.zeros(n, dtype=np.float64)
+        self.nvalid = np.zeros(n, dtype=np.int64)
+        self.ema_val = np.full(n, np.nan)
+        self.pos = 0             # next row to overwrite
+        self.pushes = 0
+        self._row = np.empty(n, dtype=np.float64)
+        self._ok = np.empty(n, dtype=bool)
+
+    def reset(self):
+        self.ring[:] = 0.0
+        self.valid[:] = False
+        self.sum[:] = 0.0
+        self.nvalid[:] = 0
+        self.ema_val[:] = np.nan
+        self.pos = self.pushes = 0
+
+    def push(self, values):
+        # values: one reading per channel, None/NaN for missing. Returns the
+        # filtered values for self.mode (NaN where a channel has no data)
+        row, ok = self._row, self._ok
+        row[:] = [np.nan if v is None else v for v in values]
+        np.isfinite(row, out=ok)
+        row[~ok] = 0.0
+        i = self.pos
+        # Running sums: drop the row leaving the window, add the new one
+        self.sum -= self.ring[i]
+        self.nvalid -= self.valid[i]
+        self.ring[i] = row
+        self.valid[i] = ok
+        self.sum += row
+        self.nvalid += ok
+        self.pos = (i + 1) % self.window
+        self.pushes += 1
+        if self.pushes % RESYNC == 0:
+            # float sums drift over millions of add/subtract pairs
+            self.sum = self.ring.sum(axis=0)
+        # EMA: seeded by the first valid sample, held where a reading is missing
+        seed = ok & np.isnan(self.ema_val)
+        self.ema_val[seed] = row[seed]
+        upd = ok & ~seed
+        self.ema_val[upd] += self.alpha * (row[upd] - self.ema_val[upd])
+        return self.values()
+
+    def mean(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.nvalid > 0, self.sum / self.nvalid, np.nan)
+
+    def ema(self):
+        return self.ema_val.copy()
+
+    def _masked(self):
+        return np.where(self.valid, self.ring, np.nan)
+
+    def median(self):
+        out = np.full(len(self.names), np.nan)
+        has = self.nvalid > 0
+        if has.any():
+            out[has] = np.nanmedian(self._masked()[:, has], axis=0)
+        return out
+
+    def minimum(self):
+        out = np.full(len(self.names), np.nan)
+        has = self.nvalid > 0
+        if has.any():
+            out[has] = np.nanmin(self._masked()[:, has], axis=0)
+        return out
+
+    def maximum(self):
+        out = np.full(len(self.names), np.nan)
+        has = self.nvalid > 0
+        if has.any():
+            out[has] = np.nanmax(self._masked()[:, has], axis=0)
+        return out
+
+    def values(self, mode=None):
+        mode = mode or self.mode
+        return {"mean": self.mean, "ema": self.ema, "median": self.median,
+                "min": self.minimum, "max": self.maximum}[mode]()
+
+    def value(self, name, mode=None):
+        # One channel as a float, or None when it has no valid samples
+        v = self.values(mode)[self.index[name]]
+        return None if np.isnan(v) else float(v)
+
+
+if __name__ == "__main__":
+    import time
+    rng = np.random.default_rng(0)
+    for window in (3, 32, 1024):
+        fb = FilterBank(("r", "g", "b", "c", "lux", "ct", "rb", "gb", "bb"), window)
+        readings = rng.integers(0, 1000, (20000, 9)).tolist()
+        t0 = time.perf_counter()
+        for row in readings:
+            fb.push(row)
+        dt = (time.perf_counter() - t0) / len(readings)
+        print(f"window {window:5}: {dt * 1e6:6.1f} us per push+mean (9 channels)")
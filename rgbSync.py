@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# rgbSync.py — one TCS34725 read per completed integration, with its timestamp
+#
+#   sensor = TCS34725(integration_ms=24)
+#   sampler = ColorSampler(sensor)                 # poll STATUS.AINT over I2C
+#   sampler = ColorSampler(sensor, int_pin=4)      # or wait for the INT pin
+#   s = sampler.read()       # blocks until the next integration completes
+#   s.stamp, s.start         # monotonic ns: end and start of that integration
+#   watch = ChangeWatcher(sensor, int_pin=4)       # only when the reading changes
+#
+# The sensor raises AINT at the end of every integration (persistence 0) and
+# holds it until cleared, so each sample is read exactly once, as soon as it
+# exists — no stale re-reads and no idle sleeps of a fixed period; the rate
+# follows ATIME. Polling sleeps until the predicted end of the integration and
+# then checks STATUS and the data together in one 9-byte read every POLL_S;
+# the stamp is accurate to that interval. With the INT pin wired (open drain,
+# active low: pull-up to 3V3, BCM pin of your choice) the stamp is the
+# kernel's timestamp of the falling edge and the bus is idle between samples.
+
+import time
+from threading import Event
+
+from rgbDriver import STATUS, STATUS_AINT, PERS_EVERY_CYCLE, pers_for
+
+POLL_S       = 0.0005     # STATUS poll interval near the end of an integration
+EARLY_S      = 0.001      # start polling this long before the predicted end
+CYCLE_INIT_MS = 2.4       # RGBC init state preceding each integration
+GPIO_CHIP    = 0
+
+class ColorSampler:
+    def __init__(self, sensor, int_pin=None, chip=GPIO_CHIP, pers=PERS_EVERY_CYCLE):
+        self.sensor = sensor
+        self.int_pin = int_pin
+        self.samples = 0
+        self.next_end = None             # predicted monotonic s of the next AINT
+        self.h = None
+        self.cb = None
+        sensor.enable_interrupt(pers)
+        if int_pin is not None:
+            import lgpio
+            self.edges = []
+            self.wake = Event()
+            self.h = lgpio.gpiochip_open(chip)
+            lgpio.gpio_claim_alert(self.h, int_pin, lgpio.FALLING_EDGE, lgpio.SET_PULL_UP)
+            self.cb = lgpio.callback(self.h, int_pin, lgpio.FALLING_EDGE, self._on_edge)
+
+    @property
+    def cycle_s(self):
+        return (self.sensor.integration_ms + CYCLE_INIT_MS) / 1000.0
+
+    def _on_edge(self, chip, gpio, level, tick):
+        self.edges.append(tick)
+        self.wake.set()
+
+    def _wait_pin(self, timeout):
+        if not self.wake.wait(timeout):
+            return None
+        self.wake.clear()
+        stamp = self.edges[-1]
+        self.edges.clear()
+        return stamp
+
+    def _wait_poll(self, timeout):
+        sensor = self.sensor
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if self.next_end is not None:
+            delay = self.next_end - EARLY_S - time.monotonic()
+            if deadline is not None:
+                delay = min(delay, deadline - time.monotonic())
+            if delay > 0:
+                time.sleep(delay)
+        while True:
+            status, r, g, b, c = sensor.read_status_raw()
+            if status & STATUS_AINT:
+                return time.monotonic_ns(), (r, g, b, c)
+            if deadline is not None and time.monotonic() >= deadline:
+                return None, None
+            time.sleep(POLL_S)
+
+    def read(self, timeout=None, out=None):
+        # -> ColorSample for the next completed integration, None on timeout
+        sensor = self.sensor
+        s = sensor.sample if out is None else out
+        if self.int_pin is not None:
+            stamp = self._wait_pin(timeout)
+            if stamp is None:
+                return None
+            raw = sensor.read_raw()
+        else:
+            stamp, raw = self._wait_poll(timeout)
+            if stamp is None:
+                return None
+        # Clear after reading: the next AINT can only come from a newer cycle
+        self._rearm(raw)
+        sensor.clear_interrupt()
+        self.next_end = stamp / 1e9 + self.cycle_s
+        self.samples += 1
+        return sensor.fill(s, *raw, stamp)
+
+    def _rearm(self, raw):
+        pass
+
+    def close(self):
+        if self.cb is not None:
+            import lgpio
+            self.cb.cancel()
+            lgpio.gpio_free(self.h, self.int_pin)
+            lgpio.gpiochip_close(self.h)
+            self.cb = None
+        self.sensor.disable_interrupt()
+
+
+class ChangeWatcher(ColorSampler):
+    # Threshold-interrupt mode: the sensor keeps integrating on its own and
+    # only raises INT once the clear channel has been outside a band around
+    # the last reading for `cycles` consecutive integrations. read() returns
+    # when that happens (or immediately for the first, baseline reading),
+    # re-centres the band on the new reading and re-arms. With the INT pin
+    # wired, nothing crosses the bus while the scene is stable.
+    #
+    #   watch = ChangeWatcher(sensor, int_pin=4, band=0.15, cycles=3)
+    #   while True:
+    #       s = watch.read()        # a surface/marker change under the sensor
+    #
+    # Only the clear channel has thresholds, so this reacts to reflectance
+    # changes (tape, markers, edges); a hue change at equal brightness needs
+    # the polled ColorSampler. The stamp of a change is the end of the
+    # integration that completed the persistence count. Without the pin, AINT
+    # stays low while the scene is stable, so polling reads only the STATUS
+    # byte once per integration (the stamp is then accurate to one cycle).
+    def __init__(self, sensor, int_pin=None, chip=GPIO_CHIP, band=0.15, cycles=3):
+        self.band = band
+        # An empty band (low > high) makes the first integration fire, so the
+        # first read() returns the baseline
+        sensor.set_thresholds(0xFFFF, 0)
+        super().__init__(sensor, int_pin, chip, pers_for(cycles))
+        self.changes = 0
+
+    def _wait_poll(self, timeout):
+        sensor = self.sensor
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if sensor.read_reg(STATUS) & STATUS_AINT:
+                return time.monotonic_ns(), sensor.read_raw()
+            wait = self.cycle_s
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return None, None
+                wait = min(wait, left)
+            time.sleep(wait)
+
+    def recenter(self, clear):
+        margin = max(self.band * clear, 8)     # a few counts of noise floor
+        self.sensor.set_thresholds(clear - margin, clear + margin)
+
+    def _rearm(self, raw):
+        # New band before the interrupt is cleared, so the old band can't
+        # fire again in between
+        self.recenter(raw[3])
+        self.changes += 1
+
+
+def main():
+    import argparse
+    from rgbDriver import TCS34725
+    from i2cDiscovery import address
+    ap = argparse.ArgumentParser(description="TCS34725 synchronized sampling")
+    ap.add_argument("--int-pin", type=int, help="BCM pin wired to the sensor's INT")
+    ap.add_argument("--integration", type=float, default=24.0, help="ms")
+    ap.add_argument("--watch", type=float, metavar="BAND",
+                    help="threshold mode: report only when clear moves by BAND (e.g. 0.15)")
+    args = ap.parse_args()
+    sensor = TCS34725(addr=address("tcs34725", 0x29), integration_ms=args.integration)
+    if args.watch:
+        sampler = ChangeWatcher(sensor, args.int_pin, band=args.watch)
+    else:
+        sampler = ColorSampler(sensor, args.int_pin)
+    print(f"TCS34725 {sensor.integration_ms:.1f} ms, "
+          f"{'INT pin %d' % args.int_pin if args.int_pin is not None else 'polling'}. Ctrl+C to stop.")
+    try:
+        last = None
+        while True:
+            s = sampler.read()
+            dt = "" if last is None else f"  +{(s.stamp - last) / 1e6:7.1f} ms"
+            last = s.stamp
+            print(f"@{s.stamp} ns{dt}  C: {s.c:5}  RGB: {s.rgb}  Lux: {s.lux}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sampler.close()
+        sensor.close()
+
+if __name__ == "__main__":
+    main()
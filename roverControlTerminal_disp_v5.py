@@ -11,11 +11,14 @@ from threading import Lock
 from gpiozero import Button, LED
 from gpiozero.pins.lgpio import LGPIOFactory
 
-from luma.core.interface.serial import i2c
 from luma.oled.device import ssd1306
 from luma.core.render import canvas
 from PIL import ImageFont
 
+from i2cDiscovery import address
+from i2cBus import shared_bus
+from i2cGuard import GuardedDevice
+
 # -------- Pins (BCM) --------
 PIN_BTN_MODE   = 17   # MODE button
 PIN_BTN_ESTOP  = 23   # ESTOP button
@@ -26,24 +29,36 @@ PIN_LED_ESTOP  = 24   # ESTOP LED
 SUPPRESS_MODE_IN_ESTOP = True
 
 # -------- OLED (I2C) --------
-I2C_ADDR = 0x3C
-serial = i2c(port=1, address=I2C_ADDR)
-oled = ssd1306(serial, width=128, height=64)
+I2C_ADDR = address("ssd1306", 0x3C)   # cached bus scan; 0x3C if not found
+# Frames go out in small chunks through this process's bus owner (i2cBus).
+# There are no sensors here; roverSensorPanel.py is the script that puts the
+# IMU and colour sensor on the same owner, ahead of the display
+serial = shared_bus(1).display_serial(I2C_ADDR)
+# A missing or browned-out OLED is re-initialised in the background; until
+# then drawing is skipped instead of killing the script
+oled = GuardedDevice("ssd1306", lambda: ssd1306(serial, width=128, height=64),
+                     on_down=lambda reason: print(f"OLED lost ({reason}), retrying in the background"),
+                     on_up=lambda dev: draw_oled())
 font = ImageFont.load_default()
 
 LOG_LINES = 6
 log = deque(maxlen=LOG_LINES)
 log_lock = Lock()
+render_lock = Lock()   # main loop, button callbacks and the OLED recovery thread all draw
 
-def draw_oled():
-    with log_lock:
-        lines = list(log)  # snapshot to avoid "deque mutated during iteration"
-    with canvas(oled) as draw:
+def render(dev, lines):
+    with canvas(dev) as draw:
         y = 0
         for line in lines:
             draw.text((0, y), line, font=font, fill=255)
             y += 10
 
+def draw_oled():
+    with log_lock:
+        lines = list(log)  # snapshot to avoid "deque mutated during iteration"
+    with render_lock:
+        oled.call(render, lines)
+
 def log_line(text: str):
     msg = f"[{strftime('%H:%M:%S')}] {text}"
     print(msg)
@@ -129,7 +144,8 @@ def handle_sigint(sig, frame):
     running = False
 signal(SIGINT, handle_sigint)
 
-with canvas(oled): pass
+with render_lock:
+    oled.call(render, [])
 show_mode(state.name.replace("_", " "))
 log_line(f"Buttons MODE={PIN_BTN_MODE}, ESTOP={PIN_BTN_ESTOP}; LEDs MODE={PIN_LED_MODE}, ESTOP={PIN_LED_ESTOP}")
 
@@ -169,4 +185,5 @@ try:
 finally:
     led_mode.off()
     led_estop.off()
-    with canvas(oled): pass
+    with render_lock:
+        oled.call(render, [])
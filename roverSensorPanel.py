@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# roverSensorPanel.py — IMU + colour sensor + OLED on I2C bus 1, one process
+#
+#   python3 roverSensorPanel.py          live readings on the OLED, bus report on stdout
+#
+# All three devices go through one i2cBus.shared_bus(1): IMU reads outrank
+# colour reads, which outrank the display, and each OLED frame goes out in
+# DISPLAY_CHUNK-byte writes, so a redraw delays an IMU read by at most one
+# chunk instead of a whole frame. Every REPORT_S the per-device bus time and
+# queueing delay are printed.
+#
+# The arbitration only covers this process. readI2c.py, RGBsensor.py and the
+# other single-device scripts still open their own SMBus(1); run alongside
+# this one they are serialised only per transfer by the kernel.
+
+import time
+from threading import Thread, Event
+
+from luma.oled.device import ssd1306
+from luma.core.render import canvas
+from PIL import ImageFont
+
+from i2cBus import shared_bus, PRIO_IMU, PRIO_COLOR
+from i2cDiscovery import address
+from readI2c import ICM20948
+from imuDecode import Decoder
+from imuCalib import load_into
+from rgbDriver import TCS34725
+from rgbSync import ColorSampler
+
+IMU_HZ     = 200.0
+OLED_HZ    = 5.0
+REPORT_S   = 5.0
+COLOR_MS   = 24.0        # colour integration time
+
+def imu_loop(imu, dec, latest, stop):
+    scaled = dec.decode(bytes(imu.frame_len))  # preallocated (1, 7) row
+    period = 1.0 / IMU_HZ
+    next_t = time.monotonic()
+    while not stop.is_set():
+        latest["imu"] = tuple(dec.decode(imu.read_raw_frame(), out=scaled)[0])
+        next_t += period
+        delay = next_t - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_t = time.monotonic()
+
+def color_loop(sampler, latest, stop):
+    while not stop.is_set():
+        s = sampler.read(timeout=1.0)
+        if s is not None:
+            latest["color"] = (s.rgb, s.lux)
+
+def draw(oled, font, latest):
+    with canvas(oled) as d:
+        imu = latest.get("imu")
+        if imu is not None:
+            ax, ay, az, gx, gy, gz, tc = imu
+            d.text((0, 0), f"A {ax:+.2f} {ay:+.2f} {az:+.2f}", font=font, fill=255)
+            d.text((0, 10), f"G {gx:+.0f} {gy:+.0f} {gz:+.0f}", font=font, fill=255)
+            d.text((0, 20), f"T {tc:.1f} C", font=font, fill=255)
+        color = latest.get("color")
+        if color is not None:
+            rgb, lux = color
+            d.text((0, 34), f"RGB {rgb}", font=font, fill=255)
+            d.text((0, 44), f"Lux {'-' if lux is None else f'{lux:.0f}'}", font=font, fill=255)
+
+def main():
+    bus = shared_bus(1)
+    imu = ICM20948(bus=bus.client("icm20948", PRIO_IMU), addr=address("icm20948"))
+    dec = Decoder(frame_bytes=imu.frame_len)
+    load_into(dec, imu.addr)
+    sensor = TCS34725(bus=bus.client("tcs34725", PRIO_COLOR),
+                      addr=address("tcs34725", 0x29), integration_ms=COLOR_MS)
+    sampler = ColorSampler(sensor)
+    oled = ssd1306(bus.display_serial(address("ssd1306", 0x3C)), width=128, height=64)
+    font = ImageFont.load_default()
+
+    latest = {}
+    stop = Event()
+    threads = [Thread(target=imu_loop, args=(imu, dec, latest, stop), daemon=True),
+               Thread(target=color_loop, args=(sampler, latest, stop), daemon=True)]
+    for t in threads:
+        t.start()
+    print("IMU, colour sensor and OLED on the shared bus. Ctrl+C to stop.")
+    try:
+        next_report = time.monotonic() + REPORT_S
+        while True:
+            draw(oled, font, latest)
+            if time.monotonic() >= next_report:
+                next_report += REPORT_S
+                print(bus.report())
+            time.sleep(1.0 / OLED_HZ)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+        with canvas(oled):
+            pass
+        sampler.close()
+        sensor.close()
+        imu.close()
+        bus.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# sensorSink.py — where sensor scripts send their samples
+#
+#   sink = open_sink("csv", "run.csv", ("ax", "ay", "az"))   # or "bin", "console"
+#   sink.write((ax, ay, az))            # one row; None -> NaN
+#   sink.write_many(rows)               # (N, fields) array, e.g. a FIFO drain
+#   sink.close()                        # flushes everything still buffered
+#
+#   names, rows = read_binary("run.bin")    # (N, fields) array, zero parsing
+#
+# The file sinks copy rows into a preallocated chunk and hand full chunks to a
+# background thread, which formats (CSV) or writes them as raw bytes (binary)
+# in one large write. The sampling thread only ever does a NumPy row store;
+# text formatting is paid by the console sink alone, and only for the rows it
+# actually prints (`period` throttles it). A slow producer (one row every few
+# seconds) would take hours to fill a chunk, so the writer also takes the
+# partial chunk every FLUSH_S and writes it out. A write error in the writer
+# (disk full, EIO) is kept and raised from the next write() or close().
+#
+# Binary layout: header "<4sHHHH" (magic b"SNK1", version, field count, dtype
+# string length, names length), the dtype string (e.g. "<f4"), comma-separated
+# field names, zero padding to HEADER_ALIGN; then rows of `fields` values back
+# to back.
+
+import os
+import sys
+import time
+import queue
+import struct
+from abc import ABC, abstractmethod
+from threading import Thread, Lock
+
+import numpy as np
+
+CHUNK_ROWS   = 4096
+FLUSH_S      = 1.0         # partial chunks reach the file at least this often
+SINK_MAGIC   = b"SNK1"
+SINK_VERSION = 1
+SINK_HEADER  = struct.Struct("<4sHHHH")
+HEADER_ALIGN = 64
+KINDS        = ("console", "csv", "bin")
+
+class ConsoleSink:
+    # fmt(row) -> str builds the line; default is the fields as name=value.
+    # period: print at most one row per `period` seconds (0 = every row)
+    def __init__(self, fields, fmt=None, period=0.0, stream=None):
+        self.fields = tuple(fields)
+        self.fmt = fmt or self._default_fmt
+        self.period = period
+        self.stream = stream or sys.stdout
+        self.next_t = 0.0
+        self.rows = 0
+
+    def _default_fmt(self, row):
+        return "  ".join(f"{name}={'—' if v is None else v}" for name, v in zip(self.fields, row))
+
+    def write(self, row):
+        self.rows += 1
+        if self.period:
+            now = time.monotonic()
+            if now < self.next_t:
+                return
+            self.next_t = now + self.period
+        print(self.fmt(row), file=self.stream)
+
+    def write_many(self, rows):
+        if len(rows):
+            self.rows += len(rows) - 1
+            self.write(rows[-1])      # a block is summarised by its newest row
+
+    def close(self):
+        self.stream.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _ChunkedSink(ABC):
+    # Double-buffered rows -> background writer thread
+    def __init__(self, path, fields, dtype, chunk_rows=CHUNK_ROWS, flush_s=FLUSH_S):
+        self.fields = tuple(fields)
+        self.dtype = np.dtype(dtype)
+        self.chunk_rows = chunk_rows
+        self.flush_s = flush_s
+        self.rows = 0
+        self.error = None              # exception raised by the writer thread
+        self.f = open(path, "wb")
+        self._write_header()
+        self.lock = Lock()             # producer vs. the writer's timed flush
+        self.free = queue.Queue()
+        self.full = queue.Queue()
+        for _ in range(2):
+            self.free.put(np.empty((chunk_rows, len(self.fields)), dtype=self.dtype))
+        self.buf = self.free.get()
+        self.n = 0
+        self.thread = Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _write_header(self):
+        pass
+
+    @abstractmethod
+    def _emit(self, block):
+        ...
+
+    def _run(self):
+        while True:
+            try:
+                item = self.full.get(timeout=self.flush_s)
+            except queue.Empty:
+                # Idle: the spare buffer is free, so take the partial one.
+                # A producer holding the lock is busy writing anyway (and may
+                # be waiting on us), so skip the round rather than wait
+                if self.lock.acquire(blocking=False):
+                    try:
+                        self._hand_off(wait=False)
+                    finally:
+                        self.lock.release()
+                continue
+            if item is None:
+                break
+            buf, n = item
+            if self.error is None:
+                try:
+                    self._emit(buf[:n])
+                    self.f.flush()
+                except Exception as e:
+                    self.error = e     # keep recycling buffers so the producer never blocks
+            self.free.put(buf)
+
+    def _hand_off(self, wait=True):
+        if not self.n:
+            return
+        if wait:
+            buf = self.free.get()      # blocks only if the writer is 2 chunks behind
+        else:
+            try:
+                buf = self.free.get_nowait()
+            except queue.Empty:
+                return
+        self.full.put((self.buf, self.n))
+        self.buf = buf
+        self.n = 0
+
+    def _check(self):
+        if self.error is not None:
+            raise self.error
+
+    def write(self, row):
+        # None -> NaN for float dtypes
+        self._check()
+        with self.lock:
+            self.buf[self.n] = row
+            self.n += 1
+            self.rows += 1
+            if self.n == self.chunk_rows:
+                self._hand_off()
+
+    def write_many(self, rows):
+        self._check()
+        rows = np.asarray(rows)
+        done = 0
+        with self.lock:
+            while done < len(rows):
+                k = min(len(rows) - done, self.chunk_rows - self.n)
+                self.buf[self.n:self.n + k] = rows[done:done + k]
+                self.n += k
+                done += k
+                if self.n == self.chunk_rows:
+                    self._hand_off()
+            self.rows += len(rows)
+
+    def flush(self):
+        # Hand off a partial chunk now instead of waiting for the timer
+        with self.lock:
+            self._hand_off()
+
+    def close(self):
+        if self.f is None:
+            return
+        with self.lock:
+            self._hand_off()
+        self.full.put(None)
+        self.thread.join()
+        self.f.close()
+        self.f = None
+        self._check()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CSVSink(_ChunkedSink):
+    def __init__(self, path, fields, dtype="<f8", chunk_rows=CHUNK_ROWS, fmt="%.6g",
+                 flush_s=FLUSH_S):
+        self.fmt = fmt
+        super().__init__(path, fields, dtype, chunk_rows, flush_s)
+
+    def _write_header(self):
+        self.f.write((",".join(self.fields) + "\n").encode())
+
+    def _emit(self, block):
+        np.savetxt(self.f, block, fmt=self.fmt, delimiter=",")
+
+
+class BinarySink(_ChunkedSink):
+    def __init__(self, path, fields, dtype="<f4", chunk_rows=CHUNK_ROWS, flush_s=FLUSH_S):
+        super().__init__(path, fields, dtype, chunk_rows, flush_s)
+
+    def _write_header(self):
+        dt = self.dtype.str.encode()
+        names = ",".join(self.fields).encode()
+        hdr = SINK_HEADER.pack(SINK_MAGIC, SINK_VERSION, len(self.fields),
+                               len(dt), len(names)) + dt + names
+        hdr += bytes(-len(hdr) % HEADER_ALIGN)
+        self.f.write(hdr)
+
+    def _emit(self, block):
+        self.f.write(memoryview(np.ascontiguousarray(block)).cast("B"))
+
+
+def read_binary(path):
+    # -> (field names, (N, fields) memmapped array)
+    with open(path, "rb") as f:
+        head = f.read(4096)
+    magic, version, nfields, dtlen, nameslen = SINK_HEADER.unpack_from(head)
+    if magic != SINK_MAGIC or version != SINK_VERSION:
+        raise ValueError(f"{path}: not a sensor sink v{SINK_VERSION} file")
+    pos = SINK_HEADER.size
+    dtype = np.dtype(head[pos:pos + dtlen].decode())
+    pos += dtlen
+    names = head[pos:pos + nameslen].decode().split(",")
+    pos += nameslen
+    offset = pos + (-pos % HEADER_ALIGN)
+    n = (os.path.getsize(path) - offset) // (dtype.itemsize * nfields)
+    if n == 0:
+        return names, np.empty((0, nfields), dtype=dtype)
+    return names, np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(n, nfields))
+
+def open_sink(kind, path, fields, **kw):
+    # kind: "console" (path ignored), "csv" or "bin"
+    if kind == "console":
+        return ConsoleSink(fields, **kw)
+    if kind == "csv":
+        return CSVSink(path, fields, **kw)
+    if kind == "bin":
+        return BinarySink(path, fields, **kw)
+    raise ValueError(f"sink kind must be one of {KINDS}")
+
+def add_sink_args(ap, default_path):
+    # --out / --out-path for a script's argparse parser
+    ap.add_argument("--out", choices=KINDS, default="console",
+                    help="console (formatted), csv or bin (packed records)")
+    ap.add_argument("--out-path", default=default_path,
+                    help="file for the csv/bin sinks")
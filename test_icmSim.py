@@ -0,0 +1,96 @@
+# test_icmSim.py — the IMU driver stack against icmSim, no rover needed
+#
+#   python3 -m pytest -q test_icmSim.py
+
+import time
+import errno
+
+import numpy as np
+import pytest
+from smbus2 import i2c_msg
+
+from icmSim import SimICM20948, SimBus
+from readI2c import ICM20948, FRAME_REG, FRAME_LEN
+from imuMulti import IMUArray
+from imuDecode import Decoder
+from imuFifo import FifoStream
+from imuRecord import record, Recording
+
+def make_imu(**kw):
+    # Noise-free simulator, no wire time; one sample is ready on return
+    sim = SimICM20948(noise=0.0, bus_hz=0, **kw)
+    imu = ICM20948(bus=sim)
+    time.sleep(0.002)
+    return sim, imu
+
+def test_read_all_burst():
+    _, imu = make_imu(accel_g=(0.5, -0.25, 1.0), gyro_dps=(10.0, -20.0, 30.0), temp_c=30.0)
+    s = imu.read_all()
+    assert (s.ax, s.ay, s.az) == (8192, -4096, 16384)
+    assert (s.gx, s.gy, s.gz) == (1310, -2620, 3930)
+    assert s.temp_c == pytest.approx(30.0, abs=0.01)
+
+def test_read_all_on_shared_bus():
+    bus = SimBus(SimICM20948(0x68, noise=0.0, bus_hz=0),
+                 SimICM20948(0x69, accel_g=(0.0, 0.0, -1.0), noise=0.0, bus_hz=0))
+    a, b = ICM20948(bus=bus, addr=0x68), ICM20948(bus=bus, addr=0x69)
+    time.sleep(0.002)
+    assert a.read_all().az == 16384
+    assert b.read_all().az == -16384
+
+def test_rdwr_one_read_last_like_bcm2835():
+    bus = SimBus(SimICM20948(0x68, noise=0.0, bus_hz=0), SimICM20948(0x69, noise=0.0, bus_hz=0))
+    with pytest.raises(OSError) as e:
+        bus.i2c_rdwr(i2c_msg.write(0x68, [FRAME_REG]), i2c_msg.read(0x68, FRAME_LEN),
+                     i2c_msg.write(0x69, [FRAME_REG]), i2c_msg.read(0x69, FRAME_LEN))
+    assert e.value.errno == errno.EOPNOTSUPP
+    array = IMUArray(bus=bus)
+    time.sleep(0.002)
+    stamps, buf = array.read_frames()
+    assert array.addrs == [0x68, 0x69] and len(buf) == 2 * FRAME_LEN
+    assert stamps[0] < stamps[1]
+
+def test_fifo_drain_count_and_overflow():
+    _, imu = make_imu()
+    fifo = FifoStream(imu, 1125.0)
+    time.sleep(0.01)
+    frames, overflowed = fifo.drain()
+    assert not overflowed
+    assert 8 <= len(frames) <= 20                   # ~11 samples in 10 ms at 1125 Hz
+    assert (frames[:, 2] == 16384).all()
+    # Stall well past a full FIFO: snapshot mode keeps the first 42 frames
+    time.sleep(0.1)
+    frames, overflowed = fifo.drain()
+    assert overflowed
+    assert len(frames) == 512 // 12
+    assert fifo.overflows == 1
+    # The FIFO was reset, so the next drain starts clean
+    time.sleep(0.005)
+    frames, overflowed = fifo.drain()
+    assert not overflowed and len(frames) > 0
+    fifo.stop()
+
+def test_enable_mag_decode():
+    _, imu = make_imu(mag_ut=(20.0, 0.0, -40.0))
+    imu.enable_mag()
+    time.sleep(0.02)
+    frame = imu.read_raw_frame()
+    assert len(frame) == imu.frame_len
+    mx, my, mz = Decoder(frame_bytes=imu.frame_len).decode_mag(frame)[0]
+    # 0.15 µT per count, truncated toward zero
+    assert (mx, my, mz) == pytest.approx((19.95, 0.0, -39.9), abs=1e-3)
+
+def test_record_round_trip(tmp_path):
+    _, imu = make_imu(accel_g=(0.0, 0.5, 1.0))
+    path = str(tmp_path / "run.imu")
+    n, overflows = record(imu, path, 1125.0, seconds=0.2)
+    assert n > 100 and overflows == 0
+    rec = Recording(path)
+    assert len(rec) == n
+    assert rec.odr == pytest.approx(1125.0)
+    t, counts = rec.samples()
+    assert counts.shape == (n, 7)
+    assert (np.diff(t) > 0).all()
+    assert (counts[:, 1] == 8192).all() and (counts[:, 2] == 16384).all()
+    _, scaled = rec.scaled()
+    assert scaled[:, 2] == pytest.approx(np.ones(n), abs=1e-4)